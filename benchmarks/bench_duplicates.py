@@ -0,0 +1,93 @@
+"""
+Benchmark de la détection des doublons de BeGreen!
+Compare les octets lus par l'ancienne méthode (hash MD5 de chaque fichier)
+et par la détection par étapes (taille, début/fin, contenu complet)
+
+Usage : python benchmarks/bench_duplicates.py [nombre_de_fichiers]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import hashlib
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_analyzer import FileAnalyzer  # noqa: E402
+
+
+def build_tree(root, file_count, duplicate_ratio=0.05, seed=42):
+    """Crée une arborescence synthétique avec une part de doublons"""
+    rng = random.Random(seed)
+    originals = []
+    for i in range(file_count):
+        folder = os.path.join(root, f"dir_{i % 50:02d}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"file_{i:06d}.bin")
+
+        if originals and rng.random() < duplicate_ratio:
+            shutil.copyfile(rng.choice(originals), path)
+            continue
+
+        # Tailles variées, avec quelques collisions de taille sans doublon
+        size = rng.choice([rng.randint(1, 64 * 1024), rng.randint(64 * 1024, 4 * 1024 * 1024), 256 * 1024])
+        with open(path, "wb") as f:
+            f.write(rng.randbytes(size))
+        originals.append(path)
+
+
+def legacy_scan(folder_path):
+    """Reproduit l'ancienne analyse : hash MD5 complet de chaque fichier <500MB"""
+    bytes_read = 0
+    file_hashes = defaultdict(list)
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            if os.path.isfile(file_path) and os.path.getsize(file_path) < 500 * 1024 * 1024:
+                hash_md5 = hashlib.md5()
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(4096), b""):
+                        hash_md5.update(chunk)
+                        bytes_read += len(chunk)
+                file_hashes[hash_md5.hexdigest()].append(file_path)
+
+    duplicates = []
+    for paths in file_hashes.values():
+        if len(paths) > 1:
+            duplicates.extend(paths[1:])
+    return duplicates, bytes_read
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    root = tempfile.mkdtemp(prefix="begreen_bench_")
+    try:
+        build_tree(root, file_count)
+
+        start = time.perf_counter()
+        legacy_duplicates, legacy_bytes = legacy_scan(root)
+        legacy_time = time.perf_counter() - start
+
+        analyzer = FileAnalyzer()
+        start = time.perf_counter()
+        analyzer.analyze_directory(root)
+        staged_time = time.perf_counter() - start
+        staged_duplicates = analyzer.get_analysis_data()['duplicates']
+
+        print(f"Fichiers : {file_count}, doublons : {len(staged_duplicates)}")
+        print(f"Ancienne méthode : {legacy_bytes / 1024 ** 2:10.1f} MB lus en {legacy_time:.2f} s")
+        print(f"Par étapes       : {analyzer.bytes_read / 1024 ** 2:10.1f} MB lus en {staged_time:.2f} s")
+        if analyzer.bytes_read:
+            print(f"Réduction        : x{legacy_bytes / analyzer.bytes_read:.1f}")
+        if sorted(legacy_duplicates) != sorted(staged_duplicates):
+            print("⚠️ Les doublons détectés diffèrent de l'ancienne méthode !")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark des empreintes de BeGreen!
+Mesure le débit (MB/s) de chaque algorithme, méthode de lecture et taille de tampon
+sur un fichier synthétique, lu depuis le cache disque après un premier passage
+
+Usage : python benchmarks/bench_hashing.py [taille_en_MB] [fichier]
+Par défaut : fichier temporaire de 256 MB (supprimé à la fin).
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import ALGORITHMS, READERS, MMAP_THRESHOLD, Hasher  # noqa: E402
+
+CHUNK_SIZES = (4 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+REPEAT = 3
+
+
+def build_file(path, size_mb):
+    """Écrit un fichier de contenu pseudo-aléatoire"""
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def measure(hasher, path, size):
+    """Meilleur débit sur REPEAT passages, en MB/s"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        digest, bytes_read = hasher.hash_file(path, size)
+        elapsed = time.perf_counter() - start
+        if digest is None or bytes_read != size:
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return size / (1024 ** 2) / best
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    keep = len(sys.argv) > 2
+    path = sys.argv[2] if keep else os.path.join(tempfile.mkdtemp(prefix="begreen_hash_"), "data.bin")
+    try:
+        if not os.path.exists(path):
+            build_file(path, size_mb)
+        size = os.path.getsize(path)
+        print(f"Fichier : {path} ({size / 1024 ** 2:.0f} MB)")
+        if size < MMAP_THRESHOLD:
+            print(f"Fichier plus petit que {MMAP_THRESHOLD // 1024 ** 2} MB : 'mmap' lit avec readinto")
+
+        # Un premier passage pour que toutes les mesures partent du même cache disque
+        Hasher('md5').hash_file(path, size)
+
+        results = []
+        for algorithm in ALGORITHMS:
+            for reader in READERS:
+                # file_digest et mmap gèrent eux-mêmes leur tampon
+                chunk_sizes = CHUNK_SIZES if reader in ('read', 'readinto') else (None,)
+                for chunk_size in chunk_sizes:
+                    hasher = Hasher(algorithm, reader, chunk_size or CHUNK_SIZES[-1])
+                    rate = measure(hasher, path, size)
+                    label = f"{chunk_size // 1024} KB" if chunk_size else "-"
+                    print(f"{algorithm:<8} {reader:<12} {label:>8} "
+                          + (f"{rate:10.0f} MB/s" if rate else "     erreur"))
+                    if rate:
+                        results.append((rate, algorithm, reader, label))
+
+        rate, algorithm, reader, label = max(results)
+        print(f"Le plus rapide : {algorithm} / {reader} / {label} ({rate:.0f} MB/s)")
+    finally:
+        if not keep:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark du démarrage de BeGreen!
+Mesure le temps entre le lancement de Python et le premier affichage de la fenêtre
+principale, à froid (premier lancement : polices et logo à préparer) puis à chaud
+
+Usage : python benchmarks/bench_startup.py [répétitions]
+Nécessite un affichage (DISPLAY sous Linux). Chaque mesure tourne dans un nouveau
+processus, depuis un dossier de données temporaire.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import statistics
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 5
+
+# Exécuté dans le processus mesuré : imports, création de l'application, premier affichage
+CHILD = """
+import sys, time, json
+started = time.perf_counter()
+from ui.main_window import BeGreenApp
+imported = time.perf_counter()
+app = BeGreenApp()
+created = time.perf_counter()
+app.root.update()
+painted = time.perf_counter()
+print(json.dumps({'imports': imported - started, 'init': created - imported, 'paint': painted - created,
+                  'modules': sorted(name for name in ('PIL', 'webbrowser', 'ui.settings') if name in sys.modules),
+                  'painted_at': time.time()}))
+app.root.destroy()
+"""
+
+
+def run_once(workdir):
+    """Lance l'application une fois ; retourne le détail des temps et le temps total depuis le lancement"""
+    env = dict(os.environ, PYTHONPATH=REPO)
+    launched = time.time()
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "échec")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total'] = timings.pop('painted_at') - launched
+    return timings
+
+
+def prepare(workdir):
+    """Dossier de données minimal : logo et utilisateur déjà enregistré (pas de dialogue de bienvenue)"""
+    data = os.path.join(workdir, "data")
+    os.makedirs(data)
+    shutil.copy(os.path.join(REPO, "data", "sub_BeGreen.png"), data)
+    with open(os.path.join(data, "begreen_config.json"), "w", encoding="utf-8") as f:
+        json.dump({'username': 'benchmark', 'theme': 'clair'}, f)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else REPEAT
+    workdir = tempfile.mkdtemp(prefix="begreen_startup_")
+    try:
+        prepare(workdir)
+        try:
+            cold = run_once(workdir)
+            warm = [run_once(workdir) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"Erreur lors du lancement de l'application: {e}")
+            return
+
+        print(f"{'':<10} {'imports':>9} {'init':>9} {'affichage':>9} {'total':>9}")
+        print(f"{'à froid':<10} " + " ".join(f"{cold[key] * 1000:8.0f}ms"
+                                              for key in ('imports', 'init', 'paint', 'total')))
+        print(f"{'à chaud':<10} " + " ".join(f"{statistics.median(t[key] for t in warm) * 1000:8.0f}ms"
+                                              for key in ('imports', 'init', 'paint', 'total')))
+        print(f"Modules chargés au démarrage (à chaud) : {', '.join(warm[-1]['modules']) or 'aucun'}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
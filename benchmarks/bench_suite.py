@@ -0,0 +1,234 @@
+"""
+Suite de benchmarks reproductible de BeGreen!
+Analyse, score et suppression des doublons sur des arborescences synthétiques (voir synthetic.py) :
+temps, appels système, octets lus et pic de mémoire, enregistrés en JSON pour comparer deux versions
+
+Usage : python benchmarks/bench_suite.py [--scale 0.1] [--scenario NOM] [--repeat 3] [--output resultats.json]
+        python benchmarks/bench_suite.py --compare avant.json apres.json
+Les arbres sont créés dans /dev/shm (tmpfs) s'il existe : les mesures ne dépendent pas du disque ni du
+cache de pages. Chaque mesure tourne dans un nouveau processus (pic de mémoire propre à la mesure).
+Les appels système comptés sont les lectures et écritures de /proc/self/io (Linux), plus les appels à
+stat du parcours ; les suppressions (unlink) n'y figurent pas.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+
+from synthetic import TreeSpec, build_tree
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 3
+FORMAT_VERSION = 1
+TMPFS = "/dev/shm"
+
+# Scénarios : nombre de fichiers à l'échelle 1, distribution des tailles, doublons, liens physiques, profondeur.
+# À l'échelle 1, l'arbre le plus gros (mixed) occupe environ 400 MB de tmpfs.
+SCENARIOS = {
+    'small_files': dict(files=20000, depth=3, fanout=6, sizes='small', duplicate_ratio=0.05),
+    'mixed': dict(files=1000, depth=3, fanout=4, sizes='mixed', duplicate_ratio=0.1),
+    'large_files': dict(files=60, depth=1, fanout=4, sizes='large', duplicate_ratio=0.2),
+    'many_duplicates': dict(files=5000, depth=2, fanout=8, sizes='small', duplicate_ratio=0.5),
+    'hardlinks': dict(files=5000, depth=2, fanout=8, sizes='small', duplicate_ratio=0.1, hardlink_ratio=0.3),
+    'deep': dict(files=5000, depth=40, fanout=1, sizes='small', duplicate_ratio=0.1),
+}
+
+# Exécuté dans le processus mesuré : analyse, score puis suppression des doublons (même FileAnalyzer)
+CHILD = """
+import sys, time, json, resource
+from file_analyzer import FileAnalyzer
+from metrics import read_proc_io
+
+def peak_rss():
+    # VmHWM repart de zéro à l'exec ; ru_maxrss garde le pic du processus parent au moment du fork
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Ko sous Linux
+
+def measure(step, **extra):
+    io_before = read_proc_io() or {}
+    started = time.perf_counter()
+    result = step()
+    seconds = time.perf_counter() - started
+    io_after = read_proc_io() or {}
+    delta = {key: value - io_before.get(key, 0) for key, value in io_after.items()}
+    return result, {'seconds': seconds, 'read_syscalls': delta.get('syscr'), 'write_syscalls': delta.get('syscw'),
+                    'read_chars': delta.get('rchar'), 'storage_read_bytes': delta.get('read_bytes'),
+                    'peak_rss_bytes': peak_rss(), **extra}
+
+root, workers = sys.argv[1], int(sys.argv[2]) or None
+analyzer = FileAnalyzer(workers=workers)
+steps = {'startup': {'peak_rss_bytes': peak_rss()}}
+success, steps['analyze'] = measure(lambda: analyzer.analyze_directory(root))
+if not success:
+    sys.exit("Analyse échouée")
+metrics = analyzer.get_metrics()
+steps['analyze'].update(bytes_hashed=analyzer.bytes_read, stat_calls=metrics['counters'].get('stat_calls'),
+                        files=analyzer.file_analysis['total_files'],
+                        duplicate_groups=len(analyzer.duplicate_groups),
+                        phases={name: phase['seconds'] for name, phase in metrics['phases'].items()})
+score, steps['green_score'] = measure(analyzer.calculate_green_score)
+steps['green_score']['score'] = score
+removed, steps['remove_duplicates'] = measure(analyzer.remove_duplicates)
+steps['remove_duplicates']['removed'] = removed
+print(json.dumps(steps))
+"""
+STEPS = ('analyze', 'green_score', 'remove_duplicates')
+# Mesures résumées (médiane des répétitions) et comparées
+SUMMARY_KEYS = ('seconds', 'read_syscalls', 'write_syscalls', 'read_chars', 'peak_rss_bytes')
+
+
+def default_workdir():
+    """tmpfs si disponible (Linux), sinon le dossier temporaire du système"""
+    if os.path.isdir(TMPFS) and os.access(TMPFS, os.W_OK):
+        return TMPFS
+    return tempfile.gettempdir()
+
+
+def filesystem_type(path):
+    """Type du système de fichiers qui contient path (/proc/mounts), sinon None"""
+    try:
+        with open('/proc/mounts', 'r') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    best = None
+    for mount_point, fs_type in mounts:
+        if (path == mount_point or path.startswith(os.path.join(mount_point, ''))) and \
+                (best is None or len(mount_point) > len(best[0])):
+            best = (mount_point, fs_type)
+    return best[1] if best else None
+
+
+def environment(workdir):
+    """Contexte des mesures, pour ne comparer que des exécutions comparables"""
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+            'revision': revision, 'workdir': workdir, 'filesystem': filesystem_type(workdir),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run_once(root, workers):
+    """Mesure les étapes dans un nouveau processus ; retourne le détail par étape"""
+    env = dict(os.environ, PYTHONPATH=REPO)
+    result = subprocess.run([sys.executable, "-c", CHILD, root, str(workers or 0)], cwd=REPO, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "échec")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    """Médiane et minimum de chaque mesure, par étape"""
+    summary = {}
+    for step in STEPS:
+        summary[step] = {}
+        for key in SUMMARY_KEYS:
+            values = [run[step][key] for run in runs if run[step].get(key) is not None]
+            if values:
+                summary[step][key] = {'median': statistics.median(values), 'min': min(values)}
+    return summary
+
+
+def run_scenario(name, spec, workdir, repeat, workers):
+    """Recrée l'arbre avant chaque répétition (la suppression le modifie) et mesure les étapes"""
+    runs = []
+    tree = None
+    for _ in range(repeat):
+        root = tempfile.mkdtemp(prefix=f"begreen_bench_{name}_", dir=workdir)
+        try:
+            tree = build_tree(root, spec)
+            runs.append(run_once(root, workers))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return {'spec': spec.to_dict(), 'tree': tree, 'runs': runs, 'summary': summarize(runs)}
+
+
+def compare(old_path, new_path):
+    """Affiche l'évolution des médianes entre deux fichiers de résultats"""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    for label, data in (("Avant", old), ("Après", new)):
+        env = data['environment']
+        print(f"{label} : {env['revision'] or '?'} ({env['date']}, {env['filesystem'] or '?'}, "
+              f"{env['cpu_count']} CPU, échelle {data['scale']})")
+    if old['scale'] != new['scale']:
+        print("Attention : échelles différentes, les mesures ne sont pas comparables")
+
+    print(f"\n{'Scénario':<18}{'Étape':<20}{'Mesure':<16}{'Avant':>14}{'Après':>14}{'Écart':>9}")
+    for name, scenario in new['scenarios'].items():
+        previous = old['scenarios'].get(name)
+        if previous is None or previous['spec'] != scenario['spec']:
+            print(f"{name:<18}(absent ou différent dans {old_path})")
+            continue
+        for step in STEPS:
+            for key in SUMMARY_KEYS:
+                before = previous['summary'][step].get(key)
+                after = scenario['summary'][step].get(key)
+                if before is None or after is None:
+                    continue
+                before, after = before['median'], after['median']
+                change = f"{(after - before) / before:+.0%}" if before else "-"
+                print(f"{name:<18}{step:<20}{key:<16}{before:>14.4g}{after:>14.4g}{change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de BeGreen! sur des arborescences synthétiques")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scénario à lancer (plusieurs possibles, tous par défaut)")
+    parser.add_argument('--scale', type=float, default=1.0, help="facteur appliqué au nombre de fichiers")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="répétitions par scénario")
+    parser.add_argument('--workers', type=int, default=None, help="threads de hash (par défaut : automatique)")
+    parser.add_argument('--seed', type=int, default=42, help="graine des arborescences")
+    parser.add_argument('--dir', default=None, help="dossier des arborescences (par défaut : /dev/shm si possible)")
+    parser.add_argument('--output', default=None, help="fichier JSON des résultats (par défaut : sortie standard)")
+    parser.add_argument('--compare', nargs=2, metavar=('AVANT', 'APRES'), help="compare deux fichiers de résultats")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    workdir = args.dir or default_workdir()
+    results = {'version': FORMAT_VERSION, 'environment': environment(workdir), 'scale': args.scale,
+               'repeat': args.repeat, 'workers': args.workers, 'scenarios': {}}
+    for name in args.scenario or SCENARIOS:
+        params = dict(SCENARIOS[name])
+        params['files'] = max(1, int(params['files'] * args.scale))
+        spec = TreeSpec(seed=args.seed, **params)
+        print(f"{name} : {spec.files} fichiers...", file=sys.stderr)
+        scenario = run_scenario(name, spec, workdir, args.repeat, args.workers)
+        results['scenarios'][name] = scenario
+        analyze = scenario['summary']['analyze']
+        print(f"  analyse {analyze['seconds']['median']:.3f} s, "
+              f"pic {analyze['peak_rss_bytes']['median'] / (1024 ** 2):.1f} MB", file=sys.stderr)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
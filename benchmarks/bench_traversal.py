@@ -0,0 +1,90 @@
+"""
+Micro-benchmark du parcours des dossiers de BeGreen!
+Compare os.walk + isfile + getsize (ancienne boucle) et TreeScanner (os.scandir)
+sur une arborescence synthétique de fichiers vides
+
+Usage : python benchmarks/bench_traversal.py [nombre_de_fichiers] [dossier]
+Par défaut : 1 000 000 fichiers dans un dossier temporaire (supprimé à la fin).
+Un dossier déjà généré peut être réutilisé en le passant en second argument.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import TreeScanner  # noqa: E402
+
+FILES_PER_DIR = 1000
+DIRS_PER_LEVEL = 32
+
+
+def build_tree(root, file_count):
+    """Crée file_count fichiers vides répartis sur deux niveaux de dossiers"""
+    marker = os.path.join(root, f".begreen_bench_{file_count}")
+    if os.path.exists(marker):
+        return
+
+    for i in range(0, file_count, FILES_PER_DIR):
+        block = i // FILES_PER_DIR
+        folder = os.path.join(root, f"l1_{block // DIRS_PER_LEVEL:04d}", f"l2_{block % DIRS_PER_LEVEL:02d}")
+        os.makedirs(folder, exist_ok=True)
+        for j in range(i, min(i + FILES_PER_DIR, file_count)):
+            open(os.path.join(folder, f"f_{j:07d}.txt"), "wb").close()
+    open(marker, "wb").close()
+
+
+def legacy_walk(folder_path):
+    """Ancienne boucle : os.walk puis isfile et getsize pour chaque fichier"""
+    total_files = total_size = 0
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            if os.path.isfile(file_path):
+                total_size += os.path.getsize(file_path)
+                total_files += 1
+    return total_files, total_size
+
+
+def scanner_walk(folder_path):
+    """Nouveau parcours : un stat par fichier via os.scandir"""
+    total_files = total_size = 0
+    for _, state, _ in TreeScanner().walk(folder_path):
+        for size in state.sizes:
+            total_size += size
+            total_files += 1
+    return total_files, total_size
+
+
+def measure(label, func, folder_path):
+    start = time.perf_counter()
+    total_files, _ = func(folder_path)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {total_files:>9} fichiers en {elapsed:6.2f} s ({total_files / elapsed:,.0f} fichiers/s)")
+    return elapsed
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    keep = len(sys.argv) > 2
+    root = sys.argv[2] if keep else tempfile.mkdtemp(prefix="begreen_walk_")
+    try:
+        start = time.perf_counter()
+        build_tree(root, file_count)
+        print(f"Arborescence prête en {time.perf_counter() - start:.1f} s : {root}")
+
+        # Un premier passage pour que les deux mesures partent du même cache disque
+        scanner_walk(root)
+        legacy = measure("os.walk + isfile + getsize", legacy_walk, root)
+        current = measure("TreeScanner (scandir)", scanner_walk, root)
+        print(f"Gain : x{legacy / current:.2f}")
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
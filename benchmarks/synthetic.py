@@ -0,0 +1,117 @@
+"""
+Arborescences synthétiques pour les benchmarks de BeGreen!
+Nombre de fichiers, tailles, doublons, liens physiques et profondeur contrôlés, reproductibles (graine)
+"""
+
+import os
+import random
+
+# Distributions de tailles : (poids, taille minimale, taille maximale) en octets
+SIZE_DISTRIBUTIONS = {
+    'small': [(0.9, 0, 16 * 1024), (0.1, 16 * 1024, 256 * 1024)],
+    'mixed': [(0.7, 0, 64 * 1024), (0.25, 64 * 1024, 1024 * 1024), (0.05, 1024 * 1024, 8 * 1024 * 1024)],
+    'large': [(1.0, 1024 * 1024, 8 * 1024 * 1024)],
+}
+# Tailles fréquentes (fichiers vides, blocs de 4 Ko) : des collisions de taille sans doublon
+COMMON_SIZES = (0, 4096, 65536)
+COMMON_SIZE_RATIO = 0.05
+# Octets distincts au début et à la fin de chaque fichier : deux fichiers différents n'ont pas les mêmes bords
+EDGE_BYTES = 16
+
+
+class TreeSpec:
+    """Description d'une arborescence synthétique.
+
+    files : nombre de chemins de fichiers créés (copies et liens compris)
+    depth : profondeur des dossiers ; fanout : sous-dossiers par dossier
+    sizes : distribution des tailles (voir SIZE_DISTRIBUTIONS)
+    duplicate_ratio : part des fichiers qui sont des copies d'un fichier précédent
+    hardlink_ratio : part des fichiers qui sont des liens physiques vers un fichier précédent
+    """
+
+    def __init__(self, files=1000, depth=3, fanout=4, sizes='mixed', duplicate_ratio=0.1, hardlink_ratio=0.0,
+                 seed=42):
+        if sizes not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Distribution de tailles inconnue: {sizes}")
+        self.files = files
+        self.depth = depth
+        self.fanout = fanout
+        self.sizes = sizes
+        self.duplicate_ratio = duplicate_ratio
+        self.hardlink_ratio = hardlink_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def _dirs(root, depth, fanout):
+    """Dossiers de l'arborescence, en largeur d'abord (la racine comprise)"""
+    dirs = [root]
+    level = [root]
+    for _ in range(depth):
+        level = [os.path.join(parent, f"d{index:02d}") for parent in level for index in range(fanout)]
+        dirs.extend(level)
+    return dirs
+
+
+def _size(rng, buckets):
+    if rng.random() < COMMON_SIZE_RATIO:
+        return rng.choice(COMMON_SIZES)
+    weight = rng.random()
+    for bucket_weight, low, high in buckets:
+        weight -= bucket_weight
+        if weight <= 0:
+            break
+    return rng.randint(low, high)
+
+
+def build_tree(root, spec):
+    """Crée l'arborescence décrite par spec sous root ; retourne ce qui a été créé.
+
+    Le contenu de chaque fichier original est une tranche d'un bloc
+    aléatoire, encadrée d'octets propres au fichier : la génération reste
+    rapide sans créer de doublons involontaires. Même graine, même arbre.
+    """
+    rng = random.Random(spec.seed)
+    buckets = SIZE_DISTRIBUTIONS[spec.sizes]
+    max_size = max(high for _, _, high in buckets)
+    pool = memoryview(rng.randbytes(max_size))
+
+    dirs = _dirs(root, spec.depth, spec.fanout)
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+
+    created = {'files': 0, 'bytes': 0, 'originals': 0, 'duplicates': 0, 'duplicate_bytes': 0, 'hardlinks': 0,
+               'dirs': len(dirs)}
+    originals = []
+    for index in range(spec.files):
+        # Fichiers répartis dans tous les dossiers, les plus profonds compris
+        path = os.path.join(dirs[rng.randrange(len(dirs))], f"f{index:07d}.bin")
+        draw = rng.random()
+        if originals and draw < spec.hardlink_ratio:
+            source, size = rng.choice(originals)
+            os.link(source, path)
+            created['hardlinks'] += 1
+        elif originals and draw < spec.hardlink_ratio + spec.duplicate_ratio:
+            source, size = rng.choice(originals)
+            with open(source, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+            created['duplicates'] += 1
+            created['duplicate_bytes'] += size
+            created['bytes'] += size
+        else:
+            size = _size(rng, buckets)
+            with open(path, 'wb') as f:
+                if size <= 2 * EDGE_BYTES:
+                    f.write(rng.randbytes(size))
+                else:
+                    offset = rng.randrange(max_size - size + 1)
+                    f.write(rng.randbytes(EDGE_BYTES))
+                    f.write(pool[offset + EDGE_BYTES:offset + size - EDGE_BYTES])
+                    f.write(rng.randbytes(EDGE_BYTES))
+            originals.append((path, size))
+            created['originals'] += 1
+            created['bytes'] += size
+        created['files'] += 1
+    return created
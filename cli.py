@@ -0,0 +1,446 @@
+"""
+BeGreen! en ligne de commande
+Analyse sans interface graphique, pour les serveurs et les tâches planifiées
+
+Usage : python main.py DOSSIER [DOSSIER ...] [--merge] [--format json|csv] [--output FICHIER]
+        python main.py DOSSIER [DOSSIER ...] --watch
+        python main.py DOSSIER [DOSSIER ...] --manifest FICHIER.bgm
+        python main.py MANIFESTE|DOSSIER [...] --fleet [--format json|csv|jsonl]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+import functools
+import contextlib
+from file_analyzer import FileAnalyzer
+from dedup import MODES
+from hash_cache import HashCache
+from hashing import ALGORITHMS, DEFAULT_ALGORITHM, DEFAULT_READER, READERS
+from manifest import MIN_SIZE as MANIFEST_MIN_SIZE, ManifestMerger
+from similar_images import DEFAULT_THRESHOLD
+from watcher import FolderWatcher
+
+
+def non_negative_int(value):
+    """Type argparse : entier positif ou nul"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"entier attendu : {value}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"doit être positif ou nul : {value}")
+    return number
+
+
+def build_parser():
+    """Construit l'analyseur des arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        prog="begreen",
+        description="Analyse Green IT de dossiers sans interface graphique")
+    parser.add_argument('roots', nargs='+', metavar='DOSSIER',
+                        help="dossier(s) à analyser ; avec --fleet, manifestes ou dossiers de manifestes")
+    parser.add_argument('--format', choices=('json', 'csv', 'jsonl'), default='json',
+                        help="format du rapport (json par défaut) ; jsonl écrit uniquement "
+                             "les groupes de doublons, un par ligne, au fil de l'analyse")
+    parser.add_argument('-o', '--output', metavar='FICHIER',
+                        help="fichier du rapport (sortie standard par défaut)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="nombre de threads de hash")
+    parser.add_argument('--max-inflight-mb', type=int, default=None,
+                        help="limite des données en cours de lecture (MB)")
+    parser.add_argument('--algorithm', choices=sorted(ALGORITHMS), default=DEFAULT_ALGORITHM,
+                        help=f"algorithme de hash ({DEFAULT_ALGORITHM} par défaut)")
+    parser.add_argument('--reader', choices=READERS, default=DEFAULT_READER,
+                        help=f"méthode de lecture des fichiers ({DEFAULT_READER} par défaut)")
+    parser.add_argument('--large-mb', type=int, default=None,
+                        help="seuil des gros fichiers (MB, 100 par défaut)")
+    parser.add_argument('--old-days', type=int, default=None,
+                        help="seuil des fichiers anciens (jours sans modification, 365 par défaut)")
+    parser.add_argument('--top', type=non_negative_int, default=None,
+                        help="taille des classements (100 par défaut)")
+    parser.add_argument('--similar-images', action='store_true',
+                        help="rechercher aussi les images similaires (redimensionnées, recompressées ; "
+                             "nécessite Pillow)")
+    parser.add_argument('--similarity', type=int, default=DEFAULT_THRESHOLD, metavar='BITS',
+                        help=f"écart maximal entre deux images similaires ({DEFAULT_THRESHOLD} bits "
+                             f"sur 64 par défaut)")
+    parser.add_argument('--cache', metavar='FICHIER',
+                        help="cache SQLite des empreintes, réutilisé d'une exécution à l'autre")
+    parser.add_argument('--exclude', action='append', default=[], metavar='MOTIF',
+                        help="motif glob à ignorer (option répétable)")
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help="profondeur maximale sous chaque dossier")
+    parser.add_argument('--same-filesystem', action='store_true',
+                        help="ne pas traverser les points de montage")
+    parser.add_argument('--merge', action='store_true',
+                        help="analyser les dossiers ensemble : un seul rapport, doublons recherchés "
+                             "d'un dossier à l'autre, disques différents lus en parallèle")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--link', choices=MODES, metavar='MODE',
+                        help="après l'analyse, remplacer les doublons par des liens "
+                             "(hardlink ou reflink) au lieu de les laisser en place")
+    action.add_argument('--remove', action='store_true',
+                        help="après l'analyse, supprimer les doublons (par lots, en parallèle)")
+    action.add_argument('--fleet', action='store_true',
+                        help="fusionner des manifestes (--manifest) de plusieurs machines en un rapport "
+                             "des doublons du parc, sans tout charger en mémoire")
+    action.add_argument('--watch', action='store_true',
+                        help="après l'analyse, suivre les changements des dossiers et écrire une ligne "
+                             "JSON (score, changements) à chaque mise à jour, jusqu'à Ctrl+C")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="avec --remove, indiquer ce qui serait supprimé sans rien modifier")
+    parser.add_argument('--quarantine', metavar='DOSSIER',
+                        help="avec --remove, déplacer les doublons dans ce dossier au lieu de les supprimer")
+    parser.add_argument('--journal', metavar='FICHIER',
+                        help="avec --remove, journal des suppressions (reprise et restauration)")
+    parser.add_argument('--manifest', metavar='FICHIER',
+                        help="après l'analyse, écrire le manifeste binaire des fichiers (taille, empreinte, "
+                             "chemin, date) pour --fleet")
+    parser.add_argument('--manifest-min-mb', type=float, default=MANIFEST_MIN_SIZE / (1024 * 1024),
+                        help="taille minimale des fichiers du manifeste (MB, 1 par défaut)")
+    parser.add_argument('--machine', metavar='NOM',
+                        help="nom de la machine dans le manifeste (nom de l'ordinateur par défaut)")
+    parser.add_argument('--trace', metavar='FICHIER',
+                        help="écrire les événements de l'analyse (phases, erreurs, bilan) en JSON, une ligne "
+                             "par événement, à la suite du fichier")
+    parser.add_argument('--profile', metavar='FICHIER',
+                        help="profiler l'analyse avec cProfile (statistiques dans FICHIER, résumé dans "
+                             "FICHIER sans extension + .txt)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="mesurer la mémoire de l'analyse avec tracemalloc (pic et principales "
+                             "allocations dans metrics)")
+    parser.add_argument('--progress', action='store_true',
+                        help="afficher la progression sur la sortie d'erreur")
+    return parser
+
+
+def root_groups(roots, merge=False):
+    """Dossiers analysés ensemble : un groupe par dossier, ou un seul groupe avec --merge"""
+    return [list(roots)] if merge else [[root] for root in roots]
+
+
+def root_label(group):
+    """Valeur du champ root d'un rapport : le dossier, ou les dossiers séparés par os.pathsep"""
+    return os.pathsep.join(os.path.abspath(root) for root in group)
+
+
+def _missing_roots(group):
+    """Signale les dossiers introuvables du groupe ; vrai s'il en manque"""
+    missing = [root for root in group if not os.path.isdir(root)]
+    for root in missing:
+        print(f"Dossier introuvable: {root}", file=sys.stderr)
+    return bool(missing)
+
+
+def analyze_roots(analyzer, groups, progress=False, actions=()):
+    """Analyse chaque groupe de dossiers (voir root_groups) et retourne la liste des rapports.
+
+    Chaque action(analyzer), appelée dans l'ordre après une analyse réussie,
+    retourne des champs à ajouter au rapport (manifeste, suppression ou
+    liaison des doublons).
+    """
+    reports = []
+    for group in groups:
+        if _missing_roots(group):
+            reports.append({'root': root_label(group), 'success': False})
+            continue
+
+        callback = _print_progress if progress else None
+        # Les messages d'erreur de l'analyseur ne doivent pas se mêler au rapport
+        with contextlib.redirect_stdout(sys.stderr):
+            success = analyzer.analyze_directories(group, progress_callback=callback)
+            # Le rapport décrit les doublons trouvés, avant leur traitement
+            report = build_report(analyzer, group, success)
+            if success:
+                for action in actions:
+                    report.update(action(analyzer))
+        if progress:
+            print(file=sys.stderr)
+        reports.append(report)
+    return reports
+
+
+def build_report(analyzer, roots, success):
+    """Rapport d'un dossier ou d'un groupe de dossiers : score, statistiques et groupes de doublons"""
+    group = [roots] if isinstance(roots, str) else roots
+    report = {'root': root_label(group), 'success': success}
+    if len(group) > 1:
+        # Dossiers réellement analysés, sans ceux contenus dans un autre
+        report['roots'] = list(analyzer.snapshot.roots) if analyzer.snapshot is not None else []
+    if not success:
+        # Les mesures disent où l'analyse a échoué (erreurs par type, phases terminées)
+        report['metrics'] = analyzer.get_metrics()
+        return report
+
+    data = analyzer.get_analysis_data()
+    groups = [group_to_dict(group) for group in analyzer.duplicate_groups]
+    report.update({
+        'score': analyzer.calculate_green_score(),
+        'total_files': data['total_files'],
+        'total_size': data['total_size'],
+        'disk_usage': data['disk_usage'],
+        'hardlinks': data['hardlinks'],
+        'bytes_read': analyzer.bytes_read,
+        'duplicates': len(data['duplicates']),
+        'wasted_bytes': sum(group['wasted_bytes'] for group in groups),
+        'large_files': [{'path': path, 'size': size} for path, size in data['large_files']],
+        'large_bytes': data['large_bytes'],
+        'old_files': [{'path': path, 'size': size, 'mtime': mtime} for path, size, mtime in data['old_files']],
+        'old_bytes': data['old_bytes'],
+        'extensions': [{'extension': extension, 'files': count, 'size': size} for extension, (count, size)
+                       in sorted(data['extensions'].items(), key=lambda item: item[1][1], reverse=True)],
+        'largest_dirs': [{'path': path, 'size': size, 'files': count}
+                         for path, size, count in data['largest_dirs']],
+        'biggest_wins': [{'kind': kind, 'label': label, 'bytes': size}
+                         for kind, label, size in analyzer.get_biggest_wins()],
+        'duplicate_groups': groups,
+        'similar_images': [{'wasted_bytes': group.wasted_bytes, 'paths': group.paths, 'sizes': group.sizes}
+                           for group in analyzer.similar_groups],
+        'metrics': analyzer.get_metrics()
+    })
+    return report
+
+
+def group_to_dict(group):
+    return {'size': group.size, 'wasted_bytes': group.wasted_bytes, 'paths': group.paths}
+
+
+def stream_groups(analyzer, groups, output):
+    """Écrit un groupe de doublons par ligne JSON, dès qu'il est confirmé.
+
+    La mémoire reste bornée par les groupes en cours de vérification ;
+    les statistiques et le score ne sont pas calculés dans ce mode.
+    """
+    success = True
+    for roots in groups:
+        if _missing_roots(roots):
+            success = False
+            continue
+        label = root_label(roots)
+        with contextlib.redirect_stdout(sys.stderr):
+            for group in analyzer.iter_duplicate_groups(roots):
+                line = dict(root=label, **group_to_dict(group))
+                output.write(json.dumps(line, ensure_ascii=False) + '\n')
+                output.flush()
+    return success
+
+
+def write_json(reports, output):
+    json.dump({'reports': reports}, output, ensure_ascii=False, indent=2)
+    output.write('\n')
+
+
+def write_csv(reports, output):
+    """Une ligne par fichier en double, précédée des statistiques du dossier.
+
+    Un dossier sans doublon a une seule ligne, sans colonnes de groupe.
+    """
+    writer = csv.writer(output)
+    writer.writerow(['root', 'success', 'score', 'total_files', 'total_size', 'disk_usage', 'duplicates',
+                     'wasted_bytes', 'group', 'size', 'keep', 'path'])
+    for report in reports:
+        stats = [report['root'], report['success'], report.get('score', ''), report.get('total_files', ''),
+                 report.get('total_size', ''), report.get('disk_usage', ''), report.get('duplicates', ''),
+                 report.get('wasted_bytes', '')]
+        groups = report.get('duplicate_groups', [])
+        if not groups:
+            writer.writerow(stats + ['', '', '', ''])
+        for index, group in enumerate(groups, 1):
+            for position, path in enumerate(group['paths']):
+                writer.writerow(stats + [index, group['size'], position == 0, path])
+
+
+def manifest_action(manifest_path, min_size, machine):
+    def action(analyzer):
+        exported = analyzer.export_manifest(manifest_path, min_size, machine)
+        fields = {'manifest': os.path.abspath(manifest_path), 'manifest_files': exported}
+        if exported is None:
+            fields['success'] = False
+        return fields
+    return action
+
+
+def link_action(mode):
+    def action(analyzer):
+        linked, reclaimed = analyzer.link_duplicates(mode)
+        return {'linked': linked, 'reclaimed_bytes': reclaimed}
+    return action
+
+
+def remove_action(dry_run, quarantine_dir, journal_path, progress):
+    def action(analyzer):
+        callback = None
+        if progress:
+            print(file=sys.stderr)
+            callback = _print_progress
+        removed = analyzer.remove_duplicates(dry_run, journal_path, quarantine_dir, callback)
+        result = analyzer.last_removal
+        return {'removed': removed, 'dry_run': dry_run, 'bytes_freed': result['bytes_freed'],
+                'skipped': len(result['skipped']), 'failed': result['failed']}
+    return action
+
+
+def watch_roots(make_analyzer, groups, output):
+    """Analyse chaque groupe de dossiers puis suit ses changements jusqu'à Ctrl+C.
+
+    Une ligne JSON est écrite par groupe après l'analyse, puis à chaque mise
+    à jour (voir watcher.FolderWatcher). Chaque groupe a son propre
+    analyseur, qui garde l'instantané de ces dossiers.
+    """
+    lock = threading.Lock()
+
+    def emit(analyzer, root, changes):
+        data = analyzer.get_analysis_data()
+        line = {'root': root, 'time': time.time(), 'score': analyzer.calculate_green_score(),
+                'total_files': data['total_files'], 'disk_usage': data['disk_usage'],
+                'duplicates': len(data['duplicates']), 'bytes_read': analyzer.bytes_read,
+                **{kind: len(paths) for kind, paths in changes.items()}}
+        with lock:
+            output.write(json.dumps(line, ensure_ascii=False) + '\n')
+            output.flush()
+
+    success = True
+    watchers = []
+    # Les messages d'erreur de l'analyseur ne doivent pas se mêler aux lignes JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            for group in groups:
+                if _missing_roots(group):
+                    success = False
+                    continue
+                root = root_label(group)
+                analyzer = make_analyzer()
+                if not analyzer.analyze_directories(group):
+                    success = False
+                    continue
+                emit(analyzer, root, analyzer.file_analysis['changes'])
+                watcher = FolderWatcher(analyzer, on_update=functools.partial(emit, analyzer, root))
+                watcher.start()
+                watchers.append(watcher)
+
+            while watchers:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for watcher in watchers:
+                watcher.stop()
+    return success
+
+
+def fleet_report(paths, output, output_format, top_n=None):
+    """Fusionne les manifestes et écrit le rapport des doublons du parc ; retourne vrai si tous ont été lus.
+
+    json : totaux et plus gros groupes ; csv : une ligne par copie des plus
+    gros groupes ; jsonl : chaque groupe de doublons, dès qu'il est complet.
+    """
+    # Les messages d'erreur (manifestes illisibles) ne doivent pas se mêler au rapport
+    with contextlib.redirect_stdout(sys.stderr):
+        merger = ManifestMerger(paths)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            if output_format == 'jsonl':
+                def write_group(group):
+                    output.write(json.dumps(merger.group_to_dict(group), ensure_ascii=False) + '\n')
+                    output.flush()
+                report = merger.report(0, write_group)
+            else:
+                report = merger.report(top_n) if top_n is not None else merger.report()
+    finally:
+        merger.close()
+
+    if output_format == 'json':
+        json.dump(report, output, ensure_ascii=False, indent=2)
+        output.write('\n')
+    elif output_format == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(['group', 'size', 'digest', 'copies', 'machines', 'wasted_bytes', 'machine', 'path'])
+        for index, group in enumerate(report['top_groups'], 1):
+            stats = [index, group['size'], group['digest'], group['copies'], group['machines'],
+                     group['wasted_bytes']]
+            for copy in group['paths']:
+                writer.writerow(stats + [copy['machine'], copy['path']])
+    return bool(report['manifests']) and not merger.errors
+
+
+def _print_progress(event):
+    if 'bytes_freed' in event:
+        mb, label = event['bytes_freed'] / (1024 ** 2), "libérés"
+    else:
+        mb, label = event['bytes_hashed'] / (1024 ** 2), "comparés"
+    print(f"\r{event['stage']:<6} {event['files']:>10} fichiers {mb:>10.1f} MB {label}",
+          end='', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande ; retourne le code de sortie"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    groups = root_groups(args.roots, args.merge)
+    if args.manifest and (len(groups) > 1 or args.watch or args.fleet or args.format == 'jsonl'):
+        parser.error("--manifest décrit une seule analyse : un dossier ou --merge, sans --watch, "
+                     "--fleet ni --format jsonl")
+
+    if args.fleet:
+        output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+        try:
+            success = fleet_report(args.roots, output, args.format, args.top)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return 0 if success else 1
+
+    cache = HashCache(args.cache) if args.cache else None
+    max_inflight = args.max_inflight_mb * 1024 * 1024 if args.max_inflight_mb else None
+    thresholds = {}
+    if args.large_mb is not None:
+        thresholds['large_file_size'] = args.large_mb * 1024 * 1024
+    if args.old_days is not None:
+        thresholds['old_file_age'] = args.old_days * 24 * 3600
+    if args.top is not None:
+        thresholds['top_n'] = args.top
+    make_analyzer = functools.partial(FileAnalyzer, workers=args.workers, max_inflight_bytes=max_inflight,
+                                      cache=cache, exclude=args.exclude, max_depth=args.max_depth,
+                                      same_filesystem=args.same_filesystem,
+                                      algorithm=args.algorithm, reader=args.reader,
+                                      similar_images=args.similar_images,
+                                      similarity_threshold=args.similarity, trace_path=args.trace,
+                                      profile_path=args.profile, trace_memory=args.trace_memory, **thresholds)
+    analyzer = make_analyzer()
+
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.watch:
+            success = watch_roots(make_analyzer, groups, output)
+        elif args.format == 'jsonl':
+            success = stream_groups(analyzer, groups, output)
+        else:
+            actions = []
+            # Le manifeste décrit les fichiers analysés, avant le traitement des doublons
+            if args.manifest:
+                actions.append(manifest_action(args.manifest, int(args.manifest_min_mb * 1024 * 1024),
+                                               args.machine))
+            if args.link:
+                actions.append(link_action(args.link))
+            elif args.remove:
+                actions.append(remove_action(args.dry_run, args.quarantine, args.journal, args.progress))
+            reports = analyze_roots(analyzer, groups, args.progress, actions)
+            writer = write_json if args.format == 'json' else write_csv
+            writer(reports, output)
+            success = all(report['success'] for report in reports)
+    finally:
+        if cache is not None:
+            cache.close()
+        if output is not sys.stdout:
+            output.close()
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,184 @@
 """
 Gestion de la configuration de l'application BeGreen!
+Lue une seule fois et gardée en mémoire ; écritures regroupées et atomiques
 """
 
 import os
 import json
+import stat
+import tempfile
+import threading
+
+# Version du format du fichier : 1 = ajout de schema_version (les fichiers sans version sont en 0)
+SCHEMA_VERSION = 1
+
+# Délai (secondes) pendant lequel les modifications successives sont regroupées en une écriture
+SAVE_DELAY = 1.0
+
+# Clés connues : (types acceptés, valeur par défaut, valeurs permises ou None)
+SCHEMA = {
+    'username': ((str,), '', None),
+    'theme': ((str,), 'clair', ('clair', 'sombre')),
+    'font_family': ((str, type(None)), None, None),  # Police choisie au premier lancement
+}
+
+
+def _migrate_v0(config):
+    """Fichiers écrits avant l'ajout de schema_version : même contenu"""
+    return config
+
+
+# Migration à appliquer pour passer de la version n à n + 1
+MIGRATIONS = {
+    0: _migrate_v0,
+}
 
 
 class ConfigManager:
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, save_delay=SAVE_DELAY):
         # Définir le chemin par défaut dans le dossier `data`
-        data_folder = os.path.join(os.getcwd(), "data")
-        os.makedirs(data_folder, exist_ok=True)  # Crée le dossier `data` s'il n'existe pas
-        self.config_file = config_file or os.path.join(data_folder, "begreen_config.json")
-        self.default_config = {
-            'username': '',
-            'theme': 'clair'
-        }
+        self.data_folder = os.path.join(os.getcwd(), "data")
+        os.makedirs(self.data_folder, exist_ok=True)  # Crée le dossier `data` s'il n'existe pas
+        self.config_file = config_file or os.path.join(self.data_folder, "begreen_config.json")
+        self.default_config = {key: default for key, (_, default, _) in SCHEMA.items()}
+        self.save_delay = save_delay
+
+        self._config = None  # Chargée à la première demande
+        self._written = None  # Contenu du fichier tel que lu ou écrit en dernier
+        self._timer = None
+        self._lock = threading.Lock()
 
     def load_config(self):
-        """Charge la configuration depuis le fichier"""
+        """Retourne une copie de la configuration ; le fichier n'est lu qu'une fois"""
+        with self._lock:
+            if self._config is None:
+                self._config = self._read()
+            return dict(self._config)
+
+    def get(self, key, default=None):
+        return self.load_config().get(key, default)
+
+    def update(self, **values):
+        """Modifie des valeurs en mémoire ; l'écriture est faite après save_delay secondes sans changement"""
+        self.load_config()
+        with self._lock:
+            self._config.update(self._validate(values))
+            self._schedule_save()
+
+    def save_config(self, config=None):
+        """Sauvegarde immédiatement la configuration (celle en mémoire si config est None)"""
+        self.load_config()
+        with self._lock:
+            if config is not None:
+                self._config.update(self._validate(config))
+            self._cancel_save()
+            return self._write()
+
+    def flush(self):
+        """Écrit les modifications en attente (à appeler avant de quitter)"""
+        with self._lock:
+            if self._timer is None:
+                return True
+            self._cancel_save()
+            return self._write()
+
+    def _schedule_save(self):
+        self._cancel_save()
+        self._timer = threading.Timer(self.save_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_save(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _read(self):
+        """Lit, migre et valide le fichier ; valeurs par défaut s'il est absent ou illisible"""
+        config = self.default_config.copy()
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return self.default_config.copy()
-        except Exception as e:
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                self._written = f.read()
+            loaded = json.loads(self._written)
+            if not isinstance(loaded, dict):
+                raise ValueError("le fichier ne contient pas un objet JSON")
+        except FileNotFoundError:
+            return config
+        except (OSError, ValueError) as e:
             print(f"Erreur lors du chargement de la configuration: {e}")
-            return self.default_config.copy()
+            return config
+
+        version = loaded.pop('schema_version', 0)
+        if not isinstance(version, int):
+            version = 0
+        while version < SCHEMA_VERSION:
+            loaded = MIGRATIONS[version](loaded)
+            version += 1
+
+        config.update(self._validate(loaded))
+        return config
+
+    @staticmethod
+    def _validate(values):
+        """Écarte les valeurs qui ne respectent pas le schéma ; les clés inconnues sont gardées telles quelles"""
+        valid = {}
+        for key, value in values.items():
+            if key == 'schema_version':
+                continue
+            if key in SCHEMA:
+                types, _, choices = SCHEMA[key]
+                if not isinstance(value, types) or (choices is not None and value not in choices):
+                    print(f"Erreur dans la configuration: valeur invalide pour '{key}': {value!r}")
+                    continue
+            valid[key] = value
+        return valid
 
-    def save_config(self, config):
-        """Sauvegarde la configuration dans le fichier"""
+    def _write(self):
+        """Écriture atomique : fichier temporaire, fsync, puis remplacement de l'ancien fichier"""
+        content = json.dumps({'schema_version': SCHEMA_VERSION, **self._config}, ensure_ascii=False, indent=2)
+        if content == self._written:
+            return True
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        temp_path = None
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".begreen_config_", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp crée le fichier en 0600 : le fichier remplacé garde ses droits habituels
+            os.chmod(temp_path, self._file_mode())
+            os.replace(temp_path, self.config_file)
+            temp_path = None
+            self._sync_directory(directory)
+            self._written = content
             return True
-        except Exception as e:
+        except OSError as e:
             print(f"Erreur lors de la sauvegarde de la configuration: {e}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _file_mode(self):
+        """Droits du fichier de configuration actuel, sinon ceux d'un nouveau fichier (selon l'umask)"""
+        try:
+            return stat.S_IMODE(os.stat(self.config_file).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    @staticmethod
+    def _sync_directory(directory):
+        """Rend le renommage durable (POSIX ; Windows ne permet pas d'ouvrir un dossier)"""
+        if os.name == 'nt':
+            return
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
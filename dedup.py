@@ -0,0 +1,141 @@
+"""
+Déduplication sans suppression pour BeGreen!
+Remplace les doublons par des liens physiques (hardlink) ou des copies partagées (reflink)
+"""
+
+import os
+import sys
+import time
+import shutil
+from scanner import disk_usage
+
+# Modes de déduplication
+MODE_HARDLINK = 'hardlink'
+MODE_REFLINK = 'reflink'
+MODES = (MODE_HARDLINK, MODE_REFLINK)
+
+# ioctl Linux de clonage d'un fichier (btrfs, XFS) : _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+COMPARE_CHUNK_SIZE = 256 * 1024
+# Intervalle minimal entre deux événements de progression (secondes)
+PROGRESS_INTERVAL = 0.1
+
+
+def same_content(path_a, path_b):
+    """Compare deux fichiers octet par octet"""
+    buffer_a = memoryview(bytearray(COMPARE_CHUNK_SIZE))
+    buffer_b = memoryview(bytearray(COMPARE_CHUNK_SIZE))
+    with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+        while True:
+            count_a = file_a.readinto(buffer_a)
+            count_b = file_b.readinto(buffer_b)
+            if count_a != count_b or buffer_a[:count_a] != buffer_b[:count_b]:
+                return False
+            if not count_a:
+                return True
+
+
+def _clone(source_path, target_path):
+    """Crée target_path comme clone (reflink) de source_path"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflink non disponible sur ce système")
+    import fcntl
+    with open(source_path, "rb") as source, open(target_path, "xb") as target:
+        fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+
+
+def link_duplicate(keep_path, duplicate_path, mode=MODE_HARDLINK):
+    """Remplace duplicate_path par un lien vers keep_path.
+
+    Le contenu est revérifié octet par octet juste avant le remplacement, qui
+    se fait par un fichier temporaire renommé (atomique) : le chemin du doublon
+    existe toujours. Retourne les octets libérés (0 si le fichier était déjà
+    lié ou encore référencé ailleurs). Lève OSError ou ValueError si le
+    remplacement est impossible ; le doublon est alors laissé intact.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode de déduplication inconnu: {mode}")
+
+    keep_stat = os.stat(keep_path)
+    before = os.lstat(duplicate_path)
+    if (keep_stat.st_dev, keep_stat.st_ino) == (before.st_dev, before.st_ino):
+        return 0
+    if keep_stat.st_dev != before.st_dev:
+        raise ValueError("fichiers sur des disques différents")
+    if keep_stat.st_size != before.st_size or not same_content(keep_path, duplicate_path):
+        raise ValueError("le contenu a changé depuis l'analyse")
+
+    folder, name = os.path.split(duplicate_path)
+    temp_path = os.path.join(folder, f".{name}.begreen-{os.getpid()}.tmp")
+    try:
+        if mode == MODE_HARDLINK:
+            os.link(keep_path, temp_path)
+        else:
+            _clone(keep_path, temp_path)
+            # Un clone est un fichier distinct : il garde les droits et dates du doublon
+            shutil.copystat(duplicate_path, temp_path)
+
+        # Le doublon ne doit pas avoir été modifié pendant la vérification
+        current = os.lstat(duplicate_path)
+        if (current.st_ino, current.st_size, current.st_mtime_ns) != (before.st_ino, before.st_size,
+                                                                      before.st_mtime_ns):
+            raise ValueError("le fichier a été modifié pendant la vérification")
+        os.replace(temp_path, duplicate_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Les blocs ne sont libérés que si le doublon n'avait pas d'autre lien
+    return disk_usage(before) if before.st_nlink == 1 else 0
+
+
+def link_duplicates(groups, mode=MODE_HARDLINK, progress_callback=None, cancel_event=None):
+    """Remplace les copies de chaque groupe (DuplicateGroup) par des liens vers le premier fichier.
+
+    progress_callback reçoit des événements de progression de même forme que
+    ceux de la suppression (voir RemovalJob). Si cancel_event est déclenché,
+    le traitement s'arrête avant le fichier suivant et cancelled vaut True.
+    Retourne un dictionnaire : linked (chemins remplacés), failed (chemins
+    laissés intacts), reclaimed_bytes (octets libérés) et cancelled.
+    """
+    result = {'linked': [], 'failed': [], 'reclaimed_bytes': 0, 'cancelled': False}
+    items = [(group.paths[0], path) for group in groups for path in group.paths[1:]]
+    started = last_progress = time.monotonic()
+    for done, (keep_path, duplicate_path) in enumerate(items):
+        if cancel_event is not None and cancel_event.is_set():
+            result['cancelled'] = True
+            break
+        now = time.monotonic()
+        if progress_callback is not None and now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            _report_progress(progress_callback, 'link', done, len(items), result, duplicate_path, now - started)
+        try:
+            result['reclaimed_bytes'] += link_duplicate(keep_path, duplicate_path, mode)
+            result['linked'].append(duplicate_path)
+        except (OSError, ValueError) as e:
+            print(f"Erreur lors de la déduplication de {duplicate_path}: {e}")
+            result['failed'].append(duplicate_path)
+    if progress_callback is not None:
+        done = len(result['linked']) + len(result['failed'])
+        _report_progress(progress_callback, 'done', done, len(items), result, None, time.monotonic() - started)
+    return result
+
+
+def _report_progress(progress_callback, stage, done, total, result, current_path, elapsed):
+    """Événement de progression, de même forme que celui de la suppression (voir RemovalJob)"""
+    fraction = done / total if total else 1.0
+    eta = elapsed / fraction - elapsed if fraction else None
+    progress_callback({
+        'stage': stage,
+        'files': done,
+        'bytes_hashed': 0,
+        'pending_bytes': 0,
+        'bytes_freed': result['reclaimed_bytes'],
+        'current_dir': os.path.dirname(current_path) if current_path else None,
+        'elapsed': elapsed,
+        'eta': eta if stage != 'done' else 0,
+        'fraction': fraction
+    })
@@ -0,0 +1,236 @@
+"""
+Détection des doublons par étapes pour BeGreen!
+Regroupement par taille, puis empreinte partielle, puis empreinte complète
+"""
+
+from collections import deque
+from hashing import EDGE_SIZE, Hasher, HashPool
+
+# Étapes de hash
+STAGE_EDGES = 'edges'
+STAGE_CONTENT = 'content'
+
+
+def _walk_order(entry):
+    return entry[0].order, entry[1]
+
+
+def _make_group(size, bucket):
+    return DuplicateGroup(size, [state.file_path(index) for state, index in bucket],
+                          [state.stat_key(index) for state, index in bucket])
+
+
+class DuplicateGroup:
+    """Fichiers au contenu identique ; le premier chemin est celui conservé.
+
+    stat_keys donne, pour chaque chemin, (taille, mtime_ns, inode) lus lors
+    de l'analyse : un fichier modifié depuis n'est ni supprimé ni remplacé.
+    """
+    __slots__ = ('size', 'paths', 'stat_keys')
+
+    def __init__(self, size, paths, stat_keys=None):
+        self.size = size
+        self.paths = paths
+        self.stat_keys = stat_keys
+
+    @property
+    def wasted_bytes(self):
+        """Octets occupés inutilement par les copies"""
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateFinder:
+    """Détecte les doublons au fil du parcours.
+
+    Les hash sont planifiés dès qu'une collision apparaît, pendant que le
+    parcours continue ; find() attend la fin des calculs. Le résultat ne
+    dépend ni du nombre de workers ni de l'ordre de fin des calculs.
+
+    Un fichier est désigné par (DirState, indice) : aucun chemin complet n'est
+    conservé ; cache est un Snapshot (lookup/store/flush par fichier).
+    hasher (Hasher) choisit l'algorithme et la méthode de lecture.
+
+    Si expected (taille -> nombre de fichiers, issu d'un premier parcours) est
+    fourni, les groupes d'une taille sont confirmés dès que tous ses fichiers
+    ont été vus et comparés ; ils sont alors rendus par ready_groups() ou
+    iter_groups() et oubliés, ce qui borne la mémoire aux tailles en cours.
+    """
+
+    def __init__(self, workers=None, max_inflight_bytes=None, cache=None, expected=None, hasher=None):
+        self.bytes_read = 0
+        self.hasher = hasher or Hasher()
+        self.pool = HashPool(workers, max_inflight_bytes)
+        self.cache = cache
+        self.expected = expected
+        self.cancelled = False
+        self._by_size = {}  # taille -> entrée seule, ou [entrées] dès qu'il y en a deux
+        self._by_edges = {}  # taille -> {empreinte partielle: [entrées]}
+        self._by_content = {}  # taille -> {empreinte complète: [entrées]}
+        self._outstanding = {}  # taille -> hash en cours
+        self._ready = deque()
+
+    def add(self, state, index):
+        """Enregistre un fichier candidat, désigné par son dossier (DirState) et son indice"""
+        size = state.sizes[index]
+        entry = (state, index)
+
+        bucket = self._by_size.get(size)
+        if bucket is None:
+            # Taille encore unique : une simple référence, sans liste
+            self._by_size[size] = entry
+        else:
+            if type(bucket) is tuple:
+                bucket = self._by_size[size] = [bucket]
+            bucket.append(entry)
+
+            # Tous les fichiers vides sont identiques : aucun octet à lire
+            if size:
+                # Le premier fichier de cette taille n'a pas encore été lu
+                if len(bucket) == 2:
+                    self._submit(STAGE_EDGES, bucket[0], size)
+                self._submit(STAGE_EDGES, entry, size)
+
+        self._check_complete(size)
+        self._collect()
+
+    def find(self, cancel_event=None, on_wait=None):
+        """Attend la fin des calculs et retourne les groupes de doublons dans l'ordre du parcours.
+
+        on_wait est appelé régulièrement pendant l'attente. Si cancel_event est
+        déclenché, les calculs restants sont abandonnés : seuls les doublons déjà
+        confirmés sont retournés.
+        """
+        self._wait(cancel_event, on_wait)
+
+        groups = []
+        for size in self._by_size:
+            groups.extend(self._groups_for(size))
+        groups.sort(key=lambda group: _walk_order(group[1][0]))
+        return [_make_group(size, bucket) for size, bucket in groups]
+
+    def ready_groups(self):
+        """Rend les groupes confirmés depuis le dernier appel"""
+        while self._ready:
+            yield self._ready.popleft()
+
+    def iter_groups(self, cancel_event=None, on_wait=None):
+        """Attend la fin des calculs en rendant les groupes au fur et à mesure"""
+        yield from self.ready_groups()
+        while self.pool.pending:
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancel()
+                break
+            self._collect(timeout=0.1)
+            if on_wait is not None:
+                on_wait()
+            yield from self.ready_groups()
+        self._wait()
+
+        # Tailles dont des fichiers ont changé depuis le premier parcours
+        for size in list(self._by_size):
+            self._emit(size)
+        yield from self.ready_groups()
+
+    @property
+    def pending_bytes(self):
+        """Octets restant à lire pour les hash planifiés"""
+        return self.pool.pending_bytes
+
+    def cancel(self):
+        """Abandonne les hash pas encore commencés"""
+        self.cancelled = True
+        self.pool.close(cancel=True)
+
+    def close(self):
+        """Libère les threads de hash"""
+        self.pool.close()
+
+    def _wait(self, cancel_event=None, on_wait=None):
+        """Attend la fin (ou l'annulation) des calculs en cours"""
+        while self.pool.pending:
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancel()
+                break
+            self._collect(timeout=0.1)
+            if on_wait is not None:
+                on_wait()
+        self.close()
+        self._collect()
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _groups_for(self, size):
+        """Groupes (taille, [entrées triées]) d'une taille donnée"""
+        if size == 0:
+            buckets = [self._by_size[size]] if type(self._by_size[size]) is list else []
+        elif size <= 2 * EDGE_SIZE:
+            # L'empreinte partielle couvre déjà tout le contenu des petits fichiers
+            buckets = self._by_edges.get(size, {}).values()
+        else:
+            buckets = self._by_content.get(size, {}).values()
+        return [(size, sorted(bucket, key=_walk_order)) for bucket in buckets if len(bucket) > 1]
+
+    def _check_complete(self, size):
+        """Confirme les groupes d'une taille dont tous les fichiers ont été comparés"""
+        if self.expected is None or self._outstanding.get(size):
+            return
+        bucket = self._by_size.get(size)
+        if bucket is None:
+            return
+        count = 1 if type(bucket) is tuple else len(bucket)
+        if count >= self.expected.get(size, 0):
+            self._emit(size)
+
+    def _emit(self, size):
+        for _, bucket in self._groups_for(size):
+            self._ready.append(_make_group(size, bucket))
+        self._by_size.pop(size, None)
+        self._by_edges.pop(size, None)
+        self._by_content.pop(size, None)
+        self._outstanding.pop(size, None)
+
+    def _submit(self, stage, entry, size):
+        if self.cancelled:
+            return
+
+        # Empreinte déjà connue pour ce fichier inchangé : aucune lecture
+        state, index = entry
+        if self.cache is not None:
+            digest = self.cache.lookup(state, index, stage)
+            if digest is not None:
+                self._record(stage, entry, size, digest)
+                return
+
+        self._outstanding[size] = self._outstanding.get(size, 0) + 1
+        # Une file de lecture par périphérique : un disque lent ne retient pas les autres
+        file_path = state.file_path(index)
+        if stage == STAGE_EDGES:
+            self.pool.submit(self.hasher.hash_edges, file_path, size, min(size, 2 * EDGE_SIZE), (stage, entry, size),
+                             state.dev)
+        else:
+            self.pool.submit(self.hasher.hash_file, file_path, size, size, (stage, entry, size), state.dev)
+
+    def _collect(self, timeout=0):
+        """Range les hash terminés et planifie l'étape suivante"""
+        for (stage, entry, size), (digest, bytes_read) in self.pool.results(timeout):
+            self.bytes_read += bytes_read
+            if size in self._outstanding:
+                self._outstanding[size] -= 1
+            if digest is not None:
+                if self.cache is not None:
+                    self.cache.store(entry[0], entry[1], stage, digest)
+                self._record(stage, entry, size, digest)
+            self._check_complete(size)
+
+    def _record(self, stage, entry, size, digest):
+        """Classe un fichier selon son empreinte"""
+        if stage == STAGE_CONTENT:
+            self._by_content.setdefault(size, {}).setdefault(digest, []).append(entry)
+            return
+
+        bucket = self._by_edges.setdefault(size, {}).setdefault(digest, [])
+        bucket.append(entry)
+        if size > 2 * EDGE_SIZE and len(bucket) >= 2:
+            if len(bucket) == 2:
+                self._submit(STAGE_CONTENT, bucket[0], size)
+            self._submit(STAGE_CONTENT, entry, size)
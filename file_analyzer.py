@@ -4,80 +4,654 @@ Détection des doublons et calcul du score Green IT
 """
 
 import os
-import hashlib
-from collections import defaultdict
+import copy
+import time
+import socket
+import threading
+from collections import Counter
+from dedup import MODE_HARDLINK, link_duplicates
+from duplicates import STAGE_CONTENT, STAGE_EDGES, DuplicateFinder, DuplicateGroup
+from hashing import DEFAULT_ALGORITHM, DEFAULT_READER, EDGE_SIZE, Hasher, HashPool
+from manifest import MIN_SIZE as MANIFEST_MIN_SIZE, write_manifest
+from metrics import Metrics
+from removal import RemovalJob
+from scanner import TreeScanner, unique_roots
+from similar_images import DEFAULT_THRESHOLD, SimilarImageFinder
+from snapshot import Snapshot
+from stats import TopN
+
+
+# Intervalle minimal entre deux événements de progression (secondes)
+PROGRESS_INTERVAL = 0.1
+
+# Seuils de l'analyse
+LARGE_FILE_SIZE = 100 * 1024 * 1024  # Gros fichiers signalés (>100MB)
+OLD_FILE_AGE = 365 * 24 * 3600  # Fichiers anciens : non modifiés depuis un an (secondes)
+MAX_HASH_SIZE = 500 * 1024 * 1024  # Doublons recherchés seulement pour les fichiers <500MB
+TOP_N = 100  # Taille des classements (plus gros fichiers, plus anciens, dossiers)
+
+
+# Résultats d'une analyse, remplacés d'un bloc à la fin de chaque analyse ou mise à jour (voir _publish)
+RESULT_ATTRIBUTES = ('snapshot', 'cancelled', 'bytes_read', 'last_removal', 'last_link', 'duplicate_groups',
+                     'similar_groups', 'tree_roots', 'tree_root', 'dir_tree', 'file_analysis', '_largest', '_oldest',
+                     '_largest_dirs', '_old_before_ns')
 
 
 class FileAnalyzer:
-    def __init__(self):
+    def __init__(self, workers=None, max_inflight_bytes=None, cache=None,
+                 exclude=(), max_depth=None, same_filesystem=False,
+                 algorithm=DEFAULT_ALGORITHM, reader=DEFAULT_READER,
+                 large_file_size=LARGE_FILE_SIZE, old_file_age=OLD_FILE_AGE, top_n=TOP_N,
+                 similar_images=False, similarity_threshold=DEFAULT_THRESHOLD,
+                 trace_path=None, profile_path=None, trace_memory=False):
+        # Pool de hash : nombre de threads et octets en cours de lecture
+        self.workers = workers
+        self.max_inflight_bytes = max_inflight_bytes
+        # Algorithme de hash et méthode de lecture des fichiers
+        self.hasher = Hasher(algorithm, reader)
+        # Cache persistant des empreintes (HashCache), optionnel
+        self.cache = cache
+        # Seuils des gros fichiers (octets) et des fichiers anciens (secondes), taille des classements
+        self.large_file_size = large_file_size
+        self.old_file_age = old_file_age
+        self.top_n = top_n
+        # Recherche optionnelle des images similaires (redimensionnées, recompressées)
+        self.similar_images = similar_images
+        self.similarity_threshold = similarity_threshold
+        # Parcours : motifs exclus, profondeur maximale, rester sur le même disque
+        self.scanner = TreeScanner(exclude, max_depth, same_filesystem)
+        # Instantané de la dernière analyse, pour les analyses incrémentales
+        self.snapshot = None
+        # Mesures de la dernière analyse (voir metrics.py) : trace JSON et profilage optionnels
+        self.trace_path = trace_path
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.metrics = Metrics()
+        # Tenu pendant la publication des résultats d'une mise à jour ; les lecteurs d'un autre thread le prennent
+        self.lock = threading.RLock()
+        # Suivi de l'analyse en cours
+        self.cancelled = False
+        self._progress_callback = None
+        self._cancel_event = None
+        self._last_progress = 0
+        self._started = 0
         self.reset_analysis()
 
     def reset_analysis(self):
         """Réinitialise les données d'analyse"""
+        self.bytes_read = 0
+        self.last_removal = None
+        self.last_link = None
+        self.duplicate_groups = []  # [DuplicateGroup], le premier chemin est conservé
+        self.similar_groups = []  # [SimilarImageGroup], la première image est conservée
+        # Arborescence analysée : chemin -> DirState, avec tailles cumulées (voir get_dir_children) ;
+        # tree_root n'est défini que s'il y a une seule racine
+        self.tree_roots = []
+        self.tree_root = None
+        self.dir_tree = {}
         self.file_analysis = {
             'total_files': 0,
-            'total_size': 0,
+            'total_size': 0,  # Taille apparente, chaque fichier compté une fois
+            'disk_usage': 0,  # Place réellement occupée (st_blocks)
+            'hardlinks': 0,  # Chemins supplémentaires vers un fichier déjà compté
             'duplicates': [],
-            'large_files': [],
-            'old_files': []
+            'similar_images': [],  # [[chemins]] images visuellement proches, la première est conservée
+            'large_files': [],  # [(chemin, taille)] les plus gros au-delà du seuil, du plus gros au plus petit
+            'large_bytes': 0,  # Taille cumulée de tous les gros fichiers
+            'old_files': [],  # [(chemin, taille, mtime)] les plus anciens au-delà du seuil, du plus ancien
+            'old_bytes': 0,  # Taille cumulée de tous les fichiers anciens
+            'extensions': {},  # extension -> [fichiers, taille]
+            'largest_dirs': [],  # [(dossier, taille, fichiers)] selon les fichiers directement contenus
+            'changes': {'added': [], 'removed': [], 'changed': []}
         }
+        self._largest = TopN(self.top_n)
+        self._oldest = TopN(self.top_n)
+        self._largest_dirs = TopN(self.top_n)
+        self._old_before_ns = time.time_ns() - self.old_file_age * 10 ** 9
+
+    def analyze_directory(self, folder_path, incremental=False, progress_callback=None, cancel_event=None):
+        """Analyse un dossier et détecte les doublons (voir analyze_directories)"""
+        return self.analyze_directories([folder_path], incremental, progress_callback, cancel_event)
+
+    def analyze_directories(self, folder_paths, incremental=False, progress_callback=None, cancel_event=None):
+        """Analyse plusieurs dossiers ensemble et détecte les doublons entre eux.
+
+        Les dossiers en double ou contenus dans un autre sont ignorés (voir
+        scanner.unique_roots). Les dossiers de disques différents sont lus en
+        parallèle, et chaque disque a sa propre file de lecture pour les hash.
+
+        Avec incremental=True, si ces dossiers ont déjà été analysés, seuls les
+        dossiers modifiés depuis sont relus et les résultats sont mis à jour.
+        Dans les deux cas, les nouveaux résultats sont publiés d'un bloc sous
+        self.lock à la fin (voir update_directories).
+
+        progress_callback reçoit régulièrement un dictionnaire de progression
+        (voir _report_progress), depuis le thread qui exécute l'analyse.
+        Si cancel_event (threading.Event) est déclenché, l'analyse s'arrête
+        proprement : les résultats partiels sont conservés et self.cancelled
+        vaut True.
+        """
+        roots = unique_roots(folder_paths)
+        self.cancelled = False
+        self._progress_callback = progress_callback
+        self._cancel_event = cancel_event
+        self._last_progress = 0
+        self._started = time.monotonic()
+
+        self._start_metrics('analyze', roots=roots, incremental=incremental)
+        try:
+            with self.metrics.profiling(self.profile_path, self.trace_memory):
+                return self._analyze_roots(roots, incremental)
+        finally:
+            self.metrics.finish()
+
+    def _analyze_roots(self, roots, incremental):
+        previous = self.snapshot
+        if (incremental and previous is not None and previous.roots == tuple(roots)
+                and previous.options == self.scanner.options
+                and previous.algorithm == self.hasher.algorithm):
+            return self._rescan_directory(previous)
 
-    def analyze_directory(self, folder_path):
-        """Analyse un dossier et détecte les doublons"""
+        # Résultats construits sur une copie puis publiés d'un bloc (voir _publish)
+        update = copy.copy(self)
+        if not update._full_analysis(roots):
+            return False
+        self._publish(update)
+        return True
+
+    def _full_analysis(self, roots):
+        """Parcourt les racines et détecte les doublons depuis zéro"""
         self.reset_analysis()
-        file_hashes = defaultdict(list)
+        started = int(time.time())
+        snapshot = Snapshot(roots, self.scanner.options, self.cache, self.hasher.algorithm)
+        finder = DuplicateFinder(self.workers, self.max_inflight_bytes, snapshot, hasher=self.hasher)
+        self._set_tree(snapshot)
+
+        seen = set()
 
         try:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        if os.path.isfile(file_path):
-                            size = os.path.getsize(file_path)
-                            self.file_analysis['total_files'] += 1
-                            self.file_analysis['total_size'] += size
-
-                            # Détecter les gros fichiers (>100MB)
-                            if size > 100 * 1024 * 1024:
-                                self.file_analysis['large_files'].append((file_path, size))
-
-                            # Calculer le hash pour détecter les doublons
-                            if size < 500 * 1024 * 1024:  # Seulement pour les fichiers <500MB
-                                file_hash = self._get_file_hash(file_path)
-                                if file_hash:
-                                    file_hashes[file_hash].append(file_path)
-                    except (OSError, IOError):
-                        continue
-
-            # Identifier les doublons
-            for file_hash, paths in file_hashes.items():
-                if len(paths) > 1:
-                    self.file_analysis['duplicates'].extend(paths[1:])
+            # Parcours et comptage ; les hash avancent en parallèle (voir la phase 'hash' pour la fin)
+            with self.metrics.phase('walk'):
+                for dir_path, state, _ in self.scanner.walk_roots(roots):
+                    if self._is_cancelled():
+                        break
+                    snapshot.add_dir(state)
+                    self._report_progress('walk', finder, dir_path)
+                    self._count_dir(finder, state, seen)
 
+                # Dossiers dans l'ordre des racines, quel que soit l'ordre de lecture des disques
+                snapshot.sort_dirs()
+                self._set_tree(snapshot)
+            # Un parcours interrompu ne peut pas servir de base à une analyse incrémentale
+            self.snapshot = snapshot if not self.cancelled else None
+            self._finish_analysis(finder, roots, started)
             return True
 
         except Exception as e:
+            self.metrics.error(e)
             print(f"Erreur lors de l'analyse: {e}")
             return False
+        finally:
+            finder.close()
 
-    def _get_file_hash(self, file_path):
-        """Calcule le hash MD5 d'un fichier"""
+    def _start_metrics(self, kind, **fields):
+        """Nouvelles mesures pour l'analyse qui commence, partagées avec le parcours et les hash"""
+        self.metrics = Metrics(self.trace_path)
+        self.scanner.metrics = self.hasher.metrics = self.metrics
+        self.metrics.event('start', kind=kind, **fields)
+
+    def get_metrics(self):
+        """Mesures de la dernière analyse ou mise à jour (voir Metrics.to_dict)"""
+        return self.metrics.to_dict()
+
+    def iter_duplicate_groups(self, folder_paths, cancel_event=None):
+        """Itère sur les groupes de doublons (DuplicateGroup) d'un ou plusieurs dossiers dès qu'ils sont confirmés.
+
+        Un premier parcours compte les fichiers par taille, sans garder les
+        chemins ; le second ne retient que les fichiers dont la taille est
+        partagée et rend chaque groupe dès que tous les fichiers de sa taille
+        ont été comparés. La mémoire est bornée par les tailles en cours de
+        vérification et non par la taille de l'arborescence. Les résultats de
+        l'analyse (file_analysis) ne sont pas modifiés.
+        """
+        roots = unique_roots([folder_paths] if isinstance(folder_paths, str) else folder_paths)
+
+        # Un fichier à plusieurs liens physiques n'est retenu que sous son premier chemin
+        sizes = Counter()
+        seen = set()
+        for _, state, _ in self.scanner.walk_roots(roots):
+            for index, size in enumerate(state.sizes):
+                if size < MAX_HASH_SIZE and self._first_link(state, index, seen):
+                    sizes[size] += 1
+        expected = {size: count for size, count in sizes.items() if count > 1}
+        del sizes
+
+        # Instantané non conservé : il ne sert que de relais vers le cache persistant
+        memo = Snapshot(roots, self.scanner.options, self.cache, self.hasher.algorithm)
+        finder = DuplicateFinder(self.workers, self.max_inflight_bytes, memo, expected, self.hasher)
+        seen.clear()
+        try:
+            for _, state, _ in self.scanner.walk_roots(roots):
+                if cancel_event is not None and cancel_event.is_set():
+                    finder.cancel()
+                    break
+                # Seuls les fichiers candidats du dossier restent en mémoire
+                candidates = [index for index, size in enumerate(state.sizes)
+                              if size in expected and self._first_link(state, index, seen)]
+                if candidates:
+                    candidates = state.subset(candidates)
+                    for index in range(len(candidates)):
+                        finder.add(candidates, index)
+                yield from finder.ready_groups()
+
+            yield from finder.iter_groups(cancel_event)
+        finally:
+            finder.close()
+
+    def _rescan_directory(self, previous):
+        """Met à jour l'analyse précédente à partir des seuls changements"""
+        started = int(time.time())
+        try:
+            # Les dossiers inchangés sont repris tels quels : la relecture part d'une copie de
+            # l'instantané publié, que les fenêtres ouvertes peuvent lire pendant ce temps
+            with self.metrics.phase('rescan'):
+                result = previous.copy().rescan(self.scanner, self._report_progress_dir, self._cancel_event)
+            if result is None:
+                # Annulée pendant le parcours : l'analyse précédente reste en place
+                self.cancelled = True
+                return True
+            snapshot, changes = result
+            # Le parcours est complet : même annulée ensuite, l'analyse repartira de cet instantané
+            update = copy.copy(self)
+            update._recount(snapshot, changes, started)
+            self._publish(update)
+            return True
+
+        except Exception as e:
+            self.metrics.error(e)
+            print(f"Erreur lors de l'analyse: {e}")
+            return False
+
+    def update_directories(self, dir_paths, cancel_event=None):
+        """Met à jour la dernière analyse après des changements dans certains dossiers (surveillance).
+
+        Seuls ces dossiers sont relus (voir Snapshot.refresh) et seuls les
+        fichiers nouveaux ou modifiés sont hashés. Les totaux, les classements
+        et le score sont recalculés en mémoire. Le cache persistant n'est pas
+        nettoyé à chaque mise à jour, seulement complété. Retourne False s'il
+        n'y a pas d'analyse complète à mettre à jour ou en cas d'erreur.
+
+        La mise à jour tourne dans le thread de surveillance : les nouveaux
+        résultats sont construits sur des copies (instantané et analyseur) puis
+        publiés d'un bloc sous self.lock. Un lecteur qui prend self.lock voit
+        les anciens résultats ou les nouveaux, jamais un mélange des deux.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return False
+        self.cancelled = False
+        self._progress_callback = None
+        self._cancel_event = cancel_event
+        self._started = time.monotonic()
+        self._start_metrics('update', dirs=len(dir_paths))
+        try:
+            with self.metrics.phase('refresh'):
+                snapshot = snapshot.copy()
+                changes = snapshot.refresh(self.scanner, dir_paths)
+            update = copy.copy(self)
+            update._recount(snapshot, changes)
+            self._publish(update)
+            return True
+
+        except Exception as e:
+            self.metrics.error(e)
+            print(f"Erreur lors de la mise à jour de l'analyse: {e}")
+            return False
+        finally:
+            self.metrics.finish()
+
+    def _publish(self, update):
+        """Remplace les résultats par ceux d'une copie de l'analyseur (copy.copy), sous self.lock"""
+        with self.lock:
+            for name in RESULT_ATTRIBUTES:
+                setattr(self, name, getattr(update, name))
+
+    def _recount(self, snapshot, changes, started=None):
+        """Recalcule l'analyse depuis un instantané à jour, sans accès disque hors fichiers modifiés.
+
+        Les totaux sont recomptés en mémoire : un lien physique ajouté ou
+        supprimé change le fichier compté pour un inode. Les empreintes des
+        fichiers inchangés sont reprises de l'instantané.
+        """
+        finder = DuplicateFinder(self.workers, self.max_inflight_bytes, snapshot, hasher=self.hasher)
+        try:
+            self.reset_analysis()
+            self._set_tree(snapshot)
+            seen = set()
+            with self.metrics.phase('count'):
+                for state in snapshot.dirs.values():
+                    self._count_dir(finder, state, seen)
+
+            self.snapshot = snapshot
+            self.file_analysis['changes'] = {kind: sorted(paths) for kind, paths in changes.items()}
+            self._finish_analysis(finder, snapshot.roots, started)
+        finally:
+            finder.close()
+
+    def _set_tree(self, snapshot):
+        """Arborescence analysée : racines et dossiers de l'instantané"""
+        self.tree_roots = list(snapshot.roots)
+        self.tree_root = self.tree_roots[0] if len(self.tree_roots) == 1 else None
+        self.dir_tree = snapshot.dirs
+
+    def _finish_analysis(self, finder, roots, started):
+        """Termine la détection des doublons et entretient le cache (sauf si started est None)"""
+        with self.metrics.phase('rankings'):
+            self._finish_rankings()
+            self._finish_dir_tree()
+
+        # Identifier les doublons : taille, puis début/fin, puis contenu complet
+        duplicates = []
+        with self.metrics.phase('hash'):
+            groups = finder.find(self._cancel_event, lambda: self._report_progress('hash', finder))
+        for group in groups:
+            duplicates.extend(group.paths[1:])
+        self.file_analysis['duplicates'][:] = duplicates
+        self.duplicate_groups = groups
+        self.bytes_read = finder.bytes_read
+        self.cancelled = self.cancelled or finder.cancelled
+        self._report_progress('done', finder, force=True)
+
+        if self.cancelled:
+            return
+
+        if self.similar_images:
+            with self.metrics.phase('similar_images'):
+                self.find_similar_images()
+            if self.cancelled:
+                return
+
+        # Oublier les empreintes des fichiers supprimés depuis la dernière analyse
+        if self.cache is not None and started is not None:
+            with self.metrics.phase('cache'):
+                for root in roots:
+                    self.cache.forget_missing(root, started)
+                self.cache.compact()
+
+    def export_manifest(self, manifest_path, min_size=MANIFEST_MIN_SIZE, machine=None):
+        """Écrit le manifeste de la dernière analyse (voir manifest.py) ; retourne le nombre de fichiers exportés.
+
+        Chaque fichier d'au moins min_size octets y figure avec son empreinte
+        complète, pour rechercher les doublons entre machines. Les empreintes
+        pas encore connues (taille unique sur cette machine) sont calculées en
+        parallèle, une file par périphérique, et gardées dans le cache.
+        machine vaut par défaut le nom de l'ordinateur. Retourne None s'il
+        n'y a pas d'analyse ou en cas d'erreur.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
-        except (OSError, IOError):
+            # Les chemins sont écrits après les enregistrements triés, d'un second parcours de l'instantané
+            paths = (state.file_path(index) for state, index in self._manifest_files(snapshot, min_size))
+            return write_manifest(manifest_path, self._manifest_records(snapshot, min_size), paths,
+                                  self.hasher.digest_size, self.hasher.algorithm,
+                                  machine or socket.gethostname(), snapshot.roots)
+        except Exception as e:
+            print(f"Erreur lors de l'export du manifeste: {e}")
+            return None
+
+    def _manifest_files(self, snapshot, min_size):
+        """Fichiers exportés (DirState, indice), dans l'ordre du parcours : leur rang est leur numéro de chemin"""
+        seen = set()
+        for state in snapshot.dirs.values():
+            for index, size in enumerate(state.sizes):
+                if size >= min_size and self._first_link(state, index, seen):
+                    yield state, index
+
+    def _manifest_records(self, snapshot, min_size):
+        """(taille, empreinte, numéro du chemin, mtime_ns) de chaque fichier exporté lisible"""
+        pool = HashPool(self.workers, self.max_inflight_bytes)
+        try:
+            for path_id, (state, index) in enumerate(self._manifest_files(snapshot, min_size)):
+                size = state.sizes[index]
+                # L'empreinte partielle d'un petit fichier couvre déjà tout son contenu
+                stage = STAGE_EDGES if size <= 2 * EDGE_SIZE else STAGE_CONTENT
+                digest = snapshot.lookup(state, index, stage)
+                if digest is not None:
+                    yield size, digest, path_id, state.mtimes[index]
+                else:
+                    pool.submit(self.hasher.hash_file, state.file_path(index), size, size,
+                                (state, index, stage, path_id), state.dev)
+                yield from self._manifest_hashed(snapshot, pool, 0)
+            yield from self._manifest_hashed(snapshot, pool, None)
+        finally:
+            pool.close()
+            snapshot.flush()
+
+    def _manifest_hashed(self, snapshot, pool, timeout):
+        for (state, index, stage, path_id), (digest, bytes_read) in pool.results(timeout):
+            self.bytes_read += bytes_read
+            if digest is not None:
+                snapshot.store(state, index, stage, digest)
+                yield state.sizes[index], digest, path_id, state.mtimes[index]
+
+    def find_similar_images(self, threshold=None):
+        """Regroupe les images visuellement proches parmi les fichiers de la dernière analyse.
+
+        Les copies exactes déjà signalées comme doublons et les liens physiques
+        supplémentaires sont ignorés. Retourne la liste des groupes
+        (SimilarImageGroup), aussi conservée dans self.similar_groups.
+        """
+        finder = SimilarImageFinder(self.workers, self.cache,
+                                    self.similarity_threshold if threshold is None else threshold)
+        finder.metrics = self.metrics
+        duplicates = set(self.file_analysis['duplicates'])
+        seen = set()
+        for state in self.dir_tree.values():
+            for index, name in enumerate(state.names):
+                if (finder.is_candidate(name, state.sizes[index]) and self._first_link(state, index, seen)
+                        and state.file_path(index) not in duplicates):
+                    finder.add(state, index)
+
+        self.similar_groups = finder.find(self._cancel_event)
+        self.cancelled = self.cancelled or finder.cancelled
+        self.file_analysis['similar_images'] = [group.paths for group in self.similar_groups]
+        return self.similar_groups
+
+    def _count_dir(self, finder, state, seen):
+        """Compte les fichiers d'un dossier et le place dans le classement des dossiers"""
+        dir_size = dir_files = 0
+        for index in range(len(state)):
+            size = self._count_file(finder, state, index, seen)
+            if size is not None:
+                dir_size += size
+                dir_files += 1
+        if dir_files:
+            self._largest_dirs.push(dir_size, (state.path, dir_size, dir_files))
+        # Les sous-dossiers sont ajoutés à la fin du parcours (voir _finish_dir_tree)
+        state.tree_size = dir_size
+        state.tree_files = dir_files
+
+    def _count_file(self, finder, state, index, seen):
+        """Compte un fichier et le propose à la détection des doublons ; retourne sa taille.
+
+        Un fichier à plusieurs liens physiques n'est compté et lu qu'une fois
+        (None est retourné pour ses autres chemins).
+        """
+        if not self._first_link(state, index, seen):
+            self.file_analysis['hardlinks'] += 1
+            self.metrics.skip('hardlink')
             return None
 
+        analysis = self.file_analysis
+        size = state.sizes[index]
+        analysis['total_files'] += 1
+        analysis['total_size'] += size
+        analysis['disk_usage'] += state.disk_usage[index]
+
+        # Les classements ne gardent que (dossier, indice) : les chemins sont construits à la fin
+        if size > self.large_file_size:
+            analysis['large_bytes'] += size
+            self._largest.push(size, (state, index))
+        mtime_ns = state.mtimes[index]
+        if mtime_ns < self._old_before_ns:
+            analysis['old_bytes'] += size
+            self._oldest.push(-mtime_ns, (state, index))
+
+        extension = os.path.splitext(state.names[index])[1].lower()
+        totals = analysis['extensions'].get(extension)
+        if totals is None:
+            totals = analysis['extensions'][extension] = [0, 0]
+        totals[0] += 1
+        totals[1] += size
+
+        # Candidat à la détection des doublons (hash calculé seulement si la taille est partagée)
+        if size < MAX_HASH_SIZE:
+            finder.add(state, index)
+        else:
+            self.metrics.skip('too_large')
+        return size
+
+    def _finish_dir_tree(self):
+        """Cumule tailles et nombres de fichiers des sous-dossiers, des feuilles vers la racine.
+
+        Le parcours est en profondeur d'abord : un dossier est toujours vu avant
+        ses sous-dossiers, donc l'ordre inverse traite les enfants en premier.
+        """
+        dirs = self.dir_tree
+        roots = set(self.tree_roots)
+        for state in reversed(dirs.values()):
+            if state.path in roots:
+                continue
+            parent = dirs.get(os.path.dirname(state.path))
+            if parent is not None:
+                parent.tree_size += state.tree_size
+                parent.tree_files += state.tree_files
+
+    def get_dir_children(self, dir_path=None, limit=None):
+        """Sous-dossiers analysés d'un dossier, du plus lourd au plus léger.
+
+        Retourne [(chemin, taille, fichiers, a des sous-dossiers analysés)] ;
+        les limit premiers seulement si limit est donné. Les sous-dossiers
+        au-delà de la profondeur maximale ne sont pas analysés et ne comptent
+        pas. La racine de l'analyse est utilisée si dir_path est None ; s'il y
+        a plusieurs racines, ce sont elles qui sont retournées.
+        """
+        if dir_path is None and len(self.tree_roots) > 1:
+            children = [self.dir_tree[root] for root in self.tree_roots if root in self.dir_tree]
+        else:
+            state = self.dir_tree.get(dir_path or self.tree_root)
+            if state is None:
+                return []
+            children = [self.dir_tree.get(os.path.join(state.path, name)) for name in state.subdirs]
+        dir_tree = self.dir_tree
+        children = [(child.path, child.tree_size, child.tree_files,
+                     any(os.path.join(child.path, name) in dir_tree for name in child.subdirs))
+                    for child in children if child is not None]
+        children.sort(key=lambda child: child[1], reverse=True)
+        return children[:limit] if limit is not None else children
+
+    def get_dir_totals(self, dir_path=None):
+        """(taille, fichiers) d'un dossier analysé, sous-dossiers compris, et de ses seuls fichiers.
+
+        S'il y a plusieurs racines et que dir_path est None, totaux de toutes les racines.
+        """
+        if dir_path is None and len(self.tree_roots) > 1:
+            roots = self.get_dir_children()
+            if not roots:
+                return None
+            return sum(root[1] for root in roots), sum(root[2] for root in roots), 0, 0
+        state = self.dir_tree.get(dir_path or self.tree_root)
+        if state is None:
+            return None
+        own_size, own_files = state.tree_size, state.tree_files
+        for _, size, files, _ in self.get_dir_children(state.path):
+            own_size -= size
+            own_files -= files
+        return state.tree_size, state.tree_files, own_size, own_files
+
+    def _finish_rankings(self):
+        """Convertit les classements en listes de chemins"""
+        analysis = self.file_analysis
+        analysis['large_files'] = [(state.file_path(index), state.sizes[index])
+                                   for state, index in self._largest.items()]
+        analysis['old_files'] = [(state.file_path(index), state.sizes[index], state.mtimes[index] // 10 ** 9)
+                                 for state, index in self._oldest.items()]
+        analysis['largest_dirs'] = self._largest_dirs.items()
+
+    @staticmethod
+    def _first_link(state, index, seen):
+        """Vrai si le fichier n'a pas déjà été vu sous un autre lien physique"""
+        file_id = state.file_id(index)
+        if file_id is None:
+            return True
+        if file_id in seen:
+            return False
+        seen.add(file_id)
+        return True
+
+    def _is_cancelled(self):
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            self.cancelled = True
+        return self.cancelled
+
+    def _report_progress_dir(self, dir_path):
+        self._report_progress('walk', None, dir_path)
+
+    def _report_progress(self, stage, finder, current_dir=None, force=False):
+        """Envoie un événement de progression (au plus tous les PROGRESS_INTERVAL).
+
+        L'événement contient : stage ('walk', 'hash' ou 'done'), files (fichiers
+        vus), bytes_hashed, pending_bytes (octets restant à hasher), current_dir,
+        elapsed, eta (secondes, None tant que le parcours n'est pas terminé) et
+        fraction (0 à 1, None pendant le parcours).
+        """
+        if self._progress_callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        elapsed = now - self._started
+        bytes_hashed = finder.bytes_read if finder is not None else 0
+        pending_bytes = finder.pending_bytes if finder is not None else 0
+        eta = fraction = None
+        if stage == 'hash':
+            rate = bytes_hashed / elapsed if elapsed > 0 else 0
+            eta = pending_bytes / rate if rate else None
+            total = bytes_hashed + pending_bytes
+            fraction = bytes_hashed / total if total else 1.0
+        elif stage == 'done':
+            eta, fraction = 0, 1.0
+
+        callback_started = time.perf_counter()
+        self._progress_callback({
+            'stage': stage,
+            'files': self.file_analysis['total_files'],
+            'bytes_hashed': bytes_hashed,
+            'pending_bytes': pending_bytes,
+            'current_dir': current_dir,
+            'elapsed': elapsed,
+            'eta': eta,
+            'fraction': fraction
+        })
+        # Temps passé à transmettre la progression (file de l'interface, affichage en ligne de commande)
+        self.metrics.count(progress_seconds=time.perf_counter() - callback_started)
+
+    def _get_file_hash(self, file_path):
+        """Calcule l'empreinte complète d'un fichier (hexadécimale)"""
+        digest = self.hasher.hash_file(file_path)[0]
+        return digest.hex() if digest is not None else None
+
     def calculate_green_score(self):
         """Calcule le score Green IT basé sur l'analyse des fichiers"""
         base_score = 100
 
         # Pénalités
         duplicate_penalty = len(self.file_analysis['duplicates']) * 2
-        size_penalty = min(self.file_analysis['total_size'] / (1024 ** 3) * 5, 30)
+        size_penalty = min(self.file_analysis['disk_usage'] / (1024 ** 3) * 5, 30)
 
         # Bonus pour peu de fichiers
         bonus = 5 if self.file_analysis['total_files'] < 1000 else 0
@@ -96,20 +670,101 @@ class FileAnalyzer:
         else:
             return "#F44336"  # Rouge
 
-    def remove_duplicates(self):
-        """Supprime les fichiers en double"""
-        removed_count = 0
-        for file_path in self.file_analysis['duplicates']:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    removed_count += 1
-            except OSError:
-                continue
+    def get_duplicate_rows(self):
+        """Une ligne par copie à supprimer : (chemin, taille, numéro du groupe, chemin conservé)"""
+        return [(path, group.size, number, group.paths[0])
+                for number, group in enumerate(self.duplicate_groups, 1) for path in group.paths[1:]]
+
+    def remove_duplicates(self, dry_run=False, journal_path=None, quarantine_dir=None,
+                          progress_callback=None, cancel_event=None, paths=None):
+        """Supprime les fichiers en double (voir RemovalJob) et retourne leur nombre.
+
+        Avec journal_path, chaque action est journalisée pour pouvoir reprendre
+        ou annuler ; avec quarantine_dir, les fichiers sont déplacés au lieu
+        d'être supprimés. Avec dry_run, rien n'est modifié. Avec paths, seules
+        ces copies sont traitées. Le détail du dernier traitement est dans
+        self.last_removal.
+        """
+        items = [self._removal_item(group, position) for group in self.duplicate_groups
+                 for position in range(1, len(group.paths))]
+        if paths is not None:
+            paths = set(paths)
+            items = [item for item in items if item[0] in paths]
+        job = RemovalJob(journal_path, quarantine_dir)
+        self.last_removal = job.run(items, dry_run, progress_callback, cancel_event)
+        if not dry_run:
+            self._forget_duplicates(self.last_removal['removed'])
+        return len(self.last_removal['removed'])
+
+    @staticmethod
+    def _removal_item(group, position):
+        """(copie, fichier conservé, état de la copie, état du fichier conservé) lors de l'analyse"""
+        if not group.stat_keys:
+            return group.paths[position], group.paths[0]
+        return group.paths[position], group.paths[0], group.stat_keys[position], group.stat_keys[0]
+
+    def resume_removal(self, journal_path, progress_callback=None, cancel_event=None):
+        """Reprend une suppression interrompue à partir de son journal ; retourne le nombre de fichiers traités"""
+        job = RemovalJob.from_journal(journal_path)
+        self.last_removal = job.resume(progress_callback, cancel_event)
+        self._forget_duplicates(self.last_removal['removed'])
+        return len(self.last_removal['removed'])
+
+    def link_duplicates(self, mode=MODE_HARDLINK, progress_callback=None, cancel_event=None):
+        """Remplace les doublons par des liens (hardlink ou reflink) au lieu de les supprimer.
+
+        Chaque fichier reste à son emplacement. Retourne (fichiers remplacés,
+        octets libérés) ; les fichiers qui n'ont pas pu être liés restent
+        dans la liste des doublons. Le détail est dans self.last_link (voir
+        dedup.link_duplicates, qui décrit aussi progress_callback et cancel_event).
+        """
+        result = link_duplicates(self.duplicate_groups, mode, progress_callback, cancel_event)
+        self.last_link = result
+        self._forget_duplicates(result['linked'])
+        return len(result['linked']), result['reclaimed_bytes']
+
+    def _forget_duplicates(self, paths):
+        """Retire des groupes de doublons les fichiers supprimés ou liés"""
+        paths = set(paths)
+        groups = []
+        for group in self.duplicate_groups:
+            kept = [position for position, path in enumerate(group.paths) if path not in paths]
+            if len(kept) > 1:
+                stat_keys = [group.stat_keys[position] for position in kept] if group.stat_keys else None
+                groups.append(DuplicateGroup(group.size, [group.paths[position] for position in kept], stat_keys))
+        self.duplicate_groups = groups
+        self.file_analysis['duplicates'] = [path for group in groups for path in group.paths[1:]]
+
+    def get_biggest_wins(self, limit=10):
+        """Actions qui libéreraient le plus de place, de la plus rentable à la moins rentable.
+
+        Retourne une liste de (type, libellé, octets) ; type vaut 'duplicates',
+        'similar_images', 'old_files', 'large_file', 'directory' ou 'extension'. Calculé à partir
+        des classements de l'analyse, sans relire l'arborescence.
+        """
+        analysis = self.file_analysis
+        wins = []
+        wasted = sum(group.wasted_bytes for group in self.duplicate_groups)
+        if wasted:
+            wins.append(('duplicates', f"{len(analysis['duplicates'])} doublons", wasted))
+        wasted = sum(group.wasted_bytes for group in self.similar_groups)
+        if wasted:
+            count = sum(len(group.paths) - 1 for group in self.similar_groups)
+            wins.append(('similar_images', f"{count} images similaires", wasted))
+        if analysis['old_bytes']:
+            wins.append(('old_files', f"Fichiers non modifiés depuis {self.old_file_age // 86400} jours",
+                         analysis['old_bytes']))
+        for path, size in analysis['large_files'][:3]:
+            wins.append(('large_file', path, size))
+        for path, size, _ in analysis['largest_dirs'][:3]:
+            wins.append(('directory', path, size))
+        extensions = sorted(analysis['extensions'].items(), key=lambda item: item[1][1], reverse=True)
+        for extension, (count, size) in extensions[:3]:
+            wins.append(('extension', f"{extension or '(sans extension)'} ({count} fichiers)", size))
 
-        # Mettre à jour les données
-        self.file_analysis['duplicates'] = []
-        return removed_count
+        wins = [win for win in wins if win[2] > 0]
+        wins.sort(key=lambda win: win[2], reverse=True)
+        return wins[:limit]
 
     def get_analysis_data(self):
         """Retourne les données d'analyse"""
@@ -0,0 +1,194 @@
+"""
+Cache persistant des empreintes de fichiers pour BeGreen!
+Base SQLite indexée par chemin et algorithme, validée par taille, date de modification et inode
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from hashing import DEFAULT_ALGORITHM
+
+# Nombre maximal d'entrées conservées dans le cache
+DEFAULT_MAX_ENTRIES = 2_000_000
+# Nombre d'écritures regroupées dans une même transaction
+BATCH_SIZE = 1000
+
+STAGES = ('edges', 'content')
+# Version du schéma : 2 = empreintes brutes (BLOB) au lieu de chaînes hexadécimales,
+# 3 = une entrée par chemin et par algorithme de hash
+SCHEMA_VERSION = 3
+
+
+class HashCache:
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending = []
+        self._touched = []
+        self._lock = threading.Lock()
+        self._conn = None
+
+        try:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self._migrate(version)
+            self._create_tables()
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'ouverture du cache de hash: {e}")
+            self._conn = None
+
+    def _create_tables(self):
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                edges BLOB,
+                content BLOB,
+                last_seen INTEGER NOT NULL,
+                PRIMARY KEY (path, algorithm)
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_seen ON hashes(last_seen)")
+
+    def _migrate(self, version):
+        """Met à jour une base créée par une version précédente"""
+        if version == 2:
+            # Empreintes MD5 brutes, sans colonne d'algorithme : elles sont conservées
+            self._conn.execute("ALTER TABLE hashes RENAME TO hashes_v2")
+            self._conn.execute("DROP INDEX IF EXISTS idx_last_seen")
+            self._create_tables()
+            self._conn.execute("""
+                INSERT INTO hashes (path, algorithm, size, mtime_ns, inode, edges, content, last_seen)
+                SELECT path, 'md5', size, mtime_ns, inode, edges, content, last_seen FROM hashes_v2""")
+            self._conn.execute("DROP TABLE hashes_v2")
+        else:
+            # Empreintes hexadécimales d'un ancien format, pas comparables : on repart de zéro
+            self._conn.execute("DROP TABLE IF EXISTS hashes")
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def lookup(self, file_path, size, mtime_ns, inode, stage, algorithm=DEFAULT_ALGORITHM):
+        """Retourne l'empreinte en cache si le fichier n'a pas changé, sinon None"""
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT {stage} FROM hashes WHERE path = ? AND algorithm = ? "
+                    "AND size = ? AND mtime_ns = ? AND inode = ?",
+                    (file_path, algorithm, size, mtime_ns, inode)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la lecture du cache de hash: {e}")
+            return None
+
+        # Le cache peut être partagé entre threads (surveillance) : flush échange ces listes sous le verrou
+        with self._lock:
+            if row is None or row[0] is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched.append((file_path, algorithm))
+        return row[0]
+
+    def store(self, file_path, size, mtime_ns, inode, stage, digest, algorithm=DEFAULT_ALGORITHM):
+        """Enregistre une empreinte (écriture groupée)"""
+        if self._conn is None:
+            return
+        values = dict.fromkeys(STAGES)
+        values[stage] = digest
+        with self._lock:
+            self._pending.append((file_path, algorithm, size, mtime_ns, inode, values['edges'], values['content']))
+            full = len(self._pending) >= BATCH_SIZE
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Écrit les empreintes en attente"""
+        if self._conn is None or not (self._pending or self._touched):
+            return
+        now = int(time.time())
+        try:
+            with self._lock, self._conn:
+                pending, self._pending = self._pending, []
+                touched, self._touched = self._touched, []
+                # Une entrée dont la taille, la date ou l'inode a changé est remplacée entièrement
+                self._conn.executemany("""
+                    INSERT INTO hashes (path, algorithm, size, mtime_ns, inode, edges, content, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(path, algorithm) DO UPDATE SET
+                        edges = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                     AND inode = excluded.inode
+                                THEN coalesce(excluded.edges, edges) ELSE excluded.edges END,
+                        content = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                                       AND inode = excluded.inode
+                                  THEN coalesce(excluded.content, content) ELSE excluded.content END,
+                        size = excluded.size,
+                        mtime_ns = excluded.mtime_ns,
+                        inode = excluded.inode,
+                        last_seen = excluded.last_seen""",
+                                       [row + (now,) for row in pending])
+                self._conn.executemany("UPDATE hashes SET last_seen = ? WHERE path = ? AND algorithm = ?",
+                                       [(now,) + key for key in touched])
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'écriture du cache de hash: {e}")
+
+    def forget_missing(self, folder_path, since):
+        """Supprime les entrées d'un dossier non revues depuis `since` dont le fichier n'existe plus"""
+        if self._conn is None:
+            return 0
+        prefix = os.path.join(os.path.abspath(folder_path), '')
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT DISTINCT path FROM hashes WHERE path >= ? AND path < ? AND last_seen < ?",
+                    (prefix, upper, since)).fetchall()
+                missing = [(path,) for (path,) in rows if not os.path.exists(path)]
+                with self._conn:
+                    self._conn.executemany("DELETE FROM hashes WHERE path = ?", missing)
+            return len(missing)
+        except sqlite3.Error as e:
+            print(f"Erreur lors du nettoyage du cache de hash: {e}")
+            return 0
+
+    def prune_missing(self):
+        """Supprime toutes les entrées dont le fichier n'existe plus"""
+        return self.forget_missing(os.path.abspath(os.sep), int(time.time()) + 1)
+
+    def compact(self):
+        """Applique la limite de taille en supprimant les entrées les moins récemment vues"""
+        if self._conn is None:
+            return 0
+        self.flush()
+        try:
+            with self._lock:
+                count = self._conn.execute("SELECT count(*) FROM hashes").fetchone()[0]
+                excess = count - self.max_entries
+                if excess <= 0:
+                    return 0
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM hashes WHERE rowid IN "
+                        "(SELECT rowid FROM hashes ORDER BY last_seen LIMIT ?)", (excess,))
+                self._conn.execute("VACUUM")
+            return excess
+        except sqlite3.Error as e:
+            print(f"Erreur lors du compactage du cache de hash: {e}")
+            return 0
+
+    def close(self):
+        """Écrit les données en attente et ferme la base"""
+        if self._conn is None:
+            return
+        self.flush()
+        with self._lock:
+            self._conn.close()
+            self._conn = None
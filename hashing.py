@@ -0,0 +1,264 @@
+"""
+Calcul des empreintes de fichiers pour BeGreen!
+Algorithmes et méthodes de lecture interchangeables, pool de calcul borné en parallèle
+"""
+
+import os
+import mmap
+import queue
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from metrics import Metrics
+
+# Taille des blocs lus au début et à la fin d'un fichier pour l'empreinte partielle
+EDGE_SIZE = 8 * 1024
+# Taille du tampon de lecture, réutilisé d'un fichier à l'autre
+CHUNK_SIZE = 256 * 1024
+
+# Valeurs par défaut du pool de hash
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+
+# Algorithmes disponibles (voir benchmarks/bench_hashing.py pour comparer les débits)
+ALGORITHMS = {
+    'md5': hashlib.md5,
+    'blake2b': lambda: hashlib.blake2b(digest_size=16),
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+}
+# md5 par défaut : rapide sur tous les processeurs, et compatible avec les empreintes déjà en cache.
+# sha256 n'est plus rapide que sur les processeurs avec extensions SHA (--algorithm sha256).
+DEFAULT_ALGORITHM = 'md5'
+
+# Méthodes de lecture : boucle read(), readinto() dans un tampon réutilisé,
+# hashlib.file_digest() (Python 3.11+), ou mmap pour les gros fichiers.
+# mmap n'est pas le choix par défaut : un fichier tronqué pendant la lecture
+# provoquerait une erreur fatale (SIGBUS) au lieu d'une simple exception.
+READERS = ('read', 'readinto', 'file_digest', 'mmap')
+DEFAULT_READER = 'readinto'
+# Taille à partir de laquelle le lecteur 'mmap' projette le fichier en mémoire
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+class Hasher:
+    """Calcule les empreintes de fichiers avec un algorithme et une méthode de lecture donnés.
+
+    Chaque thread a son propre tampon de lecture, alloué une seule fois.
+    Les méthodes retournent (empreinte brute, octets lus), l'empreinte valant
+    None en cas d'erreur.
+    """
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, reader=DEFAULT_READER, chunk_size=CHUNK_SIZE):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Algorithme de hash inconnu: {algorithm}")
+        if reader not in READERS:
+            raise ValueError(f"Méthode de lecture inconnue: {reader}")
+        if reader == 'file_digest' and not hasattr(hashlib, 'file_digest'):
+            reader = 'readinto'
+        self.algorithm = algorithm
+        self.reader = reader
+        self.chunk_size = chunk_size
+        self._new = ALGORITHMS[algorithm]
+        self.digest_size = self._new().digest_size  # Taille des empreintes brutes (octets)
+        self._local = threading.local()
+        # Fichiers lus, octets, temps passé et erreurs ; FileAnalyzer en fournit une par analyse
+        self.metrics = Metrics()
+
+    def hash_edges(self, file_path, size):
+        """Empreinte du début et de la fin d'un fichier (du fichier entier s'il est petit)"""
+        started = time.perf_counter()
+        try:
+            digest = self._new()
+            with open(file_path, "rb") as f:
+                if size <= 2 * EDGE_SIZE:
+                    data = f.read()
+                    digest.update(data)
+                    result = digest.digest(), len(data)
+                else:
+                    head = f.read(EDGE_SIZE)
+                    f.seek(size - EDGE_SIZE)
+                    tail = f.read(EDGE_SIZE)
+                    digest.update(head)
+                    digest.update(tail)
+                    result = digest.digest(), len(head) + len(tail)
+        except (OSError, IOError) as e:
+            self.metrics.error(e, file_path)
+            return None, 0
+        self.metrics.hashed(result[1], time.perf_counter() - started)
+        return result
+
+    def hash_file(self, file_path, size=None):
+        """Empreinte du contenu complet d'un fichier"""
+        started = time.perf_counter()
+        try:
+            with open(file_path, "rb") as f:
+                if self.reader == 'mmap' and size is not None and size >= MMAP_THRESHOLD:
+                    result = self._hash_mmap(f)
+                elif self.reader == 'file_digest':
+                    digest = hashlib.file_digest(f, self._new)
+                    result = digest.digest(), f.tell()
+                elif self.reader == 'read':
+                    result = self._hash_read(f)
+                else:
+                    result = self._hash_readinto(f)
+        except (OSError, IOError, ValueError) as e:
+            self.metrics.error(e, file_path)
+            return None, 0
+        self.metrics.hashed(result[1], time.perf_counter() - started)
+        return result
+
+    def _hash_read(self, f):
+        digest = self._new()
+        bytes_read = 0
+        for chunk in iter(lambda: f.read(self.chunk_size), b""):
+            digest.update(chunk)
+            bytes_read += len(chunk)
+        return digest.digest(), bytes_read
+
+    def _hash_readinto(self, f):
+        view = getattr(self._local, 'view', None)
+        if view is None:
+            view = self._local.view = memoryview(bytearray(self.chunk_size))
+        digest = self._new()
+        bytes_read = 0
+        while True:
+            count = f.readinto(view)
+            if not count:
+                break
+            digest.update(view[:count])
+            bytes_read += count
+        return digest.digest(), bytes_read
+
+    def _hash_mmap(self, f):
+        digest = self._new()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            digest.update(mapped)
+            return digest.digest(), len(mapped)
+
+
+_default_hasher = Hasher()
+
+
+def hash_edges(file_path, size):
+    """Empreinte partielle avec l'algorithme par défaut ; retourne (empreinte brute, octets lus)"""
+    return _default_hasher.hash_edges(file_path, size)
+
+
+def hash_file(file_path, size=None):
+    """Empreinte complète avec l'algorithme par défaut ; retourne (empreinte brute, octets lus)"""
+    return _default_hasher.hash_file(file_path, size)
+
+
+class HashPool:
+    """Exécute les calculs de hash sur des pools de threads bornés, un par périphérique.
+
+    Chaque périphérique (st_dev) a sa propre file : ses threads et sa propre
+    limite d'octets en cours de lecture (max_inflight_bytes). Un disque lent
+    ou un partage réseau ne retient donc pas les lectures des autres disques.
+    submit() ne bloque pas : au-delà de la limite, les calculs attendent dans
+    la file de leur périphérique. Les résultats sont déposés dans une file
+    commune que le thread appelant vide avec results().
+    Avec un seul worker, les calculs sont faits immédiatement dans l'appelant.
+    """
+
+    def __init__(self, workers=None, max_inflight_bytes=None):
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.max_inflight_bytes = max_inflight_bytes or DEFAULT_MAX_INFLIGHT_BYTES
+        self.pending = 0
+        self.pending_bytes = 0  # Octets planifiés dont le résultat n'a pas encore été lu
+        self._results = queue.Queue()
+        self._devices = {}  # périphérique -> DeviceQueue
+
+    def submit(self, func, file_path, size, cost, tag, device=None):
+        """Planifie func(file_path, size) sur la file du périphérique ; le résultat est rendu avec tag"""
+        self.pending += 1
+        self.pending_bytes += cost
+        if self.workers == 1:
+            self._results.put((tag, func(file_path, size), cost))
+            return
+
+        device_queue = self._devices.get(device)
+        if device_queue is None:
+            device_queue = self._devices[device] = DeviceQueue(self.workers, self.max_inflight_bytes,
+                                                               self._results)
+        device_queue.submit(func, file_path, size, cost, tag)
+
+    def results(self, timeout=0):
+        """Itère sur les résultats disponibles.
+
+        Avec un timeout, attend au plus ce délai l'arrivée de chaque résultat ;
+        avec None, attend jusqu'au dernier résultat.
+        """
+        while self.pending:
+            try:
+                tag, result, cost = self._results.get(block=timeout != 0, timeout=timeout or None)
+            except queue.Empty:
+                return
+            self.pending -= 1
+            self.pending_bytes = max(0, self.pending_bytes - cost)
+            yield tag, result
+
+    def close(self, cancel=False):
+        """Arrête les threads ; avec cancel, les calculs pas encore commencés sont abandonnés.
+
+        Sans cancel, close() n'est appelé qu'une fois tous les résultats lus :
+        aucun calcul n'attend plus dans les files.
+        """
+        devices, self._devices = self._devices, {}
+        dropped = sum(device_queue.close(cancel) for device_queue in devices.values())
+        if cancel or dropped:
+            # Seuls les résultats déjà calculés restent à lire
+            self.pending = self._results.qsize()
+            self.pending_bytes = 0
+
+
+class DeviceQueue:
+    """File de calculs d'un périphérique : threads et limite d'octets en lecture propres"""
+
+    def __init__(self, workers, max_inflight_bytes, results):
+        self.max_inflight_bytes = max_inflight_bytes
+        self._results = results
+        self._backlog = deque()  # Calculs en attente de place sous la limite
+        self._inflight_bytes = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="begreen-hash")
+
+    def submit(self, func, file_path, size, cost, tag):
+        task = (func, file_path, size, cost, tag)
+        with self._lock:
+            # Une tâche seule passe toujours, même plus grosse que la limite
+            if self._backlog or (self._inflight_bytes and self._inflight_bytes + cost > self.max_inflight_bytes):
+                self._backlog.append(task)
+                return
+            self._inflight_bytes += cost
+        self._executor.submit(self._run, *task)
+
+    def _run(self, func, file_path, size, cost, tag):
+        try:
+            result = func(file_path, size)
+        except Exception:
+            result = (None, 0)
+        finally:
+            # Démarrer les calculs en attente qui tiennent maintenant sous la limite
+            with self._lock:
+                self._inflight_bytes -= cost
+                while self._backlog and not self._closed and (
+                        not self._inflight_bytes
+                        or self._inflight_bytes + self._backlog[0][3] <= self.max_inflight_bytes):
+                    task = self._backlog.popleft()
+                    self._inflight_bytes += task[3]
+                    self._executor.submit(self._run, *task)
+        self._results.put((tag, result, cost))
+
+    def close(self, cancel=False):
+        """Attend la fin des calculs commencés ; retourne le nombre de calculs en attente abandonnés"""
+        with self._lock:
+            self._closed = True
+            dropped = len(self._backlog)
+            self._backlog.clear()
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        return dropped
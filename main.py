@@ -1,10 +1,18 @@
 """
 BeGreen! - Application d'analyse Green IT
 Point d'entrée du programme
+
+Sans argument : interface graphique. Avec des dossiers en argument : analyse
+en ligne de commande (voir cli.py), sans charger tkinter ni Pillow.
 """
 
-from ui.main_window import BeGreenApp
+import sys
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from cli import main
+        sys.exit(main())
+
+    from ui.main_window import BeGreenApp
     app = BeGreenApp()
-    app.run()
\ No newline at end of file
+    app.run()
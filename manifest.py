@@ -0,0 +1,424 @@
+"""
+Manifestes d'analyse pour BeGreen!
+Export binaire compact d'une analyse et fusion des manifestes de tout un parc de machines
+"""
+
+import os
+import heapq
+import struct
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from stats import TopN
+
+MAGIC = b'BGMF'
+VERSION = 1
+MANIFEST_EXTENSION = '.bgm'
+
+# Fichiers exportés : à partir de cette taille (le gaspillage d'un parc vient des gros fichiers)
+MIN_SIZE = 1024 * 1024
+# Fichiers lus en même temps pendant une fusion ; au-delà, la fusion se fait en plusieurs passes
+MERGE_FAN_IN = 256
+# Enregistrements triés en mémoire avant d'être écrits dans un fichier intermédiaire
+RUN_RECORDS = 1000000
+# Enregistrements lus à la fois dans un fichier
+READ_BLOCK = 4096
+# Manifestes gardés ouverts pour retrouver les chemins des copies
+OPEN_MANIFESTS = 64
+# Copies d'un groupe dont les chemins sont retenus (les autres sont seulement comptées)
+MAX_GROUP_PATHS = 1000
+# Groupes détaillés dans le rapport, par octets gaspillés
+TOP_N = 100
+
+# Magie, version, taille des empreintes, date (s), enregistrements, chemins, position de l'index des chemins
+HEADER = struct.Struct('>4sBBQQIQ')
+# Longueur des textes de l'en-tête : algorithme, nom de la machine, racines (une par ligne), chemins
+STRING_LENGTH = struct.Struct('>H')
+OFFSET = struct.Struct('>Q')
+
+
+def record_struct(digest_size):
+    """Enregistrement d'un manifeste : taille, empreinte complète, numéro du chemin, mtime_ns.
+
+    En gros-boutiste : l'ordre des octets est celui de (taille, empreinte),
+    les enregistrements se trient et se fusionnent comme de simples bytes.
+    """
+    return struct.Struct(f'>Q{digest_size}sIq')
+
+
+def entry_struct(digest_size):
+    """Enregistrement fusionné : celui du manifeste, avec le rang du manifeste avant le numéro du chemin"""
+    return struct.Struct(f'>Q{digest_size}sIIq')
+
+
+def find_manifests(paths):
+    """Manifestes désignés par des fichiers ou des dossiers (tous les *.bgm du dossier)"""
+    manifests = []
+    for path in paths:
+        if os.path.isdir(path):
+            manifests.extend(sorted(entry.path for entry in os.scandir(path)
+                                    if entry.is_file() and entry.name.endswith(MANIFEST_EXTENSION)))
+        else:
+            manifests.append(path)
+    return manifests
+
+
+def _read_records(f, record_size):
+    """Itère sur les enregistrements de taille fixe d'un fichier, lus par blocs"""
+    while True:
+        block = f.read(record_size * READ_BLOCK)
+        if not block:
+            return
+        for offset in range(0, len(block) - record_size + 1, record_size):
+            yield block[offset:offset + record_size]
+
+
+def _write_run(records, tmp_dir):
+    """Écrit des enregistrements dans un fichier temporaire ; retourne son chemin"""
+    fd, path = tempfile.mkstemp(dir=tmp_dir, prefix=".begreen_run_", suffix=".tmp")
+    with os.fdopen(fd, 'wb') as f:
+        f.writelines(records)
+    return path
+
+
+def _merge_runs(runs, record_size, tmp_dir, fan_in=MERGE_FAN_IN):
+    """Fusionne des fichiers triés (supprimés ensuite) en un seul flux trié.
+
+    Au plus fan_in fichiers sont ouverts en même temps : s'il y en a plus,
+    des passes intermédiaires les regroupent d'abord par paquets.
+    """
+    merged = []
+    try:
+        while len(runs) > fan_in:
+            for start in range(0, len(runs), fan_in):
+                merged.append(_write_run(_merge_files(runs[start:start + fan_in], record_size), tmp_dir))
+            for path in runs:
+                os.remove(path)
+            runs, merged = merged, []
+        yield from _merge_files(runs, record_size)
+    finally:
+        for path in runs + merged:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _merge_files(paths, record_size):
+    files = [open(path, 'rb') for path in paths]
+    try:
+        yield from heapq.merge(*(_read_records(f, record_size) for f in files))
+    finally:
+        for f in files:
+            f.close()
+
+
+def sorted_records(records, record_size, tmp_dir=None, run_records=RUN_RECORDS):
+    """Trie des enregistrements de taille fixe (bytes) en mémoire bornée.
+
+    Tri externe : les enregistrements sont triés par paquets de run_records,
+    écrits dans des fichiers temporaires puis fusionnés. Un seul paquet
+    reste en mémoire, sans fichier temporaire.
+    """
+    runs = []
+    batch = []
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= run_records:
+                batch.sort()
+                runs.append(_write_run(batch, tmp_dir))
+                batch = []
+        batch.sort()
+        if not runs:
+            yield from batch
+            return
+        if batch:
+            runs.append(_write_run(batch, tmp_dir))
+            batch = []
+    except BaseException:
+        for path in runs:
+            os.remove(path)
+        raise
+    yield from _merge_runs(runs, record_size, tmp_dir)
+
+
+def write_manifest(manifest_path, records, paths, digest_size, algorithm, machine, roots, tmp_dir=None):
+    """Écrit un manifeste ; retourne le nombre d'enregistrements.
+
+    records itère sur (taille, empreinte, numéro du chemin, mtime_ns) dans
+    n'importe quel ordre ; ils sont triés par (taille, empreinte). paths
+    itère ensuite sur les chemins dans l'ordre de leurs numéros. Le fichier
+    est écrit à côté puis renommé : un manifeste n'est jamais à moitié écrit.
+    """
+    record = record_struct(digest_size)
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".begreen_manifest_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, digest_size, 0, 0, 0, 0))
+            for text in (algorithm, machine, '\n'.join(roots)):
+                data = text.encode('utf-8')
+                f.write(STRING_LENGTH.pack(len(data)) + data)
+
+            record_count = 0
+            packed = (record.pack(*values) for values in records)
+            for data in sorted_records(packed, record.size, tmp_dir or directory):
+                f.write(data)
+                record_count += 1
+
+            # Chemins à la suite, puis leur position : un chemin se retrouve sans lire les autres
+            offsets = array('Q')
+            for path in paths:
+                data = os.fsencode(path)
+                offsets.append(f.tell())
+                f.write(STRING_LENGTH.pack(len(data)) + data)
+            index_offset = f.tell()
+            for offset in offsets:
+                f.write(OFFSET.pack(offset))
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, digest_size, int(time.time()), record_count, len(offsets),
+                                index_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, manifest_path)
+        temp_path = None
+        return record_count
+    finally:
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+class Manifest:
+    """Manifeste lu : en-tête en mémoire, enregistrements et chemins lus à la demande"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        with open(path, 'rb') as f:
+            data = f.read(HEADER.size)
+            if len(data) < HEADER.size:
+                raise ValueError("manifeste tronqué")
+            (magic, version, self.digest_size, self.created, self.record_count, self.path_count,
+             self.index_offset) = HEADER.unpack(data)
+            if magic != MAGIC:
+                raise ValueError("ce fichier n'est pas un manifeste BeGreen!")
+            if version != VERSION:
+                raise ValueError(f"version de manifeste non prise en charge: {version}")
+            self.algorithm = self._read_string(f)
+            self.machine = self._read_string(f)
+            self.roots = tuple(root for root in self._read_string(f).split('\n') if root)
+            self.records_offset = f.tell()
+        self.record = record_struct(self.digest_size)
+        if self.index_offset < self.records_offset + self.record_count * self.record.size:
+            raise ValueError("manifeste incomplet")
+
+    @staticmethod
+    def _read_string(f):
+        data = f.read(STRING_LENGTH.size)
+        if len(data) < STRING_LENGTH.size:
+            raise ValueError("manifeste tronqué")
+        return f.read(STRING_LENGTH.unpack(data)[0]).decode('utf-8')
+
+    def records(self):
+        """Itère sur les enregistrements (bytes), triés par (taille, empreinte)"""
+        with open(self.path, 'rb') as f:
+            f.seek(self.records_offset)
+            remaining = self.record_count
+            for data in _read_records(f, self.record.size):
+                if not remaining:
+                    return
+                remaining -= 1
+                yield data
+
+    def path_of(self, path_id):
+        """Chemin d'un fichier du manifeste, d'après son numéro"""
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        f = self._file
+        f.seek(self.index_offset + path_id * OFFSET.size)
+        f.seek(OFFSET.unpack(f.read(OFFSET.size))[0])
+        length = STRING_LENGTH.unpack(f.read(STRING_LENGTH.size))[0]
+        return os.fsdecode(f.read(length))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class FleetGroup:
+    """Contenu présent plusieurs fois dans le parc : entries garde (rang du manifeste, numéro du chemin)"""
+    __slots__ = ('size', 'digest', 'copies', 'machines', 'entries')
+
+    def __init__(self, size, digest):
+        self.size = size
+        self.digest = digest
+        self.copies = 0
+        self.machines = set()
+        self.entries = []
+
+    @property
+    def wasted_bytes(self):
+        """Octets occupés par les copies en trop, toutes machines confondues"""
+        return self.size * (self.copies - 1)
+
+
+class ManifestMerger:
+    """Fusionne les manifestes d'un parc en un flux trié, sans tout charger en mémoire.
+
+    Chaque manifeste est déjà trié par (taille, empreinte) : une fusion à k
+    voies (heapq.merge) les parcourt ensemble et rend les copies d'un même
+    contenu côte à côte. Au-delà de fan_in manifestes, ils sont fusionnés
+    par paquets dans des fichiers temporaires (tmp_dir), puis ces fichiers
+    entre eux. La mémoire est bornée par le groupe en cours et le classement.
+
+    Les manifestes illisibles, ou calculés avec un autre algorithme que le
+    premier, sont écartés (skipped). Pour une même machine et les mêmes
+    racines, seul le manifeste le plus récent est gardé.
+    """
+
+    def __init__(self, paths, tmp_dir=None, fan_in=MERGE_FAN_IN, max_paths=MAX_GROUP_PATHS):
+        self.tmp_dir = tmp_dir
+        self.fan_in = fan_in
+        self.max_paths = max_paths
+        self.skipped = []  # (chemin, raison)
+        self.errors = 0  # Manifestes illisibles ou incompatibles
+        self.algorithm = None
+        self.digest_size = None
+        self._open = OrderedDict()  # rang -> Manifest ouvert pour lire des chemins
+
+        latest = {}
+        for path in find_manifests(paths):
+            try:
+                manifest = Manifest(path)
+            except (OSError, ValueError) as e:
+                print(f"Erreur lors de la lecture du manifeste {path}: {e}")
+                self.skipped.append((path, str(e)))
+                self.errors += 1
+                continue
+            if self.algorithm is None:
+                self.algorithm, self.digest_size = manifest.algorithm, manifest.digest_size
+            elif (manifest.algorithm, manifest.digest_size) != (self.algorithm, self.digest_size):
+                self.skipped.append((path, f"algorithme {manifest.algorithm} au lieu de {self.algorithm}"))
+                self.errors += 1
+                continue
+            key = (manifest.machine, manifest.roots)
+            previous = latest.get(key)
+            if previous is not None:
+                older = previous if previous.created <= manifest.created else manifest
+                self.skipped.append((older.path, "remplacé par un manifeste plus récent"))
+                if older is manifest:
+                    continue
+            latest[key] = manifest
+        self.manifests = list(latest.values())
+
+    def entries(self):
+        """Itère sur les enregistrements fusionnés (voir entry_struct), triés par (taille, empreinte)"""
+        if not self.manifests:
+            return iter(())
+        entry = entry_struct(self.digest_size)
+        key_size = 8 + self.digest_size
+        streams = [self._tagged(position, manifest, key_size) for position, manifest in enumerate(self.manifests)]
+        if len(streams) <= self.fan_in:
+            return heapq.merge(*streams)
+
+        # Première passe : un fichier trié par paquet de fan_in manifestes
+        runs = []
+        try:
+            for start in range(0, len(streams), self.fan_in):
+                runs.append(_write_run(heapq.merge(*streams[start:start + self.fan_in]), self.tmp_dir))
+        except BaseException:
+            for path in runs:
+                os.remove(path)
+            raise
+        return _merge_runs(runs, entry.size, self.tmp_dir, self.fan_in)
+
+    @staticmethod
+    def _tagged(position, manifest, key_size):
+        """Enregistrements d'un manifeste, avec son rang inséré après la clé de tri"""
+        tag = position.to_bytes(4, 'big')
+        for data in manifest.records():
+            yield data[:key_size] + tag + data[key_size:]
+
+    def groups(self, min_copies=1):
+        """Itère sur les contenus distincts du parc (FleetGroup) ayant au moins min_copies copies"""
+        entry = entry_struct(self.digest_size)
+        key_size = 8 + self.digest_size
+        machines = [manifest.machine for manifest in self.manifests]
+        group = None
+        key = None
+        for data in self.entries():
+            if data[:key_size] != key:
+                if group is not None and group.copies >= min_copies:
+                    yield group
+                key = data[:key_size]
+                size, digest, _, _, _ = entry.unpack(data)
+                group = FleetGroup(size, digest)
+            _, _, position, path_id, _ = entry.unpack(data)
+            group.copies += 1
+            group.machines.add(machines[position])
+            if len(group.entries) < self.max_paths:
+                group.entries.append((position, path_id))
+        if group is not None and group.copies >= min_copies:
+            yield group
+
+    def paths(self, group, limit=None):
+        """[(machine, chemin)] des copies d'un groupe"""
+        return [(self.manifests[position].machine, self._manifest(position).path_of(path_id))
+                for position, path_id in group.entries[:limit]]
+
+    def _manifest(self, position):
+        """Manifeste ouvert pour lire ses chemins ; les moins récemment utilisés sont refermés"""
+        manifest = self._open.pop(position, None) or self.manifests[position]
+        self._open[position] = manifest
+        if len(self._open) > OPEN_MANIFESTS:
+            self._open.popitem(last=False)[1].close()
+        return manifest
+
+    def report(self, top_n=TOP_N, on_group=None):
+        """Rapport du parc : totaux, doublons, octets gaspillés et plus gros groupes.
+
+        on_group(groupe) est appelé pour chaque contenu présent au moins deux
+        fois, dès qu'il est complet (écriture au fil de l'eau).
+        """
+        totals = {'files': 0, 'total_bytes': 0, 'unique_files': 0, 'unique_bytes': 0,
+                  'duplicate_groups': 0, 'duplicate_files': 0, 'wasted_bytes': 0}
+        top = TopN(top_n)
+        for group in self.groups():
+            totals['files'] += group.copies
+            totals['total_bytes'] += group.size * group.copies
+            totals['unique_files'] += 1
+            totals['unique_bytes'] += group.size
+            if group.copies < 2:
+                continue
+            totals['duplicate_groups'] += 1
+            totals['duplicate_files'] += group.copies - 1
+            totals['wasted_bytes'] += group.wasted_bytes
+            top.push(group.wasted_bytes, group)
+            if on_group is not None:
+                on_group(group)
+
+        return {
+            'manifests': len(self.manifests),
+            'machines': len({manifest.machine for manifest in self.manifests}),
+            'algorithm': self.algorithm,
+            **totals,
+            'top_groups': [self.group_to_dict(group) for group in top.items()],
+            'skipped': [{'path': path, 'reason': reason} for path, reason in self.skipped],
+        }
+
+    def group_to_dict(self, group):
+        return {'size': group.size, 'digest': group.digest.hex(), 'copies': group.copies,
+                'machines': len(group.machines), 'wasted_bytes': group.wasted_bytes,
+                'paths': [{'machine': machine, 'path': path} for machine, path in self.paths(group)]}
+
+    def close(self):
+        for manifest in self._open.values():
+            manifest.close()
+        self._open.clear()
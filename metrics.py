@@ -0,0 +1,210 @@
+"""
+Mesures des analyses pour BeGreen!
+Durée de chaque phase, compteurs, fichiers ignorés, erreurs, fichier de trace et profilage optionnel
+"""
+
+import os
+import json
+import time
+import threading
+import contextlib
+from collections import Counter
+
+# Compteurs dont les écarts sont rapportés pour chaque phase
+PHASE_COUNTERS = ('dirs', 'files', 'stat_calls', 'hashed_files', 'bytes_read')
+# Emplacements d'allocation rapportés avec tracemalloc
+TOP_ALLOCATIONS = 10
+# Nombre de fonctions affichées dans le résumé cProfile
+TOP_FUNCTIONS = 20
+
+
+def read_proc_io():
+    """Compteurs d'entrées-sorties du processus (/proc/self/io, Linux), sinon None"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            return {key: int(value) for key, value in (line.split(':') for line in f if ':' in line)}
+    except (OSError, ValueError):
+        return None
+
+
+class Metrics:
+    """Mesures d'une analyse, lisibles en mémoire (to_dict) et écrites au fil de l'eau dans une trace.
+
+    Les compteurs peuvent être incrémentés depuis les threads de parcours et
+    de hash. Chaque phase (with metrics.phase('walk')) mesure sa durée et
+    l'écart des compteurs principaux, d'où les débits (dossiers, fichiers et
+    MB par seconde). Les fichiers ignorés sont comptés par raison, les erreurs
+    par type d'exception. La trace (JSON, une ligne par événement) reçoit le
+    début et la fin de chaque phase, chaque erreur avec son chemin et le bilan.
+    """
+
+    def __init__(self, trace_path=None):
+        self.counters = Counter()
+        self.skipped = Counter()  # raison -> fichiers ou dossiers ignorés
+        self.errors = Counter()  # type d'exception -> nombre
+        self.phases = {}  # nom -> {'seconds': ..., compteurs de la phase}
+        self.memory = None  # Rempli par profiling(trace_memory=True)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._elapsed = None
+        self._io_start = read_proc_io()
+        self._io = None
+        self._trace = None
+        if trace_path:
+            try:
+                self._trace = open(trace_path, 'a', encoding='utf-8')
+            except OSError as e:
+                print(f"Erreur lors de l'ouverture de la trace: {e}")
+
+    def count(self, **values):
+        """Incrémente plusieurs compteurs à la fois : count(dirs=1, files=12)"""
+        with self._lock:
+            self.counters.update(values)
+
+    def skip(self, reason, count=1):
+        with self._lock:
+            self.skipped[reason] += count
+
+    def error(self, error, path=None):
+        """Compte une erreur (exception ou nom de type) et la note dans la trace"""
+        kind = error if isinstance(error, str) else type(error).__name__
+        with self._lock:
+            self.errors[kind] += 1
+        if self._trace is not None:
+            self.event('error', type=kind, path=path or getattr(error, 'filename', None), message=str(error))
+
+    def hashed(self, bytes_read, seconds):
+        """Un calcul d'empreinte terminé (depuis un thread de hash)"""
+        with self._lock:
+            self.counters['hashed_files'] += 1
+            self.counters['bytes_read'] += bytes_read
+            self.counters['hash_seconds'] += seconds
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Mesure une phase ; une phase répétée (mises à jour successives) cumule ses mesures"""
+        self.event('phase_start', phase=name)
+        with self._lock:
+            before = {key: self.counters[key] for key in PHASE_COUNTERS}
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                phase = self.phases.setdefault(name, {'seconds': 0.0, **{key: 0 for key in PHASE_COUNTERS}})
+                phase['seconds'] += seconds
+                for key in PHASE_COUNTERS:
+                    phase[key] += self.counters[key] - before[key]
+            self.event('phase_end', phase=name, **self._phase_dict(phase))
+
+    def event(self, name, **fields):
+        """Ajoute une ligne à la trace (sans effet sans fichier de trace)"""
+        if self._trace is None:
+            return
+        line = json.dumps({'time': round(time.perf_counter() - self._started, 6), 'event': name, **fields},
+                          ensure_ascii=False, default=str)
+        with self._lock:
+            if self._trace is not None:
+                self._trace.write(line + '\n')
+
+    def finish(self):
+        """Arrête le chronomètre, écrit le bilan dans la trace et la ferme"""
+        if self._elapsed is not None:
+            return
+        self._elapsed = time.perf_counter() - self._started
+        io = read_proc_io()
+        if io is not None and self._io_start is not None:
+            self._io = {key: value - self._io_start.get(key, 0) for key, value in io.items()}
+        if self._trace is not None:
+            self.event('summary', **self.to_dict())
+            with self._lock:
+                self._trace.close()
+                self._trace = None
+
+    @property
+    def elapsed(self):
+        return self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+
+    @staticmethod
+    def _phase_dict(phase):
+        seconds = phase['seconds']
+        data = {key: round(value, 6) if isinstance(value, float) else value for key, value in phase.items()}
+        if seconds > 0:
+            data['dirs_per_s'] = round(phase['dirs'] / seconds, 1)
+            data['files_per_s'] = round(phase['files'] / seconds, 1)
+            data['mb_per_s'] = round(phase['bytes_read'] / seconds / (1024 ** 2), 2)
+        return data
+
+    def to_dict(self):
+        """Mesures sous forme de dictionnaire (rapport JSON)"""
+        with self._lock:
+            counters = dict(self.counters)
+            phases = {name: self._phase_dict(phase) for name, phase in self.phases.items()}
+            skipped, errors = dict(self.skipped), dict(self.errors)
+        elapsed = self.elapsed
+        hash_seconds = counters.pop('hash_seconds', 0.0)
+        data = {
+            'elapsed': round(elapsed, 6),
+            'phases': phases,
+            'counters': counters,
+            # Débit d'un thread de hash, puis débit global (threads en parallèle, pendant le parcours)
+            'hash_mb_per_s': round(counters.get('bytes_read', 0) / hash_seconds / (1024 ** 2), 2)
+            if hash_seconds > 0 else None,
+            'read_mb_per_s': round(counters.get('bytes_read', 0) / elapsed / (1024 ** 2), 2) if elapsed > 0 else None,
+            'hash_seconds': round(hash_seconds, 6),
+            'skipped': skipped,
+            'errors': errors,
+        }
+        if self._io is not None:
+            data['io'] = self._io
+        if self.memory is not None:
+            data['memory'] = self.memory
+        return data
+
+    @contextlib.contextmanager
+    def profiling(self, profile_path=None, trace_memory=False):
+        """Profilage optionnel : cProfile (statistiques écrites dans profile_path) et tracemalloc.
+
+        cProfile ne suit que le thread appelant (parcours, comptage, attente
+        des hash) ; les threads de hash apparaissent dans hash_seconds.
+        tracemalloc rapporte le pic de mémoire Python et les principaux
+        emplacements d'allocation dans memory.
+        """
+        profiler = None
+        if profile_path:
+            import cProfile
+            profiler = cProfile.Profile()
+        if trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._save_profile(profiler, profile_path)
+            if trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+                tracemalloc.stop()
+                self.memory = {'current_bytes': current, 'peak_bytes': peak,
+                               'top_allocations': [{'location': f"{stat.traceback[0].filename}:"
+                                                                f"{stat.traceback[0].lineno}",
+                                                    'bytes': stat.size, 'blocks': stat.count} for stat in top]}
+
+    @staticmethod
+    def _save_profile(profiler, profile_path):
+        """Écrit les statistiques (lisibles avec pstats ou snakeviz) et leur résumé à côté (.txt)"""
+        import io
+        import pstats
+        try:
+            profiler.dump_stats(profile_path)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            with open(os.path.splitext(profile_path)[0] + '.txt', 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+        except OSError as e:
+            print(f"Erreur lors de l'écriture du profil: {e}")
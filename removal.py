@@ -0,0 +1,305 @@
+"""
+Suppression des doublons pour BeGreen!
+Suppression par lots en parallèle, journalisée, avec simulation, quarantaine et restauration
+"""
+
+import os
+import json
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Nombre de fichiers traités entre deux écritures du journal
+DEFAULT_BATCH_SIZE = 256
+# Les suppressions attendent surtout le disque (ou le réseau) : plus de threads que de cœurs
+DEFAULT_WORKERS = 16
+# Intervalle minimal entre deux événements de progression (secondes)
+PROGRESS_INTERVAL = 0.1
+
+MODE_DELETE = 'delete'
+MODE_QUARANTINE = 'quarantine'
+
+
+def _stat_key(stat):
+    """(taille, mtime_ns, inode), comme DirState.stat_key"""
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def quarantine_path(quarantine_dir, file_path):
+    """Emplacement d'un fichier en quarantaine : son chemin absolu recopié sous quarantine_dir"""
+    drive, path = os.path.splitdrive(os.path.abspath(file_path))
+    return os.path.join(quarantine_dir, drive.replace(':', ''), path.lstrip('\\/'))
+
+
+def _free_path(target):
+    """target, ou « nom (2).ext », « nom (3).ext »... s'il est déjà occupé"""
+    root, ext = os.path.splitext(target)
+    number = 1
+    while os.path.lexists(target):
+        number += 1
+        target = f"{root} ({number}){ext}"
+    return target
+
+
+def read_journal(journal_path):
+    """Lit un journal : retourne (début, éléments prévus, {chemin: enregistrement}, terminé).
+
+    Un élément prévu est (chemin, chemin conservé), suivi des états des deux
+    fichiers lors de l'analyse dans les journaux récents (voir RemovalJob).
+
+    Une dernière ligne incomplète (arrêt brutal pendant l'écriture) est ignorée.
+    """
+    header, items, records, finished = None, [], {}, False
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get('op')
+            if op == 'begin':
+                header = record
+            elif op == 'plan':
+                items.extend(tuple(item) for item in record['items'])
+            elif op == 'end':
+                finished = True
+            elif 'path' in record:
+                records[record['path']] = record
+    return header, items, records, finished
+
+
+def unfinished_journals(journal_dir):
+    """Journaux d'un dossier dont la suppression n'est pas allée à son terme"""
+    journals = []
+    if not os.path.isdir(journal_dir):
+        return journals
+    for name in sorted(os.listdir(journal_dir)):
+        if not name.endswith('.jsonl'):
+            continue
+        path = os.path.join(journal_dir, name)
+        try:
+            if not read_journal(path)[3]:
+                journals.append(path)
+        except (OSError, KeyError) as e:
+            print(f"Erreur lors de la lecture du journal {path}: {e}")
+    return journals
+
+
+class RemovalJob:
+    """Supprime (ou met en quarantaine) des doublons par lots, en parallèle.
+
+    Chaque action est notée dans un journal JSON Lines en ajout seul : le plan
+    complet d'abord, puis le résultat de chaque fichier, lot par lot. Après un
+    arrêt brutal, resume() reprend les fichiers pas encore traités ; restore()
+    remet en place les fichiers mis en quarantaine.
+
+    Chaque élément est (doublon, fichier conservé), suivi si possible de
+    l'état (taille, mtime_ns, inode) des deux fichiers lors de l'analyse. Un
+    doublon n'est supprimé que si les deux fichiers sont inchangés depuis ;
+    sinon il est gardé et noté en échec dans le journal. Sans ces états
+    (anciens journaux), seule la taille du fichier conservé est vérifiée.
+    """
+
+    def __init__(self, journal_path, quarantine_dir=None, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.journal_path = journal_path
+        self.quarantine_dir = quarantine_dir
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.batch_size = batch_size
+        self.cancelled = False
+        self._progress_callback = None
+        self._last_progress = 0
+        self._started = 0
+
+    @property
+    def mode(self):
+        return MODE_QUARANTINE if self.quarantine_dir else MODE_DELETE
+
+    @classmethod
+    def from_journal(cls, journal_path, workers=None, batch_size=DEFAULT_BATCH_SIZE):
+        """Recrée le travail décrit par un journal existant"""
+        header = read_journal(journal_path)[0] or {}
+        return cls(journal_path, header.get('quarantine'), workers, batch_size)
+
+    def run(self, items, dry_run=False, progress_callback=None, cancel_event=None):
+        """Traite une liste de (doublon, fichier conservé).
+
+        Avec dry_run, rien n'est modifié ni journalisé : le résultat indique ce
+        qui serait supprimé ; sans journal_path, le travail n'est pas journalisé.
+        Retourne un dictionnaire : removed (chemins traités), skipped (déjà
+        absents), failed (erreurs, fichier conservé introuvable ou fichiers
+        modifiés depuis l'analyse) et bytes_freed.
+        """
+        items = [tuple(item) for item in items]
+        if dry_run or self.journal_path is None:
+            return self._process(items, None, dry_run, progress_callback, cancel_event)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            self._write(journal, [{'op': 'begin', 'mode': self.mode, 'quarantine': self.quarantine_dir,
+                                   'count': len(items), 'time': int(time.time())}])
+            for start in range(0, len(items), self.batch_size):
+                self._write(journal, [{'op': 'plan', 'items': items[start:start + self.batch_size]}])
+            return self._process(items, journal, False, progress_callback, cancel_event)
+
+    def resume(self, progress_callback=None, cancel_event=None):
+        """Reprend un travail interrompu à partir de son journal"""
+        _, items, records, finished = read_journal(self.journal_path)
+        if finished:
+            return self._empty_result()
+        # Les fichiers en erreur sont retentés
+        remaining = [item for item in items if records.get(item[0], {}).get('op', 'failed') == 'failed']
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            return self._process(remaining, journal, False, progress_callback, cancel_event)
+
+    def restore(self, progress_callback=None, cancel_event=None):
+        """Remet en place les fichiers mis en quarantaine par ce travail.
+
+        Un fichier n'est pas restauré si son emplacement d'origine est de
+        nouveau occupé. Son emplacement en quarantaine est celui noté dans le
+        journal (un dossier de quarantaine réutilisé peut en contenir
+        plusieurs versions). Après une annulation, les fichiers restants
+        peuvent être restaurés plus tard. Retourne le nombre de fichiers restaurés.
+        """
+        header, items, records, _ = read_journal(self.journal_path)
+        quarantine_dir = (header or {}).get('quarantine')
+        if not quarantine_dir:
+            return 0
+
+        self.cancelled = False
+        self._progress_callback = progress_callback
+        self._last_progress = 0
+        self._started = time.monotonic()
+        restored = []
+        done = 0
+        for path, *_ in items:
+            if cancel_event is not None and cancel_event.is_set():
+                self.cancelled = True
+                break
+            done += 1
+            record = records.get(path, {})
+            if record.get('op') == 'restored':
+                continue
+            # Sans enregistrement (arrêt brutal juste après le déplacement), l'emplacement par défaut
+            target = record.get('target') or quarantine_path(quarantine_dir, path)
+            if not os.path.lexists(target) or os.path.lexists(path):
+                continue
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                shutil.move(target, path)
+                restored.append({'op': 'restored', 'path': path})
+            except OSError as e:
+                print(f"Erreur lors de la restauration de {path}: {e}")
+            self._report_progress('restore', done, len(items), 0, path)
+
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            self._write(journal, restored)
+        self._report_progress('done', done, len(items), 0, None, force=True)
+        return len(restored)
+
+    def _process(self, items, journal, dry_run, progress_callback, cancel_event):
+        result = self._empty_result()
+        self.cancelled = False
+        self._progress_callback = progress_callback
+        self._last_progress = 0
+        self._started = time.monotonic()
+        total = len(items)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="begreen-remove") as executor:
+            for start in range(0, total, self.batch_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    self.cancelled = True
+                    break
+                batch = items[start:start + self.batch_size]
+                records = list(executor.map(lambda item: self._remove_one(*item, dry_run=dry_run), batch))
+                if journal is not None:
+                    self._write(journal, records)
+
+                for record in records:
+                    if record['op'] == 'removed':
+                        result['removed'].append(record['path'])
+                        result['bytes_freed'] += record['size']
+                    else:
+                        result[record['op']].append(record['path'])
+                done += len(batch)
+                self._report_progress('remove', done, total, result['bytes_freed'], batch[-1][0])
+
+        if journal is not None and not self.cancelled:
+            self._write(journal, [{'op': 'end', 'time': int(time.time())}])
+        self._report_progress('done', done, total, result['bytes_freed'], None, force=True)
+        return result
+
+    def _remove_one(self, path, keep_path, expected=None, keep_expected=None, dry_run=False):
+        """Supprime ou met en quarantaine un fichier ; retourne l'enregistrement du journal"""
+        try:
+            stat = os.lstat(path)
+        except FileNotFoundError:
+            return {'op': 'skipped', 'path': path, 'reason': "fichier déjà absent"}
+        except OSError as e:
+            return {'op': 'failed', 'path': path, 'error': str(e)}
+
+        # Sans le fichier conservé, le doublon est la dernière copie : on le garde
+        try:
+            keep_stat = os.stat(keep_path)
+        except OSError:
+            return {'op': 'failed', 'path': path, 'error': "fichier conservé introuvable"}
+        if expected is not None and _stat_key(stat) != tuple(expected):
+            return {'op': 'failed', 'path': path, 'error': "fichier modifié depuis l'analyse"}
+        if keep_expected is not None and _stat_key(keep_stat) != tuple(keep_expected):
+            return {'op': 'failed', 'path': path, 'error': "fichier conservé modifié depuis l'analyse"}
+        if keep_stat.st_size != stat.st_size:
+            return {'op': 'failed', 'path': path, 'error': "fichier conservé modifié"}
+
+        record = {'op': 'removed', 'path': path, 'size': stat.st_size}
+        if dry_run:
+            return record
+        try:
+            if self.quarantine_dir:
+                # Un dossier de quarantaine réutilisé peut déjà contenir ce chemin : il n'est pas écrasé
+                target = quarantine_path(self.quarantine_dir, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                target = _free_path(target)
+                shutil.move(path, target)
+                record['target'] = target
+            else:
+                os.remove(path)
+        except OSError as e:
+            return {'op': 'failed', 'path': path, 'error': str(e)}
+        return record
+
+    @staticmethod
+    def _write(journal, records):
+        """Ajoute des enregistrements au journal et les force sur le disque"""
+        if not records:
+            return
+        journal.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    @staticmethod
+    def _empty_result():
+        return {'removed': [], 'skipped': [], 'failed': [], 'bytes_freed': 0}
+
+    def _report_progress(self, stage, done, total, bytes_freed, current_path, force=False):
+        """Événement de progression, de même forme que celui de l'analyse (voir FileAnalyzer)"""
+        if self._progress_callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        elapsed = now - self._started
+        fraction = done / total if total else 1.0
+        eta = elapsed / fraction - elapsed if fraction else None
+        self._progress_callback({
+            'stage': stage,
+            'files': done,
+            'bytes_hashed': 0,
+            'pending_bytes': 0,
+            'bytes_freed': bytes_freed,
+            'current_dir': os.path.dirname(current_path) if current_path else None,
+            'elapsed': elapsed,
+            'eta': eta if stage != 'done' else 0,
+            'fraction': fraction
+        })
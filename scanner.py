@@ -0,0 +1,352 @@
+"""
+Parcours des dossiers pour BeGreen!
+Basé sur os.scandir : au plus un appel à stat par fichier
+"""
+
+import os
+import re
+import queue
+import fnmatch
+import threading
+from array import array
+from metrics import Metrics
+
+# Dossiers lus d'avance par chaque thread de parcours (un thread par périphérique)
+WALK_QUEUE_SIZE = 256
+# Écart entre les rangs des dossiers de deux racines : l'ordre reste celui des racines
+ROOT_ORDER_STRIDE = 1 << 40
+
+
+def disk_usage(stat):
+    """Place réellement occupée sur le disque (taille apparente si st_blocks est absent)"""
+    blocks = getattr(stat, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else stat.st_size
+
+
+class DirState:
+    """Contenu d'un dossier lors d'un parcours, stocké en colonnes.
+
+    Le chemin du dossier est partagé par tous ses fichiers (aucun chemin
+    complet n'est conservé) ; tailles, dates, inodes et place occupée sur le
+    disque sont dans des tableaux d'entiers. Un fichier est désigné par son
+    indice dans le dossier.
+
+    shared garde le périphérique (st_dev) des seuls fichiers qui ont plusieurs
+    liens physiques : ce sont les seuls dont l'inode doit être suivi pour ne
+    les compter qu'une fois.
+    """
+    __slots__ = ('path', 'mtime_ns', 'dev', 'order', 'names', 'sizes', 'mtimes', 'inodes', 'disk_usage',
+                 'shared', 'subdirs', 'digests', 'tree_size', 'tree_files')
+
+    def __init__(self, path, mtime_ns, dev=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.dev = dev  # Périphérique du dossier : les lectures sont réparties par périphérique
+        self.order = 0  # Rang du dossier dans le parcours en cours
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.inodes = array('Q')
+        self.disk_usage = array('q')
+        self.shared = None  # indice -> st_dev, créé au besoin
+        self.subdirs = []
+        self.digests = None  # indice -> [empreinte partielle, empreinte complète], créé au besoin
+        # Taille et nombre de fichiers du dossier et de ses sous-dossiers, calculés par l'analyse
+        self.tree_size = 0
+        self.tree_files = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_file(self, name, size, mtime_ns, inode, disk_usage, dev=None):
+        """Ajoute un fichier ; dev est donné si le fichier a d'autres liens physiques"""
+        if dev is not None:
+            self.mark_shared(len(self.names), dev)
+        self.names.append(name)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.inodes.append(inode)
+        self.disk_usage.append(disk_usage)
+
+    def file_path(self, index):
+        """Chemin complet d'un fichier, construit à la demande"""
+        return os.path.join(self.path, self.names[index])
+
+    def stat_key(self, index):
+        """(taille, mtime_ns, inode) d'un fichier"""
+        return self.sizes[index], self.mtimes[index], self.inodes[index]
+
+    def file_id(self, index):
+        """(st_dev, st_ino) d'un fichier qui a d'autres liens physiques, sinon None"""
+        if self.shared is None:
+            return None
+        dev = self.shared.get(index)
+        return (dev, self.inodes[index]) if dev is not None else None
+
+    def mark_shared(self, index, dev):
+        """Signale qu'un fichier a reçu d'autres liens physiques depuis la lecture du dossier"""
+        if self.shared is None:
+            self.shared = {}
+        self.shared[index] = dev
+
+    def subset(self, indices):
+        """Copie du dossier restreinte à certains fichiers (empreintes connues comprises)"""
+        state = DirState(self.path, self.mtime_ns, self.dev)
+        state.order = self.order
+        for index in indices:
+            dev = self.shared.get(index) if self.shared else None
+            state.add_file(self.names[index], *self.stat_key(index), self.disk_usage[index], dev)
+            if self.digests and index in self.digests:
+                state.copy_digests(len(state) - 1, self.digests[index])
+        return state
+
+    def copy(self):
+        """Copie qui partage les colonnes (non modifiées après la lecture) mais pas les totaux ni les empreintes.
+
+        Une mise à jour travaille sur des copies : les résultats publiés
+        restent intacts tant que les nouveaux ne sont pas prêts.
+        """
+        state = DirState(self.path, self.mtime_ns, self.dev)
+        state.order = self.order
+        state.names, state.sizes, state.mtimes = self.names, self.sizes, self.mtimes
+        state.inodes, state.disk_usage, state.subdirs = self.inodes, self.disk_usage, self.subdirs
+        state.shared = dict(self.shared) if self.shared else None
+        if self.digests:
+            state.digests = {index: list(digests) for index, digests in self.digests.items()}
+        state.tree_size = self.tree_size
+        state.tree_files = self.tree_files
+        return state
+
+    def remember(self, index, stage_index, digest):
+        """Mémorise l'empreinte d'un fichier pour une étape (0 : partielle, 1 : complète)"""
+        if self.digests is None:
+            self.digests = {}
+        known = self.digests.get(index)
+        if known is None:
+            known = self.digests[index] = [None, None]
+        known[stage_index] = digest
+
+    def copy_digests(self, index, digests):
+        """Reprend les empreintes connues d'un fichier inchangé"""
+        if self.digests is None:
+            self.digests = {}
+        self.digests[index] = list(digests)
+
+
+def unique_roots(paths):
+    """Racines absolues sans doublon ni recouvrement, dans l'ordre donné.
+
+    Un dossier contenu dans une autre racine (ou le même dossier atteint par
+    un autre chemin, lien symbolique compris) est retiré : ses fichiers
+    seraient sinon comptés deux fois et signalés comme doublons d'eux-mêmes.
+    """
+    roots = []
+    real_roots = []
+    for path in paths:
+        root = os.path.abspath(path)
+        real = os.path.normcase(os.path.realpath(root))
+        if any(real == other or real.startswith(os.path.join(other, '')) for other in real_roots):
+            continue
+        # Une racine qui contient des racines déjà retenues les remplace
+        kept = [(other_root, other) for other_root, other in zip(roots, real_roots)
+                if not other.startswith(os.path.join(real, ''))]
+        roots = [other_root for other_root, _ in kept] + [root]
+        real_roots = [other for _, other in kept] + [real]
+    return roots
+
+
+class TreeScanner:
+    """Parcourt une arborescence en réutilisant les informations de os.scandir.
+
+    Le type de chaque entrée vient de la lecture du dossier ; seul un stat est
+    fait par fichier (gratuit sous Windows, où scandir le fournit).
+
+    exclude : motifs glob ignorés, comparés au nom, ou au chemin complet
+              s'ils contiennent un séparateur
+    max_depth : profondeur maximale sous la racine (0 = racine seule)
+    same_filesystem : ne pas traverser les points de montage
+    """
+
+    def __init__(self, exclude=(), max_depth=None, same_filesystem=False):
+        self.exclude = tuple(exclude)
+        self.max_depth = max_depth
+        self.same_filesystem = same_filesystem
+        self.errors = 0
+        # Mesures (dossiers, stat, fichiers ignorés, erreurs) ; FileAnalyzer en fournit une par analyse
+        self.metrics = Metrics()
+
+        name_patterns = [p for p in self.exclude if '/' not in p and os.sep not in p]
+        path_patterns = [p for p in self.exclude if p not in name_patterns]
+        self._exclude_name = self._compile(name_patterns)
+        self._exclude_path = self._compile(path_patterns)
+
+    @property
+    def options(self):
+        """Options du parcours, pour savoir si deux parcours sont comparables"""
+        return self.exclude, self.max_depth, self.same_filesystem
+
+    def walk(self, root, known_dirs=None, depth=0, root_dev=None, order=0):
+        """Itère sur (chemin du dossier, DirState, réutilisé) en profondeur d'abord.
+
+        Si known_dirs contient un dossier dont la date de modification n'a pas
+        changé, son état est repris tel quel sans relire le dossier. Pour
+        parcourir un sous-dossier d'une arborescence déjà analysée, depth est
+        sa profondeur sous la racine et root_dev le périphérique de la racine.
+        Les dossiers sont numérotés (DirState.order) à partir de order.
+        """
+        try:
+            root_stat = os.stat(root)
+        except OSError as e:
+            self._error(e, root)
+            return
+        if root_dev is None:
+            root_dev = root_stat.st_dev
+
+        stack = [(root, root_stat.st_mtime_ns, depth, root_stat.st_dev)]
+        while stack:
+            dir_path, mtime_ns, depth, dev = stack.pop()
+
+            state = known_dirs.get(dir_path) if known_dirs else None
+            reused = state is not None and state.mtime_ns == mtime_ns
+            if not reused:
+                state = self.scan_dir(dir_path, mtime_ns, dev)
+            state.order = order
+            order += 1
+            self.metrics.count(dirs=1, files=len(state), reused_dirs=int(reused))
+            yield dir_path, state, reused
+
+            if self.max_depth is not None and depth >= self.max_depth:
+                if state.subdirs:
+                    self.metrics.skip('max_depth', len(state.subdirs))
+                continue
+
+            children = []
+            for name in state.subdirs:
+                child = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(child, follow_symlinks=False)
+                except OSError as e:
+                    self._error(e, child)
+                    continue
+                if self.same_filesystem and stat.st_dev != root_dev:
+                    self.metrics.skip('other_filesystem')
+                    continue
+                children.append((child, stat.st_mtime_ns, depth + 1, stat.st_dev))
+            self.metrics.count(stat_calls=len(state.subdirs))
+            stack.extend(reversed(children))
+
+    def walk_roots(self, roots, known_dirs=None):
+        """Parcourt plusieurs racines ; celles de périphériques différents sont lues en parallèle.
+
+        Itère sur (chemin du dossier, DirState, réutilisé) dans l'ordre
+        d'arrivée : un thread par périphérique lit ses racines l'une après
+        l'autre, si bien qu'un disque lent ne retient pas les autres. Les rangs
+        (DirState.order) suivent l'ordre des racines puis celui du parcours,
+        quel que soit l'ordre d'arrivée. Les racines ne doivent pas se
+        recouvrir (voir unique_roots).
+        """
+        devices = {}
+        for position, root in enumerate(roots):
+            try:
+                dev = os.stat(root).st_dev
+            except OSError as e:
+                self._error(e, root)
+                continue
+            devices.setdefault(dev, []).append((position, root))
+
+        if len(devices) <= 1:
+            for group in devices.values():
+                for position, root in group:
+                    yield from self.walk(root, known_dirs, order=position * ROOT_ORDER_STRIDE)
+            return
+
+        results = queue.Queue(maxsize=WALK_QUEUE_SIZE)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def run(group):
+            try:
+                for position, root in group:
+                    for item in self.walk(root, known_dirs, order=position * ROOT_ORDER_STRIDE):
+                        if not put(item):
+                            return
+            finally:
+                put(done)
+
+        # Threads démons : un partage réseau bloqué ne doit pas empêcher l'arrêt
+        for group in devices.values():
+            threading.Thread(target=run, args=(group,), daemon=True, name="begreen-walk").start()
+        try:
+            remaining = len(devices)
+            while remaining:
+                item = results.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+    def scan_dir(self, dir_path, mtime_ns, dev=None):
+        """Lit un dossier : sous-dossiers et fichiers avec leur stat"""
+        state = DirState(dir_path, mtime_ns, dev)
+        # Comptés localement puis ajoutés aux mesures une fois par dossier
+        excluded = symlinks = special = stat_calls = 0
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if self._is_excluded(entry):
+                        excluded += 1
+                        continue
+                    try:
+                        # Les liens symboliques ne sont ni parcourus ni comptés : ils n'occupent
+                        # pas de place et leur cible est ailleurs dans l'arborescence ou hors d'elle
+                        if entry.is_dir(follow_symlinks=False):
+                            state.subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat_calls += 1
+                            stat = entry.stat(follow_symlinks=False)
+                            # Sans inode (certains systèmes de fichiers), impossible de reconnaître un lien
+                            dev = stat.st_dev if stat.st_ino and stat.st_nlink > 1 else None
+                            state.add_file(entry.name, stat.st_size, stat.st_mtime_ns, stat.st_ino,
+                                           disk_usage(stat), dev)
+                        elif entry.is_symlink():
+                            symlinks += 1
+                        else:
+                            special += 1  # Socket, tube nommé, périphérique
+                    except OSError as e:
+                        self._error(e, entry.path)
+        except OSError as e:
+            self._error(e, dir_path)
+
+        metrics = self.metrics
+        metrics.count(stat_calls=stat_calls)
+        for reason, count in (('excluded', excluded), ('symlink', symlinks), ('special', special)):
+            if count:
+                metrics.skip(reason, count)
+        return state
+
+    def _error(self, error, path):
+        self.errors += 1
+        self.metrics.error(error, path)
+
+    def _is_excluded(self, entry):
+        if self._exclude_name is not None and self._exclude_name.match(entry.name):
+            return True
+        return self._exclude_path is not None and self._exclude_path.match(entry.path) is not None
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return None
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        return re.compile('|'.join(fnmatch.translate(p.replace('/', os.sep)) for p in patterns), flags)
@@ -0,0 +1,249 @@
+"""
+Détection des images similaires pour BeGreen!
+Empreinte perceptuelle (dHash) et regroupement par distance de Hamming (index multiple)
+"""
+
+import os
+import functools
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import Metrics
+
+IMAGE_EXTENSIONS = frozenset(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp'))
+HASH_SIZE = 8  # Empreinte de 8 x 8 = 64 bits
+HASH_BYTES = HASH_SIZE * HASH_SIZE // 8
+DEFAULT_THRESHOLD = 6  # Nombre maximal de bits différents entre deux images similaires
+MIN_IMAGE_SIZE = 16 * 1024  # Les icônes et miniatures ne sont pas comparées
+# Nom sous lequel les empreintes perceptuelles sont conservées dans le cache (HashCache)
+CACHE_ALGORITHM = 'dhash'
+DEFAULT_WORKERS = 4
+
+
+def available():
+    """Vrai si Pillow est installé ; sans Pillow, l'étape des images similaires est ignorée"""
+    return importlib.util.find_spec('PIL') is not None
+
+
+def hamming_distance(a, b):
+    """Nombre de bits différents entre deux empreintes"""
+    return bin(a ^ b).count('1')
+
+
+if hasattr(int, 'bit_count'):  # Python 3.10+, bien plus rapide
+    def hamming_distance(a, b):  # noqa: F811
+        """Nombre de bits différents entre deux empreintes"""
+        return (a ^ b).bit_count()
+
+
+def dhash(path, hash_size=HASH_SIZE, metrics=None):
+    """Empreinte perceptuelle d'une image : (entier de hash_size² bits, nombre de pixels).
+
+    Chaque bit compare deux pixels voisins d'une réduction en niveaux de gris :
+    l'empreinte résiste au redimensionnement et à la recompression. Seuls les
+    JPEG (et quelques formats comme PCD) sont décodés directement à échelle
+    réduite (draft) ; les autres formats sont décodés en entier puis réduits.
+    Retourne None si le fichier n'est pas une image lisible (compté dans metrics).
+    """
+    # Importé à la première image : l'analyse en ligne de commande ne charge pas Pillow sinon
+    from PIL import Image
+    try:
+        with Image.open(path) as image:
+            pixels = image.width * image.height
+            image.draft('L', ((hash_size + 1) * 4, hash_size * 4))
+            small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR, reducing_gap=2.0)
+    except Exception as e:
+        # Un fichier corrompu ou tronqué peut lever presque n'importe quelle exception selon le
+        # module de Pillow (SyntaxError, struct.error, IndexError...) : seule cette image est ignorée
+        if metrics is not None:
+            metrics.skip('unreadable_image')
+            metrics.error(e, path)
+        return None
+
+    values = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            bits = (bits << 1) | (values[offset + column] > values[offset + column + 1])
+    return bits, pixels
+
+
+class HammingIndex:
+    """Index multiple pour retrouver les empreintes proches en distance de Hamming.
+
+    L'empreinte est découpée en blocs de bits, chacun indexé dans un
+    dictionnaire. Deux empreintes à au plus radius bits l'une de l'autre ont
+    forcément un bloc à au plus radius // blocs bits d'écart (principe des
+    tiroirs) : seules les variantes de chaque bloc sont cherchées, puis les
+    candidats trouvés sont vérifiés. Pas de comparaison de toutes les paires.
+    """
+    __slots__ = ('radius', '_blocks', '_tables', '_variants', '_size')
+
+    def __init__(self, radius, bits=HASH_SIZE * HASH_SIZE, blocks=4):
+        self.radius = radius
+        self._size = 0
+        # (décalage, masque) de chaque bloc
+        width = bits // blocks
+        self._blocks = []
+        self._variants = []
+        for position in range(blocks):
+            block_width = width if position < blocks - 1 else bits - position * width
+            self._blocks.append((position * width, (1 << block_width) - 1))
+            # Écarts à essayer sur ce bloc : tous les masques d'au plus radius // blocs bits
+            self._variants.append(self._masks(block_width, radius // blocks))
+        self._tables = [{} for _ in self._blocks]  # Par bloc : valeur du bloc -> [(empreinte, élément)]
+
+    @staticmethod
+    def _masks(width, flips):
+        masks = [0]
+        for _ in range(flips):
+            masks = sorted(set(masks) | {mask | (1 << bit) for mask in masks for bit in range(width)})
+        return masks
+
+    def add(self, value, item):
+        self._size += 1
+        entry = (value, item)
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            table.setdefault((value >> shift) & mask, []).append(entry)
+
+    def search(self, value):
+        """Éléments dont l'empreinte est à au plus radius bits de value"""
+        radius = self.radius
+        found = set()
+        for (shift, mask), table, variants in zip(self._blocks, self._tables, self._variants):
+            block = (value >> shift) & mask
+            for variant in variants:
+                entries = table.get(block ^ variant)
+                if entries:
+                    found.update(item for other, item in entries if hamming_distance(value, other) <= radius)
+        return list(found)
+
+    def __len__(self):
+        return self._size
+
+
+class SimilarImageGroup:
+    """Images visuellement proches ; la première (plus grande résolution) est conservée"""
+    __slots__ = ('paths', 'sizes')
+
+    def __init__(self, paths, sizes):
+        self.paths = paths
+        self.sizes = sizes
+
+    @property
+    def wasted_bytes(self):
+        """Octets occupés par les images autres que celle conservée"""
+        return sum(self.sizes[1:])
+
+
+class SimilarImageFinder:
+    """Regroupe les images similaires parmi les fichiers ajoutés avec add().
+
+    Les empreintes sont calculées en parallèle et conservées dans le cache
+    persistant : une nouvelle analyse ne décode que les images nouvelles ou
+    modifiées.
+    """
+
+    def __init__(self, workers=None, cache=None, threshold=DEFAULT_THRESHOLD):
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.cache = cache
+        self.threshold = threshold
+        self.images_hashed = 0
+        self.cancelled = False
+        self.metrics = Metrics()
+        self._files = []  # [(state, index)]
+
+    @staticmethod
+    def is_candidate(name, size):
+        """Vrai si un fichier est une image assez grande pour être comparée"""
+        return size >= MIN_IMAGE_SIZE and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+    def add(self, state, index):
+        self._files.append((state, index))
+
+    def find(self, cancel_event=None):
+        """Retourne les groupes d'images similaires, les plus coûteux en place d'abord"""
+        if not available():
+            print("Erreur lors de la recherche d'images similaires: Pillow n'est pas installé")
+            return []
+
+        hashes = [None] * len(self._files)
+        missing = []
+        for position, (state, index) in enumerate(self._files):
+            digest = self._lookup(state, index)
+            if digest is not None:
+                hashes[position] = (int.from_bytes(digest[:HASH_BYTES], 'big'),
+                                   int.from_bytes(digest[HASH_BYTES:], 'big'))
+            else:
+                missing.append(position)
+
+        # Pillow libère le GIL pendant le décodage : les threads travaillent en parallèle
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="begreen-image") as executor:
+            paths = (self._files[position][0].file_path(self._files[position][1]) for position in missing)
+            for position, result in zip(missing, executor.map(functools.partial(dhash, metrics=self.metrics), paths)):
+                if cancel_event is not None and cancel_event.is_set():
+                    self.cancelled = True
+                    executor.shutdown(cancel_futures=True)
+                    return []
+                hashes[position] = result
+                self.images_hashed += 1
+                if result is not None:
+                    self._store(*self._files[position], result)
+        if self.cache is not None:
+            self.cache.flush()
+
+        return self._group(hashes)
+
+    def _group(self, hashes):
+        """Réunit les images à moins de threshold bits les unes des autres (union-find)"""
+        index = HammingIndex(self.threshold)
+        parents = list(range(len(hashes)))
+
+        def root(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        for position, result in enumerate(hashes):
+            if result is None:
+                continue
+            for other in index.search(result[0]):
+                parents[root(other)] = root(position)
+            index.add(result[0], position)
+
+        members = {}
+        for position, result in enumerate(hashes):
+            if result is not None:
+                members.setdefault(root(position), []).append(position)
+
+        groups = []
+        for positions in members.values():
+            if len(positions) < 2:
+                continue
+            # La plus grande résolution, puis le plus gros fichier, est conservée
+            positions.sort(key=lambda position: (hashes[position][1], self._size(position)), reverse=True)
+            groups.append(SimilarImageGroup([self._path(position) for position in positions],
+                                            [self._size(position) for position in positions]))
+        groups.sort(key=lambda group: group.wasted_bytes, reverse=True)
+        return groups
+
+    def _path(self, position):
+        state, index = self._files[position]
+        return state.file_path(index)
+
+    def _size(self, position):
+        state, index = self._files[position]
+        return state.sizes[index]
+
+    def _lookup(self, state, index):
+        if self.cache is None:
+            return None
+        return self.cache.lookup(state.file_path(index), *state.stat_key(index), 'content', CACHE_ALGORITHM)
+
+    def _store(self, state, index, result):
+        if self.cache is not None:
+            # Empreinte puis nombre de pixels, qui départage les images d'un groupe
+            digest = result[0].to_bytes(HASH_BYTES, 'big') + result[1].to_bytes(8, 'big')
+            self.cache.store(state.file_path(index), *state.stat_key(index), 'content', digest, CACHE_ALGORITHM)
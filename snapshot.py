@@ -0,0 +1,261 @@
+"""
+Instantané d'une analyse pour BeGreen!
+Permet de ré-analyser un dossier en ne relisant que ce qui a changé
+"""
+
+import os
+from hashing import DEFAULT_ALGORITHM
+
+STAGE_INDEX = {'edges': 0, 'content': 1}
+
+
+class Snapshot:
+    """Arborescence et empreintes connues des dossiers analysés.
+
+    roots est un dossier ou une liste de racines qui ne se recouvrent pas
+    (voir scanner.unique_roots). Les empreintes sont rangées dans chaque
+    DirState. L'instantané sert de mémoire des empreintes pour
+    DuplicateFinder, avec repli sur le cache persistant éventuel (HashCache).
+    """
+
+    def __init__(self, roots, options=None, cache=None, algorithm=DEFAULT_ALGORITHM):
+        self.roots = (roots,) if isinstance(roots, str) else tuple(roots)
+        self.options = options
+        self.cache = cache
+        self.algorithm = algorithm  # Les empreintes ne sont comparables qu'avec le même algorithme
+        self.dirs = {}
+
+    def add_dir(self, state):
+        """Enregistre l'état d'un dossier"""
+        self.dirs[state.path] = state
+
+    def copy(self):
+        """Copie indépendante (voir DirState.copy), à mettre à jour sans toucher à l'original"""
+        snapshot = Snapshot(self.roots, self.options, self.cache, self.algorithm)
+        snapshot.dirs = {path: state.copy() for path, state in self.dirs.items()}
+        return snapshot
+
+    def sort_dirs(self):
+        """Range les dossiers selon leur rang (racines lues en parallèle, voir TreeScanner.walk_roots)"""
+        self.dirs = dict(sorted(self.dirs.items(), key=lambda item: item[1].order))
+
+    def root_of(self, path):
+        """Racine qui contient path, ou None"""
+        for root in self.roots:
+            if path == root or path.startswith(os.path.join(root, '')):
+                return root
+        return None
+
+    def files(self):
+        """Itère sur (DirState, indice) dans l'ordre du parcours"""
+        for state in self.dirs.values():
+            for index in range(len(state)):
+                yield state, index
+
+    def rescan(self, scanner, on_dir=None, cancel_event=None):
+        """Parcourt à nouveau le dossier et retourne (nouvel instantané, changements).
+
+        Un dossier dont la date de modification n'a pas changé n'est pas relu :
+        ses fichiers sont repris de l'instantané sans appel à stat. Seuls les
+        sous-dossiers sont vérifiés, un stat par dossier. Une modification
+        faite sur place, sans créer ni renommer de fichier, n'est donc vue que
+        par une analyse complète.
+
+        on_dir(dossier) est appelé pour chaque dossier parcouru. Si cancel_event
+        est déclenché, le parcours s'arrête et None est retourné.
+        """
+        snapshot = Snapshot(self.roots, self.options, self.cache, self.algorithm)
+        changes = {'added': {}, 'removed': {}, 'changed': {}}
+        reused_dirs = []
+        new_links = set()
+
+        for dir_path, state, reused in scanner.walk_roots(self.roots, self.dirs):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if on_dir is not None:
+                on_dir(dir_path)
+            snapshot.add_dir(state)
+            if reused:
+                reused_dirs.append(state)
+            else:
+                self._diff_dir(dir_path, self.dirs.get(dir_path), state, changes)
+                if state.shared:
+                    new_links.update(state.inodes[index] for index in state.shared)
+
+        if new_links:
+            self._find_new_links(reused_dirs, new_links)
+        snapshot.sort_dirs()
+
+        # Dossiers disparus : tous leurs fichiers sont supprimés
+        for dir_path, old in self.dirs.items():
+            if dir_path not in snapshot.dirs:
+                self._diff_dir(dir_path, old, None, changes)
+
+        return snapshot, changes
+
+    def refresh(self, scanner, dir_paths):
+        """Relit seulement les dossiers donnés et met l'instantané à jour sur place ; retourne les changements.
+
+        Utilisé par la surveillance (voir watcher.py), qui sait quels dossiers
+        ont changé : les autres ne sont ni relus ni vérifiés. Contrairement à
+        rescan, un dossier signalé est relu même si sa date n'a pas changé, ce
+        qui détecte les modifications faites sur place. Les sous-dossiers
+        apparus sont parcourus, ceux qui ont disparu sont retirés. Un fichier
+        déplacé (même taille, date et inode) garde ses empreintes.
+        """
+        changes = {'added': {}, 'removed': {}, 'changed': {}}
+        old_states = []
+        refreshed = set()
+        new_links = set()
+        root_devs = {}
+
+        # Les parents passent avant leurs sous-dossiers : un dossier disparu est retiré avec eux
+        for dir_path in sorted(dir_paths):
+            old = self.dirs.get(dir_path)
+            if old is None:
+                continue
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                self._remove_tree(dir_path, changes, old_states)
+                continue
+
+            state = scanner.scan_dir(dir_path, mtime_ns, old.dev)
+            self._diff_dir(dir_path, old, state, changes)
+            self.dirs[dir_path] = state
+            old_states.append(old)
+            refreshed.add(dir_path)
+            if state.shared:
+                new_links.update(state.inodes[index] for index in state.shared)
+
+            subdirs = set(state.subdirs)
+            for name in old.subdirs:
+                if name not in subdirs:
+                    self._remove_tree(os.path.join(dir_path, name), changes, old_states)
+
+            known = set(old.subdirs)
+            root = self.root_of(dir_path)
+            depth = 0 if dir_path == root else dir_path[len(root):].count(os.sep)
+            if scanner.max_depth is not None and depth >= scanner.max_depth:
+                continue
+            for name in state.subdirs:
+                child = os.path.join(dir_path, name)
+                if name in known or child in self.dirs:
+                    continue
+                root_dev = None
+                if scanner.same_filesystem:
+                    try:
+                        if root not in root_devs:
+                            root_devs[root] = os.stat(root).st_dev
+                        root_dev = root_devs[root]
+                        if os.stat(child, follow_symlinks=False).st_dev != root_dev:
+                            continue
+                    except OSError:
+                        continue
+                for path, new, _ in scanner.walk(child, depth=depth + 1, root_dev=root_dev):
+                    self.dirs[path] = new
+                    refreshed.add(path)
+                    self._diff_dir(path, None, new, changes)
+
+        self._keep_moved_digests(old_states, refreshed, changes)
+        if new_links:
+            self._find_new_links([state for path, state in self.dirs.items() if path not in refreshed],
+                                 new_links)
+
+        # Rang de chaque dossier : les nouveaux dossiers sont à la fin, après leur parent
+        for order, state in enumerate(self.dirs.values()):
+            state.order = order
+        return changes
+
+    def _remove_tree(self, dir_path, changes, old_states):
+        """Retire un dossier disparu et tous ses sous-dossiers"""
+        prefix = os.path.join(dir_path, '')
+        for path in [path for path in self.dirs if path == dir_path or path.startswith(prefix)]:
+            old = self.dirs.pop(path)
+            self._diff_dir(path, old, None, changes)
+            old_states.append(old)
+
+    def _keep_moved_digests(self, old_states, refreshed, changes):
+        """Reporte les empreintes des fichiers déplacés ou renommés : même taille, date et inode"""
+        if not changes['added'] or not changes['removed']:
+            return
+        moved = {}
+        for old in old_states:
+            if old.digests:
+                for index, digests in old.digests.items():
+                    moved[old.stat_key(index)] = digests
+        if not moved:
+            return
+        for dir_path in refreshed:
+            state = self.dirs.get(dir_path)
+            if state is None:
+                continue
+            for index in range(len(state)):
+                digests = moved.get(state.stat_key(index))
+                if digests is not None and not (state.digests and index in state.digests):
+                    state.copy_digests(index, digests)
+
+    @staticmethod
+    def _find_new_links(states, inodes):
+        """Repère les fichiers non relus qui ont reçu un lien physique dans un dossier modifié.
+
+        C'est le cas après une déduplication par liens : le fichier conservé est
+        dans un dossier inchangé, mais il a désormais plusieurs chemins.
+        """
+        for state in states:
+            for index, inode in enumerate(state.inodes):
+                if inode not in inodes or (state.shared and index in state.shared):
+                    continue
+                try:
+                    stat = os.stat(state.file_path(index), follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.st_ino == inode and stat.st_nlink > 1:
+                    state.mark_shared(index, stat.st_dev)
+
+    def _diff_dir(self, dir_path, old, new, changes):
+        """Compare le contenu d'un dossier entre deux analyses.
+
+        Les empreintes des fichiers inchangés sont reprises dans le nouvel état.
+        """
+        old_index = {name: index for index, name in enumerate(old.names)} if old is not None else {}
+        new_names = set(new.names) if new is not None else ()
+
+        if new is not None:
+            for index, name in enumerate(new.names):
+                previous = old_index.get(name)
+                if previous is None:
+                    changes['added'][os.path.join(dir_path, name)] = new.sizes[index]
+                elif old.stat_key(previous) != new.stat_key(index):
+                    changes['changed'][os.path.join(dir_path, name)] = (old.sizes[previous], new.sizes[index])
+                elif old.digests and previous in old.digests:
+                    new.copy_digests(index, old.digests[previous])
+
+        for name, index in old_index.items():
+            if name not in new_names:
+                changes['removed'][os.path.join(dir_path, name)] = old.sizes[index]
+
+    def lookup(self, state, index, stage):
+        """Retourne l'empreinte connue d'un fichier, sinon None"""
+        if state.digests is not None:
+            known = state.digests.get(index)
+            if known is not None and known[STAGE_INDEX[stage]] is not None:
+                return known[STAGE_INDEX[stage]]
+
+        digest = None
+        if self.cache is not None:
+            digest = self.cache.lookup(state.file_path(index), *state.stat_key(index), stage, self.algorithm)
+            if digest is not None:
+                state.remember(index, STAGE_INDEX[stage], digest)
+        return digest
+
+    def store(self, state, index, stage, digest):
+        """Enregistre une empreinte calculée"""
+        state.remember(index, STAGE_INDEX[stage], digest)
+        if self.cache is not None:
+            self.cache.store(state.file_path(index), *state.stat_key(index), stage, digest, self.algorithm)
+
+    def flush(self):
+        """Écrit les empreintes en attente dans le cache persistant"""
+        if self.cache is not None:
+            self.cache.flush()
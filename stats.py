@@ -0,0 +1,39 @@
+"""
+Statistiques de l'analyse pour BeGreen!
+Classements bornés (top N) calculés pendant le parcours
+"""
+
+import heapq
+
+
+class TopN:
+    """Conserve les n éléments de plus grande clé, sans garder les autres.
+
+    Un tas de taille n : chaque ajout coûte au plus O(log n), et la plupart
+    des éléments sont écartés par une simple comparaison avec le plus petit.
+    """
+    __slots__ = ('n', '_heap', '_count')
+
+    def __init__(self, n):
+        self.n = n
+        self._heap = []
+        self._count = 0  # Départage les clés égales dans l'ordre d'arrivée
+
+    def push(self, key, item):
+        heap = self._heap
+        if self.n <= 0:
+            return
+        if len(heap) < self.n:
+            heapq.heappush(heap, (key, -self._count, item))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, -self._count, item))
+        else:
+            return
+        self._count += 1
+
+    def items(self):
+        """Éléments retenus, de la plus grande clé à la plus petite"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,75 @@
+"""
+Tests du remplacement des doublons par des liens physiques (dedup.py)
+"""
+
+import os
+import threading
+import pytest
+import dedup
+from dedup import link_duplicate, link_duplicates
+from duplicates import DuplicateGroup
+
+
+def write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_hardlink_replaces_duplicate(tmp_path):
+    keep = write(tmp_path / "keep", b"a" * 1000)
+    duplicate = write(tmp_path / "copy", b"a" * 1000)
+
+    link_duplicate(keep, duplicate)
+    assert os.stat(keep).st_ino == os.stat(duplicate).st_ino
+    # Déjà liés : rien à faire
+    assert link_duplicate(keep, duplicate) == 0
+
+
+def test_changed_content_is_not_linked(tmp_path):
+    keep = write(tmp_path / "keep", b"a" * 1000)
+    duplicate = write(tmp_path / "copy", b"a" * 999 + b"b")
+
+    with pytest.raises(ValueError):
+        link_duplicate(keep, duplicate)
+    assert os.stat(keep).st_ino != os.stat(duplicate).st_ino
+    assert open(duplicate, 'rb').read().endswith(b"b")
+
+
+def test_failed_replace_rolls_back(tmp_path, monkeypatch):
+    keep = write(tmp_path / "keep", b"a" * 1000)
+    duplicate = write(tmp_path / "copy", b"a" * 1000)
+    inode = os.stat(duplicate).st_ino
+
+    def failing_replace(source, target):
+        raise OSError("remplacement impossible")
+
+    monkeypatch.setattr(dedup.os, 'replace', failing_replace)
+    with pytest.raises(OSError):
+        link_duplicate(keep, duplicate)
+
+    # Le doublon est intact et le fichier temporaire a disparu
+    assert os.stat(duplicate).st_ino == inode
+    assert os.stat(keep).st_nlink == 1
+    assert sorted(os.listdir(tmp_path)) == ["copy", "keep"]
+
+
+def test_link_duplicates_progress(tmp_path):
+    keep = write(tmp_path / "keep", b"a" * 1000)
+    copies = [write(tmp_path / f"copy{number}", b"a" * 1000) for number in range(3)]
+    group = DuplicateGroup(1000, [keep] + copies)
+    events = []
+
+    result = link_duplicates([group], progress_callback=events.append)
+    assert result['linked'] == copies and not result['failed'] and not result['cancelled']
+    assert events[-1]['stage'] == 'done' and events[-1]['files'] == 3
+
+
+def test_link_duplicates_cancel(tmp_path):
+    keep = write(tmp_path / "keep", b"a" * 1000)
+    duplicate = write(tmp_path / "copy", b"a" * 1000)
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    result = link_duplicates([DuplicateGroup(1000, [keep, duplicate])], cancel_event=cancel_event)
+    assert result['cancelled'] and not result['linked']
+    assert os.stat(keep).st_ino != os.stat(duplicate).st_ino
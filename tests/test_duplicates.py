@@ -0,0 +1,52 @@
+"""
+Tests de la recherche des doublons : le pool de hash en parallèle (HashPool, une file
+de lecture par disque) et le mode en flux trouvent les mêmes groupes que le calcul en série
+"""
+
+import os
+import random
+from file_analyzer import FileAnalyzer
+
+
+def build_tree(root, seed=7):
+    """Arborescence avec des copies, des tailles partagées sans doublon et des bords identiques"""
+    rng = random.Random(seed)
+    originals = []
+    for number in range(60):
+        directory = root / f"d{number % 6}" / f"s{number % 3}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"f{number}.bin"
+        if originals and number % 3 == 0:
+            path.write_bytes(rng.choice(originals).read_bytes())
+            continue
+        size = rng.choice((0, 100, 4096, 40000, 70000))
+        content = bytearray(rng.randbytes(size))
+        if size > 40000 and number % 2:
+            # Même début et même fin qu'un autre fichier de cette taille : seul le hash complet les sépare
+            content[:] = b"a" * size
+            content[size // 2] = number
+        path.write_bytes(bytes(content))
+        originals.append(path)
+
+
+def groups(analyzer_groups):
+    return sorted(sorted(group.paths) for group in analyzer_groups)
+
+
+def test_parallel_and_streaming_match_serial(tmp_path):
+    build_tree(tmp_path)
+    root = str(tmp_path)
+
+    serial = FileAnalyzer(workers=1)
+    assert serial.analyze_directory(root)
+    expected = groups(serial.duplicate_groups)
+    assert expected
+
+    parallel = FileAnalyzer(workers=8, max_inflight_bytes=64 * 1024)
+    assert parallel.analyze_directory(root)
+    assert groups(parallel.duplicate_groups) == expected
+    assert sorted(parallel.file_analysis['duplicates']) == sorted(serial.file_analysis['duplicates'])
+
+    for workers in (1, 8):
+        assert groups(FileAnalyzer(workers=workers).iter_duplicate_groups(root)) == expected
+    assert all(os.path.exists(path) for group in expected for path in group)
@@ -0,0 +1,163 @@
+"""
+Tests de la suppression des doublons (removal.py) : vérifications avant suppression,
+reprise d'un journal interrompu et restauration de la quarantaine
+"""
+
+import os
+import threading
+from removal import RemovalJob, read_journal
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return str(path)
+
+
+def stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def item(duplicate, keep):
+    """Élément tel que le prépare FileAnalyzer.remove_duplicates, états lus maintenant"""
+    return duplicate, keep, stat_key(duplicate), stat_key(keep)
+
+
+def pairs(tmp_path, count):
+    """count groupes de deux fichiers identiques : [(doublon, fichier conservé)]"""
+    return [(write(tmp_path / "copies" / f"f{number}", b"x" * (100 + number)),
+             write(tmp_path / "kept" / f"f{number}", b"x" * (100 + number))) for number in range(count)]
+
+
+def test_removes_unchanged_duplicate(tmp_path):
+    duplicate, keep = pairs(tmp_path, 1)[0]
+    result = RemovalJob(str(tmp_path / "journal.jsonl")).run([item(duplicate, keep)])
+    assert result['removed'] == [duplicate]
+    assert not os.path.exists(duplicate)
+    assert os.path.exists(keep)
+
+
+def test_kept_file_changed_since_analysis(tmp_path):
+    duplicate, keep = pairs(tmp_path, 1)[0]
+    planned = item(duplicate, keep)
+    # Même taille, autre contenu : seule la date et l'état enregistré le trahissent
+    with open(keep, 'r+b') as f:
+        f.write(b"y")
+    os.utime(keep, ns=(0, 1))
+
+    journal_path = str(tmp_path / "journal.jsonl")
+    result = RemovalJob(journal_path).run([planned])
+    assert result['failed'] == [duplicate]
+    assert os.path.exists(duplicate)
+    records = read_journal(journal_path)[2]
+    assert records[duplicate]['op'] == 'failed'
+
+
+def test_duplicate_changed_since_analysis(tmp_path):
+    duplicate, keep = pairs(tmp_path, 1)[0]
+    planned = item(duplicate, keep)
+    os.utime(duplicate, ns=(0, 1))
+
+    result = RemovalJob(None).run([planned])
+    assert result['failed'] == [duplicate]
+    assert os.path.exists(duplicate)
+
+
+def test_kept_file_vanished(tmp_path):
+    duplicate, keep = pairs(tmp_path, 1)[0]
+    planned = item(duplicate, keep)
+    os.remove(keep)
+
+    result = RemovalJob(str(tmp_path / "journal.jsonl")).run([planned])
+    assert result['failed'] == [duplicate]
+    assert os.path.exists(duplicate)
+
+
+def test_resume_after_partial_journal(tmp_path):
+    items = [item(duplicate, keep) for duplicate, keep in pairs(tmp_path, 5)]
+    journal_path = str(tmp_path / "journal.jsonl")
+    cancel_event = threading.Event()
+
+    # Arrêt après le premier lot : le journal contient le plan, un résultat et pas de fin
+    job = RemovalJob(journal_path, workers=1, batch_size=1)
+    first = job.run(items, progress_callback=lambda event: cancel_event.set(), cancel_event=cancel_event)
+    assert job.cancelled
+    assert first['removed'] == [items[0][0]]
+    _, planned, records, finished = read_journal(journal_path)
+    assert len(planned) == 5 and list(records) == [items[0][0]] and not finished
+
+    resumed = RemovalJob.from_journal(journal_path).resume()
+    assert sorted(resumed['removed']) == sorted(path for path, *_ in items[1:])
+    assert not any(os.path.exists(path) for path, *_ in items)
+    assert read_journal(journal_path)[3]
+    # Un journal terminé ne fait plus rien
+    assert RemovalJob.from_journal(journal_path).resume()['removed'] == []
+
+
+def test_resume_journal_without_states(tmp_path):
+    """Journaux écrits avant l'enregistrement des états : seule la taille est vérifiée"""
+    (duplicate, keep), (other, other_keep) = pairs(tmp_path, 2)
+    journal_path = str(tmp_path / "journal.jsonl")
+    job = RemovalJob(journal_path, workers=1, batch_size=1)
+    cancel_event = threading.Event()
+    job.run([(duplicate, keep), (other, other_keep)], progress_callback=lambda event: cancel_event.set(),
+            cancel_event=cancel_event)
+
+    assert RemovalJob.from_journal(journal_path).resume()['removed'] == [other]
+
+
+def test_restore_from_quarantine(tmp_path):
+    items = [item(duplicate, keep) for duplicate, keep in pairs(tmp_path, 3)]
+    contents = {path: open(path, 'rb').read() for path, *_ in items}
+    journal_path = str(tmp_path / "journal.jsonl")
+    quarantine_dir = str(tmp_path / "quarantine")
+
+    result = RemovalJob(journal_path, quarantine_dir).run(items)
+    assert len(result['removed']) == 3
+    assert not any(os.path.exists(path) for path in contents)
+
+    # Un emplacement de nouveau occupé n'est pas écrasé
+    occupied = items[0][0]
+    write(tmp_path / "copies" / os.path.basename(occupied), b"nouveau")
+
+    job = RemovalJob.from_journal(journal_path)
+    assert job.restore() == 2
+    for path, content in contents.items():
+        expected = b"nouveau" if path == occupied else content
+        assert open(path, 'rb').read() == expected
+    assert job.restore() == 0
+
+
+def test_reused_quarantine_keeps_earlier_files(tmp_path):
+    quarantine_dir = str(tmp_path / "quarantine")
+    duplicate = str(tmp_path / "copies" / "f")
+    keep = str(tmp_path / "kept" / "f")
+    jobs = []
+    for number, content in enumerate((b"premier", b"second")):
+        write(tmp_path / "copies" / "f", content)
+        write(tmp_path / "kept" / "f", content)
+        journal_path = str(tmp_path / f"journal{number}.jsonl")
+        assert RemovalJob(journal_path, quarantine_dir).run([item(duplicate, keep)])['removed'] == [duplicate]
+        jobs.append(RemovalJob.from_journal(journal_path))
+
+    # Chaque travail restaure sa propre version, pas celle de l'autre
+    assert jobs[0].restore() == 1
+    assert open(duplicate, 'rb').read() == b"premier"
+    os.remove(duplicate)
+    assert jobs[1].restore() == 1
+    assert open(duplicate, 'rb').read() == b"second"
+
+
+def test_analyzer_keeps_files_edited_after_analysis(tmp_path):
+    from file_analyzer import FileAnalyzer
+    for name in ("a", "b"):
+        write(tmp_path / "tree" / name, b"z" * 5000)
+    analyzer = FileAnalyzer()
+    assert analyzer.analyze_directory(str(tmp_path / "tree"))
+    group = analyzer.duplicate_groups[0]
+    with open(group.paths[0], 'r+b') as f:
+        f.write(b"y")
+
+    assert analyzer.remove_duplicates() == 0
+    assert all(os.path.exists(path) for path in group.paths)
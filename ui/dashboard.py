@@ -2,321 +2,711 @@
 Page tableau de bord de BeGreen!
 """
 
+import os
+import time
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox, filedialog
-import tkinter.font as tkfont
+from tkinter import messagebox, ttk
+from removal import RemovalJob, read_journal, unfinished_journals
+from ui.style import style
+
+# Intervalle de lecture des événements de progression (ms)
+PROGRESS_POLL_MS = 100
+# Intervalle de lecture des mises à jour de la surveillance (ms)
+WATCH_POLL_MS = 500
+# Nombre de « plus gros gains » affichés
+WINS_SHOWN = 8
+WIN_ICONS = {'duplicates': '🔄', 'similar_images': '🖼️', 'old_files': '🕰️', 'large_file': '📦',
+             'directory': '📂', 'extension': '🏷️'}
 
 
 class DashboardPage:
-    def __init__(self, parent, file_analyzer):
+    """Tableau de bord construit une seule fois.
+
+    Les trois vues (avant analyse, progression, résultats) sont créées au
+    démarrage ; refresh() change la vue affichée et met à jour les textes en
+    place, sans recréer de widgets.
+    """
+
+    def __init__(self, parent, file_analyzer, data_folder=None):
         self.parent = parent
         self.file_analyzer = file_analyzer
+        # Journaux et quarantaine des suppressions
+        self.data_folder = data_folder or os.path.join(os.getcwd(), "data")
+        self.journal_folder = os.path.join(self.data_folder, "removals")
+        self.last_journal = None
         self.analyzed = False  # Nouvel attribut pour suivre si une analyse a été effectuée
-        self.current_theme = "clair"  # Thème par défaut
 
-    def set_theme(self, theme):
-        """Définit le thème actuel"""
-        self.current_theme = theme
+        # Analyse ou suppression en arrière-plan
+        self.task = None  # 'analyse', 'suppression', 'liaison' ou 'restauration'
+        self.scan_thread = None
+        self.cancel_event = None
+        self.progress_queue = queue.Queue()
+        self.last_progress = None
+        self.duplicates_window = None
+        # Surveillance du dossier analysé (voir watcher.py), démarrée à la demande
+        self.watcher = None
+        self.watch_queue = queue.Queue()
+        self.watch_var = tk.BooleanVar(value=False)
+        self._watch_poll = None
+
+        self._build()
 
     def show(self):
         """Affiche la page tableau de bord"""
-        # Nettoyer les widgets existants
-        for widget in self.parent.winfo_children():
-            widget.destroy()
-
-        # Déterminer les couleurs en fonction du thème
-        if self.current_theme == "sombre":
-            bg_color = "#1C1C1C"
-            text_color = "#E0E0E0"
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        self.refresh()
+
+    def hide(self):
+        self.frame.pack_forget()
+
+    def refresh(self):
+        """Affiche la vue qui correspond à l'état actuel et met à jour ses valeurs"""
+        if self.scan_thread is not None:
+            view = self.progress_view
+            self.analysis_button.configure(state=tk.DISABLED)
+            self._update_progress_widgets()
         else:
-            bg_color = "#FFFFFF"
-            text_color = "#333333"
-
-        # Vérifier les polices disponibles et choisir la meilleure
-        available_fonts = tkfont.families()
-        modern_fonts = ['Segoe UI', 'Verdana', 'Tahoma', 'Calibri', 'Arial']
-
-        font_family = 'Arial'  # Police par défaut
-        for font in modern_fonts:
-            if font in available_fonts:
-                font_family = font
-                break
-
-        # Créer des polices personnalisées avec la police choisie
-        title_font = tkfont.Font(family=font_family, size=24, weight="bold")
-        subtitle_font = tkfont.Font(family=font_family, size=18, weight="bold")
-        button_font = tkfont.Font(family=font_family, size=16, weight="bold")
-        text_font = tkfont.Font(family=font_family, size=12)
-        small_text_font = tkfont.Font(family=font_family, size=10)
-
-        # Configurer le fond du parent
-        self.parent.configure(bg=bg_color)
-
-        # Titre
-        title_label = tk.Label(self.parent, text="📊 Tableau de bord",
-                               font=title_font, bg=bg_color, fg=text_color)
-        title_label.pack(pady=20)
-
-        # Frame principal avec couleur de fond explicite
-        main_content = tk.Frame(self.parent, bg=bg_color)
+            view = self.results_view if self.analyzed else self.empty_view
+            self.analysis_button.configure(state=tk.NORMAL)
+            if self.analyzed:
+                self._refresh_results()
+        if self._current_view is not view:
+            if self._current_view is not None:
+                self._current_view.pack_forget()
+            view.pack(**self._view_packing[view])
+            self._current_view = view
+
+    # Construction
+
+    def _label(self, parent, fg='fg', bg='bg', font='text', **options):
+        """Label coloré selon le thème"""
+        return style.register(tk.Label(parent, font=style.font(font), **options), bg=bg, fg=fg)
+
+    def _action_button(self, parent, text, command, color, font='button', **options):
+        """Bouton d'action à couleur fixe (indépendante du thème)"""
+        return tk.Button(parent, text=text, command=command, font=style.font(font),
+                         bg=color, fg='white', relief=tk.RAISED, borderwidth=2, **options)
+
+    def _build(self):
+        self.frame = style.register(tk.Frame(self.parent), bg='bg')
+        self._label(self.frame, text="📊 Tableau de bord", font='title', fg='title').pack(pady=20)
+
+        main_content = style.register(tk.Frame(self.frame), bg='bg')
         main_content.pack(fill=tk.BOTH, expand=True, padx=20)
 
-        # Bouton d'analyse - Taille réduite
-        analysis_button = tk.Button(main_content, text="🔍 ANALYSER LES FICHIERS",
-                                    command=self._analyze_files,
-                                    font=button_font,
-                                    bg='#4CAF50', fg='white', pady=10, padx=20,
-                                    relief=tk.RAISED, borderwidth=2)
-        analysis_button.pack(pady=15)
-
-        # Score (centré en haut)
-        if self.analyzed:
-            self._create_score_section(main_content, font_family)
-        else:
-            # Message indiquant qu'aucune analyse n'a été effectuée
-            tk.Label(main_content, text="🔄 Aucune analyse effectuée",
-                     font=subtitle_font, fg='#888888', bg=bg_color).pack(pady=40)
-
-        # Sections informations et conseils
-        if self.analyzed:
-            self._create_info_sections(main_content, font_family)
-        else:
-            # Message explicatif
-            instruction_frame = tk.Frame(main_content, bg=bg_color)
-            instruction_frame.pack(fill=tk.BOTH, expand=True, pady=20)
-
-            tk.Label(instruction_frame,
-                     text="⬆️ Cliquez sur le bouton 'ANALYSER LES FICHIERS' pour démarrer l'analyse",
-                     font=text_font, fg='#555555', bg=bg_color).pack(pady=15)
-
-            tk.Label(instruction_frame,
-                     text="✨ L'application analysera vos fichiers et affichera ici les résultats",
-                     font=text_font, fg='#555555', bg=bg_color).pack(pady=10)
-
-    def _create_score_section(self, parent, font_family):
-        """Crée la section score avec cercle coloré"""
-        # Déterminer les couleurs en fonction du thème
-        if self.current_theme == "sombre":
-            bg_color = "#1C1C1C"
-            text_color = "#E0E0E0"
-        else:
-            bg_color = "#FFFFFF"
-            text_color = "#333333"
-
-        # Créer un frame avec la même couleur que le parent
-        score_frame = tk.Frame(parent, bg=bg_color)
-        score_frame.pack(pady=(0, 20))  # Réduire l'espace en bas
-
-        score = self.file_analyzer.calculate_green_score()
-        color = self.file_analyzer.get_score_color(score)
-
-        # Canvas pour le cercle - avec la même couleur de fond
-        canvas = tk.Canvas(score_frame, width=250, height=250, highlightthickness=0, bg=bg_color)  # Taille réduite
-        canvas.pack()
-
-        # Cercle extérieur coloré
-        canvas.create_oval(25, 25, 225, 225, fill=color, outline=color, width=4)  # Ajusté
-
-        # Cercle intérieur
-        canvas.create_oval(45, 45, 205, 205, fill=bg_color, outline=bg_color)  # Ajusté
-
-        # Texte du score
-        score_font = tkfont.Font(family=font_family, size=42, weight="bold")  # Taille réduite
-        label_font = tkfont.Font(family=font_family, size=16)  # Taille réduite
-
-        canvas.create_text(125, 100, text=f"{score}%", font=score_font, fill=color)  # Position ajustée
-        canvas.create_text(125, 150, text="Score Green IT", font=label_font, fill=text_color)  # Position ajustée
-
-    def _create_info_sections(self, parent, font_family):
-        """Crée les sections informations et conseils"""
-        # Déterminer les couleurs en fonction du thème
-        if self.current_theme == "sombre":
-            bg_color = "#1C1C1C"
-        else:
-            bg_color = "#FFFFFF"
-
-        bottom_frame = tk.Frame(parent, bg=bg_color)
+        self.analysis_button = self._action_button(main_content, "🔍 ANALYSER LES FICHIERS", self._analyze_files,
+                                                   '#4CAF50', font='big_button', pady=10, padx=20)
+        self.analysis_button.pack(pady=15)
+
+        self.empty_view = self._build_empty_view(main_content)
+        self.progress_view = self._build_progress_view(main_content)
+        self.results_view = self._build_results_view(main_content)
+        self._view_packing = {self.empty_view: {'fill': tk.BOTH, 'expand': True},
+                              self.progress_view: {'fill': tk.X, 'pady': 20},
+                              self.results_view: {'fill': tk.BOTH, 'expand': True}}
+        self._current_view = None
+
+    def _build_empty_view(self, parent):
+        """Message affiché tant qu'aucune analyse n'a été effectuée"""
+        view = style.register(tk.Frame(parent), bg='bg')
+        self._label(view, text="🔄 Aucune analyse effectuée", font='subtitle', fg='muted').pack(pady=40)
+        self._label(view, text="⬆️ Cliquez sur le bouton 'ANALYSER LES FICHIERS' pour démarrer l'analyse",
+                    fg='hint').pack(pady=15)
+        self._label(view, text="✨ L'application analysera vos fichiers et affichera ici les résultats",
+                    fg='hint').pack(pady=10)
+        return view
+
+    def _build_progress_view(self, parent):
+        """Section de progression de l'analyse ou de la suppression en cours"""
+        view = style.register(tk.LabelFrame(parent, font=style.font('section'), padx=15, pady=15),
+                              bg='bg', fg='fg')
+
+        self.progress_bar = ttk.Progressbar(view, mode='indeterminate', length=400)
+        self.progress_bar.pack(fill=tk.X, pady=10)
+
+        self.progress_labels = {}
+        for key, color in (('files', 'fg'), ('bytes', 'fg'), ('dir', 'muted'), ('eta', 'fg')):
+            self.progress_labels[key] = self._label(view, fg=color)
+            self.progress_labels[key].pack(anchor='w', pady=2)
+
+        self.cancel_button = self._action_button(view, "⛔ Annuler", self._cancel_analysis, '#f44336',
+                                                 pady=6, padx=15)
+        self.cancel_button.pack(pady=10)
+        return view
+
+    def _build_results_view(self, parent):
+        """Score, informations et conseils d'une analyse terminée"""
+        view = style.register(tk.Frame(parent), bg='bg')
+        self._build_score_section(view)
+
+        bottom_frame = style.register(tk.Frame(view), bg='bg')
         bottom_frame.pack(fill=tk.BOTH, expand=True, pady=20)
-
-        # Section Informations (gauche)
-        self._create_info_section(bottom_frame, font_family)
-
-        # Section Conseils (droite)
-        self._create_advice_section(bottom_frame, font_family)
-
-    def _create_empty_advice_section(self, parent, font_family):
-        """Crée une section de conseils vide avant analyse"""
-        section_font = tkfont.Font(family=font_family, size=14, weight="bold")
-        text_font = tkfont.Font(family=font_family, size=12)
-
-        advice_frame = tk.LabelFrame(parent, text="💡 Conseils",
-                                     font=section_font, padx=15, pady=15)
-        advice_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(10, 0))
-
-        tk.Label(advice_frame,
-                 text="Cliquez sur 'Analyser les fichiers'\npour obtenir des conseils personnalisés",
-                 font=text_font, justify=tk.CENTER).pack(pady=30)
-
-    def _create_info_section(self, parent, font_family):
-        """Crée la section informations"""
-        section_font = tkfont.Font(family=font_family, size=14, weight="bold")
-        text_font = tkfont.Font(family=font_family, size=12)
-        small_font = tkfont.Font(family=font_family, size=11)
-
-        # Déterminer les couleurs selon le thème
-        bg_color = "#1C1C1C" if self.current_theme == "sombre" else "#FFFFFF"
-        fg_color = "#E0E0E0" if self.current_theme == "sombre" else "#000000"
-
-        info_frame = tk.LabelFrame(parent, text="📊 Informations",
-                                   font=section_font, padx=15, pady=15,
-                                   bg=bg_color, fg=fg_color)
+        self._build_info_section(bottom_frame)
+        self._build_advice_section(bottom_frame)
+        return view
+
+    def _build_score_section(self, parent):
+        """Cercle coloré du score ; ses éléments sont recolorés en place"""
+        self.score_canvas = style.register(tk.Canvas(parent, width=250, height=250, highlightthickness=0),
+                                           bg='bg')
+        self.score_canvas.pack(pady=(0, 20))
+        canvas = self.score_canvas
+        self.score_items = {
+            'outer': canvas.create_oval(25, 25, 225, 225, width=4),
+            'inner': canvas.create_oval(45, 45, 205, 205),
+            'score': canvas.create_text(125, 100, font=style.font('score')),
+            'label': canvas.create_text(125, 150, text="Score Green IT", font=style.font('score_label')),
+        }
+        style.on_change(self._recolor_score)
+
+        # Suivi en direct : le score suit les changements du dossier sans relancer l'analyse
+        watch_frame = style.register(tk.Frame(parent), bg='bg')
+        watch_frame.pack()
+        watch_button = tk.Checkbutton(watch_frame, text="👁️ Suivre les changements en direct",
+                                      variable=self.watch_var, command=self._toggle_watch, font=style.font('small'))
+        style.register(watch_button, bg='bg', fg='fg', selectcolor='button_active', activebackground='bg',
+                       activeforeground='fg')
+        watch_button.pack()
+        self.watch_status = self._label(watch_frame, font='small', fg='muted')
+        self.watch_status.pack()
+
+    def _build_info_section(self, parent):
+        """Section informations : une ligne par statistique, masquée quand elle ne s'applique pas"""
+        info_frame = style.register(tk.LabelFrame(parent, text="📊 Informations", font=style.font('section'),
+                                                  padx=15, pady=15, height=300), bg='bg', fg='fg')
         info_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
-        info_frame.configure(height=300)
         info_frame.pack_propagate(False)
 
-        # Créer un canvas et une scrollbar avec la bonne couleur de fond
-        canvas = tk.Canvas(info_frame, bg=bg_color, highlightthickness=0)
+        # Canvas défilant : le contenu peut dépasser la hauteur de la section
+        canvas = style.register(tk.Canvas(info_frame, highlightthickness=0), bg='bg')
         scrollbar = tk.Scrollbar(info_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg=bg_color)
+        content = style.register(tk.Frame(canvas), bg='bg')
 
         def _on_mousewheel(event):
             canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        content.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=content, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
-
-        if not self.analyzed:
-            tk.Label(scrollable_frame,
-                     text="Aucune donnée disponible.\nFaites une analyse pour voir les statistiques.",
-                     font=text_font, fg='#888888', bg=bg_color, justify=tk.CENTER).pack(pady=30)
-        else:
-            data = self.file_analyzer.get_analysis_data()
-
-            # Statistiques avec des emojis et couleurs de thème
-            tk.Label(scrollable_frame,
-                     text=f"📁 Fichiers analysés: {data['total_files']}",
-                     font=text_font, bg=bg_color, fg=fg_color).pack(anchor='w', pady=5)
-
-            size_gb = data['total_size'] / (1024 ** 3) if data['total_size'] > 0 else 0
-            tk.Label(scrollable_frame,
-                     text=f"💾 Taille totale: {size_gb:.2f} GB",
-                     font=text_font, bg=bg_color, fg=fg_color).pack(anchor='w', pady=5)
-
-            duplicates_text = f"🔄 Doublons détectés: {len(data['duplicates'])}"
-            duplicates_color = '#FF6B6B' if data['duplicates'] else '#4CAF50'  # Rouge ou vert adapté
-            tk.Label(scrollable_frame,
-                     text=duplicates_text,
-                     font=text_font, fg=duplicates_color, bg=bg_color).pack(anchor='w', pady=5)
-
-            # Points positifs
-            tk.Label(scrollable_frame,
-                     text="✅ Points positifs:",
-                     font=text_font, fg='#4CAF50', bg=bg_color).pack(anchor='w', pady=(15, 5))
-
-            if not data['duplicates']:
-                tk.Label(scrollable_frame,
-                         text="• Aucun doublon détecté 👍",
-                         font=small_font, fg='#4CAF50', bg=bg_color).pack(anchor='w', padx=20)
-
-            if data['total_files'] < 1000:
-                tk.Label(scrollable_frame,
-                         text="• Nombre de fichiers raisonnable 👌",
-                         font=small_font, fg='#4CAF50', bg=bg_color).pack(anchor='w', padx=20)
-
-            # Points à améliorer
-            tk.Label(scrollable_frame,
-                     text="❌ Points à améliorer:",
-                     font=text_font, fg='#FF6B6B', bg=bg_color).pack(anchor='w', pady=(15, 5))
-
-            if data['duplicates']:
-                tk.Label(scrollable_frame,
-                         text=f"• {len(data['duplicates'])} doublons à supprimer ⚠️",
-                         font=small_font, fg='#FF6B6B', bg=bg_color).pack(anchor='w', padx=20)
-
-            if size_gb > 10:
-                tk.Label(scrollable_frame,
-                         text="• Stockage important à optimiser 🗂️",
-                         font=small_font, fg='#FF6B6B', bg=bg_color).pack(anchor='w', padx=20)
-
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-    def _create_advice_section(self, parent, font_family):
-        """Crée la section conseils"""
-        section_font = tkfont.Font(family=font_family, size=14, weight="bold")
-        text_font = tkfont.Font(family=font_family, size=12)
-        button_font = tkfont.Font(family=font_family, size=12, weight="bold")
-
-        # Déterminer les couleurs selon le thème
-        bg_color = "#1C1C1C" if self.current_theme == "sombre" else "#FFFFFF"
-        fg_color = "#E0E0E0" if self.current_theme == "sombre" else "#000000"
-
-        advice_frame = tk.LabelFrame(parent, text="💡 Conseils",
-                                     font=section_font, padx=15, pady=15,
-                                     bg=bg_color, fg=fg_color)
+        # Chaque ligne garde sa place dans la grille : grid_remove() la masque sans la détruire
+        rows = self.info_rows = {}
+
+        def row(key, widget, **grid):
+            widget.grid(row=len(rows), column=0, sticky='w', **grid)
+            rows[key] = widget
+
+        row('files', self._label(content), pady=5)
+        row('size', self._label(content), pady=5)
+        row('hardlinks', self._label(content), pady=5)
+        # Couleur selon le résultat (rouge ou vert), fond selon le thème
+        row('duplicates', style.register(tk.Label(content, font=style.font('text')), bg='bg'), pady=5)
+        row('duplicates_button', self._action_button(content, "📋 Voir la liste des doublons", self._open_duplicates,
+                                                     '#607D8B', font='small', padx=10),
+            padx=20)
+        row('positives', self._positive_label(content, "✅ Points positifs:", font='text'), pady=(15, 5))
+        row('no_duplicates', self._positive_label(content, "• Aucun doublon détecté 👍"), padx=20)
+        row('few_files', self._positive_label(content, "• Nombre de fichiers raisonnable 👌"), padx=20)
+        row('negatives', self._negative_label(content, "❌ Points à améliorer:", font='text'), pady=(15, 5))
+        row('duplicates_todo', self._negative_label(content, ""), padx=20)
+        row('big_storage', self._negative_label(content, "• Stockage important à optimiser 🗂️"), padx=20)
+        # Plus gros gains : issus des classements de l'analyse, sans nouveau parcours
+        row('wins', self._label(content, text="🏆 Plus gros gains possibles:"), pady=(15, 5))
+        for index in range(WINS_SHOWN):
+            row(('win', index), self._label(content, font='small'), padx=20)
+
+    def _positive_label(self, parent, text, font='small'):
+        return style.register(tk.Label(parent, text=text, font=style.font(font), fg='#4CAF50'), bg='bg')
+
+    def _negative_label(self, parent, text, font='small'):
+        return style.register(tk.Label(parent, text=text, font=style.font(font), fg='#FF6B6B'), bg='bg')
+
+    def _build_advice_section(self, parent):
+        """Section conseils : message et boutons d'action, affichés selon les résultats"""
+        advice_frame = style.register(tk.LabelFrame(parent, text="💡 Conseils", font=style.font('section'),
+                                                    padx=15, pady=15, height=300), bg='bg', fg='fg')
         advice_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(10, 0))
-        advice_frame.configure(height=300)
         advice_frame.pack_propagate(False)
+        advice_frame.columnconfigure(0, weight=1)
+
+        self.advice_rows = rows = {}
+        rows['perfect'] = style.register(tk.Label(advice_frame, text="🎉 Parfait !\nAucun doublon détecté",
+                                                  font=style.font('text'), fg='green', justify=tk.CENTER), bg='bg')
+        rows['message'] = self._label(advice_frame, justify=tk.CENTER)
+        rows['remove'] = self._action_button(advice_frame, "🗑️ Supprimer les doublons", self._remove_duplicates,
+                                             '#f44336', pady=8, padx=15)
+        rows['link'] = self._action_button(advice_frame, "🔗 Remplacer par des liens", self._link_duplicates,
+                                           '#2196F3', pady=8, padx=15)
+        rows['explore'] = self._action_button(advice_frame, "🌳 Explorer l'espace disque", self._open_space_tree,
+                                              '#4CAF50', pady=8, padx=15)
+        rows['restore'] = self._action_button(advice_frame, "♻️ Restaurer la quarantaine",
+                                              self._restore_quarantine, '#FF9800', pady=8, padx=15)
+        spacing = {'perfect': 30, 'message': 15, 'remove': (15, 5)}
+        for position, (key, widget) in enumerate(rows.items()):
+            widget.grid(row=position, column=0, pady=spacing.get(key, 5))
+
+    # Mise à jour
+
+    @staticmethod
+    def _show_row(widget, visible):
+        if visible:
+            widget.grid()
+        else:
+            widget.grid_remove()
 
-        data = self.file_analyzer.get_analysis_data()
+    def _refresh_results(self):
+        """Met à jour le score, les informations et les conseils à partir de la dernière analyse"""
+        # La surveillance peut publier de nouveaux résultats depuis son thread : lecture sous le verrou
+        with self.file_analyzer.lock:
+            self._show_results()
 
-        if not data['duplicates']:
-            tk.Label(advice_frame,
-                     text="🎉 Parfait !\nAucun doublon détecté",
-                     font=text_font, fg='green', bg=bg_color,
-                     justify=tk.CENTER).pack(pady=30)
+    def _show_results(self):
+        data = self.file_analyzer.get_analysis_data()
+        duplicates = len(data['duplicates'])
+        self._recolor_score()
+
+        rows = self.info_rows
+        rows['files'].configure(text=f"📁 Fichiers analysés: {data['total_files']}")
+        size_gb = data['total_size'] / (1024 ** 3) if data['total_size'] > 0 else 0
+        disk_gb = data['disk_usage'] / (1024 ** 3) if data['disk_usage'] > 0 else 0
+        rows['size'].configure(text=f"💾 Taille totale: {size_gb:.2f} GB (sur le disque: {disk_gb:.2f} GB)")
+        rows['hardlinks'].configure(text=f"🔗 Liens physiques (comptés une fois): {data['hardlinks']}")
+        self._show_row(rows['hardlinks'], data['hardlinks'])
+        rows['duplicates'].configure(text=f"🔄 Doublons détectés: {duplicates}",
+                                     fg='#FF6B6B' if duplicates else '#4CAF50')  # Rouge ou vert adapté
+        self._show_row(rows['duplicates_button'], duplicates)
+        self._show_row(rows['no_duplicates'], not duplicates)
+        self._show_row(rows['few_files'], data['total_files'] < 1000)
+        rows['duplicates_todo'].configure(text=f"• {duplicates} doublons à supprimer ⚠️")
+        self._show_row(rows['duplicates_todo'], duplicates)
+        self._show_row(rows['big_storage'], size_gb > 10)
+
+        wins = self.file_analyzer.get_biggest_wins(limit=WINS_SHOWN)
+        self._show_row(rows['wins'], wins)
+        for index in range(WINS_SHOWN):
+            label = rows[('win', index)]
+            if index < len(wins):
+                kind, text, size = wins[index]
+                if len(text) > 60:
+                    text = "…" + text[-59:]
+                label.configure(text=f"{WIN_ICONS[kind]} {self._format_size(size)} — {text}")
+            self._show_row(label, index < len(wins))
+
+        rows = self.advice_rows
+        rows['message'].configure(text=f"⚠️ {duplicates} doublons détectés\n"
+                                       f"Libérez de l'espace en les supprimant")
+        self._show_row(rows['perfect'], not duplicates)
+        for key in ('message', 'remove', 'link'):
+            self._show_row(rows[key], duplicates)
+        self._show_row(rows['explore'], bool(self.file_analyzer.dir_tree))
+        self._show_row(rows['restore'], self._can_restore())
+
+    def _recolor_score(self):
+        """Redessine le score avec les couleurs du thème actuel"""
+        if not self.analyzed:
+            return
+        with self.file_analyzer.lock:
+            score = self.file_analyzer.calculate_green_score()
+        color = self.file_analyzer.get_score_color(score)
+        canvas, items, bg_color = self.score_canvas, self.score_items, style.color('bg')
+        canvas.itemconfigure(items['outer'], fill=color, outline=color)
+        canvas.itemconfigure(items['inner'], fill=bg_color, outline=bg_color)
+        canvas.itemconfigure(items['score'], text=f"{score}%", fill=color)
+        canvas.itemconfigure(items['label'], fill=style.color('title'))
+
+    @staticmethod
+    def _format_size(size):
+        """Taille lisible (octets, KB, MB, GB, TB)"""
+        for unit in ('octets', 'KB', 'MB', 'GB'):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == 'octets' else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+
+    def _reset_progress(self):
+        """Prépare la section de progression pour une nouvelle tâche"""
+        titles = {'suppression': "⏳ Suppression en cours", 'liaison': "⏳ Remplacement par des liens en cours",
+                  'restauration': "⏳ Restauration en cours"}
+        self.progress_view.configure(text=titles.get(self.task, "⏳ Analyse en cours"))
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress_bar.stop()
+        self.progress_bar.configure(mode='indeterminate', value=0)
+        self.progress_bar.start(15)
+
+    def _update_progress_widgets(self):
+        """Affiche le dernier événement de progression reçu"""
+        labels = self.progress_labels
+        event = self.last_progress or {}
+        files = event.get('files', 0)
+        hashed_mb = event.get('bytes_hashed', 0) / (1024 ** 2)
+        current_dir = event.get('current_dir') or ''
+        if len(current_dir) > 70:
+            current_dir = "…" + current_dir[-69:]
+
+        if self.task in ('suppression', 'liaison'):
+            freed_mb = event.get('bytes_freed', 0) / (1024 ** 2)
+            icon = "🗑️" if self.task == 'suppression' else "🔗"
+            labels['files'].configure(text=f"{icon} Fichiers traités: {files}")
+            labels['bytes'].configure(text=f"💾 Espace libéré: {freed_mb:.1f} MB")
+        elif self.task == 'restauration':
+            labels['files'].configure(text=f"♻️ Fichiers traités: {files}")
+            labels['bytes'].configure(text="")
+        else:
+            labels['files'].configure(text=f"📁 Fichiers vus: {files}")
+            labels['bytes'].configure(text=f"🔐 Données comparées: {hashed_mb:.1f} MB")
+        labels['dir'].configure(text=f"📂 {current_dir}" if current_dir else "")
+
+        eta = event.get('eta')
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            labels['eta'].configure(text="⛔ Annulation en cours…")
+        elif eta is None:
+            labels['eta'].configure(text="⏱️ Temps restant: estimation en cours…")
         else:
-            tk.Label(advice_frame,
-                     text=f"⚠️ {len(data['duplicates'])} doublons détectés\n"
-                          f"Libérez de l'espace en les supprimant",
-                     font=text_font, bg=bg_color, fg=fg_color,
-                     justify=tk.CENTER).pack(pady=15)
-
-            tk.Button(advice_frame,
-                      text="🗑️ Supprimer les doublons",
-                      command=self._remove_duplicates,
-                      font=button_font,
-                      bg='#f44336', fg='white',
-                      pady=8, padx=15,
-                      relief=tk.RAISED,
-                      borderwidth=2).pack(pady=15)
+            minutes, seconds = divmod(int(eta), 60)
+            labels['eta'].configure(text=f"⏱️ Temps restant: {minutes} min {seconds:02d} s")
+
+        # Barre déterminée dès que la quantité restante est connue
+        fraction = event.get('fraction')
+        bar = self.progress_bar
+        if fraction is not None:
+            if str(bar.cget('mode')) != 'determinate':
+                bar.stop()
+                bar.configure(mode='determinate', maximum=100)
+            bar['value'] = fraction * 100
 
     def _analyze_files(self):
-        """Lance l'analyse des fichiers"""
-        folder = filedialog.askdirectory(title="Sélectionner le dossier à analyser")
-        if not folder:
+        """Lance l'analyse des fichiers dans un thread, sans bloquer l'interface"""
+        if self.scan_thread is not None:
             return
 
-        success = self.file_analyzer.analyze_directory(folder)
+        # Plusieurs dossiers peuvent être analysés ensemble ; la liste précédente est proposée
+        from ui.folders_dialog import FoldersDialog
+        snapshot = self.file_analyzer.snapshot
+        dialog = FoldersDialog(self.parent, snapshot.roots if snapshot is not None else ())
+        if not dialog.folders:
+            return
+
+        self._start_task('analyse', self._run_analysis, dialog.folders, dialog.incremental)
+
+    def _start_task(self, task, target, *args):
+        """Exécute une tâche longue dans un thread et suit sa progression"""
+        self.task = task
+        self.cancel_event = threading.Event()
+        self.last_progress = None
+        self.scan_thread = threading.Thread(target=self._run_task, args=(target,) + args, daemon=True)
+        self.scan_thread.start()
+
+        self._reset_progress()
+        self.refresh()
+        self.parent.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def _run_task(self, target, *args):
+        """Thread de travail : la surveillance est suspendue pendant la tâche"""
+        if self.watcher is not None:
+            self.watcher.pause()
+        target(*args)
+
+    def _run_analysis(self, folders, incremental=False):
+        """Exécute l'analyse (thread de travail) ; communique uniquement par la file"""
+        # Analyse complète par défaut : les empreintes d'un dossier réutilisé pourraient être périmées
+        success = self.file_analyzer.analyze_directories(folders, incremental=incremental,
+                                                         progress_callback=self.progress_queue.put,
+                                                         cancel_event=self.cancel_event)
+        self.progress_queue.put({'stage': 'finished', 'success': success})
+
+    def _poll_progress(self):
+        """Lit les événements de progression depuis la boucle Tk"""
+        finished = None
+        while True:
+            try:
+                event = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event['stage'] == 'finished':
+                finished = event
+            else:
+                self.last_progress = event
+
+        if finished is not None:
+            if self.task == 'suppression':
+                self._on_removal_finished(finished['result'])
+            elif self.task == 'liaison':
+                self._on_link_finished(finished['result'])
+            elif self.task == 'restauration':
+                self._on_restore_finished(finished['result'])
+            else:
+                self._on_analysis_finished(finished['success'])
+            return
+
+        self._update_progress_widgets()
+        self.parent.after(PROGRESS_POLL_MS, self._poll_progress)
+
+    def _cancel_analysis(self):
+        """Demande l'arrêt de la tâche en cours (analyse, suppression, remplacement ou restauration)"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.configure(state=tk.DISABLED)
+            self._update_progress_widgets()
+
+    def _on_analysis_finished(self, success):
+        """Affiche le résultat de l'analyse terminée"""
+        self.scan_thread.join()
+        self.scan_thread = None
+        self.task = None
+        self.progress_bar.stop()
+        if self.watcher is not None:
+            self.watcher.resume()
+
         if success:
             self.analyzed = True  # Marquer que l'analyse a été effectuée
             data = self.file_analyzer.get_analysis_data()
-            messagebox.showinfo("Analyse terminée",
-                                f"✅ Analyse terminée!\n\n"
-                                f"📁 Fichiers analysés: {data['total_files']}\n"
-                                f"🔄 Doublons trouvés: {len(data['duplicates'])}")
-            # Rafraîchir l'affichage
-            self.show()
+            if self.file_analyzer.cancelled:
+                messagebox.showinfo("Analyse annulée",
+                                    f"⛔ Analyse annulée : résultats partiels\n\n"
+                                    f"📁 Fichiers analysés: {data['total_files']}\n"
+                                    f"🔄 Doublons trouvés: {len(data['duplicates'])}")
+            else:
+                messagebox.showinfo("Analyse terminée",
+                                    f"✅ Analyse terminée!\n\n"
+                                    f"📁 Fichiers analysés: {data['total_files']}\n"
+                                    f"🔄 Doublons trouvés: {len(data['duplicates'])}")
         else:
             messagebox.showerror("Erreur", "❌ Erreur lors de l'analyse des fichiers!")
 
-    def _remove_duplicates(self):
-        """Supprime les fichiers en double"""
+        # Mise à jour en place, que le tableau de bord soit affiché ou non
+        self.refresh()
+
+    def _remove_duplicates(self, paths=None):
+        """Supprime les fichiers en double (ou seulement paths), ou les met en quarantaine, dans un thread"""
+        if self.scan_thread is not None:
+            return
+
+        # Une suppression interrompue (arrêt de l'application) est reprise en priorité
+        journals = unfinished_journals(self.journal_folder)
+        if journals and messagebox.askyesno("Suppression interrompue",
+                                            "⚠️ Une suppression précédente n'est pas terminée.\n"
+                                            "Voulez-vous la reprendre?"):
+            self.last_journal = journals[-1]
+            self._start_task('suppression', self._run_removal, None, None, None)
+            return
+
         data = self.file_analyzer.get_analysis_data()
         if not data['duplicates']:
             messagebox.showinfo("Info", "✅ Aucun doublon à supprimer!")
             return
 
+        count = len(paths) if paths is not None else len(data['duplicates'])
+        result = messagebox.askyesnocancel("Confirmation",
+                                           f"⚠️ {count} fichiers en double.\n\n"
+                                           f"Oui : les mettre en quarantaine (restaurables)\n"
+                                           f"Non : les supprimer définitivement")
+        if result is None:
+            return
+
+        job_id = time.strftime("%Y%m%d-%H%M%S")
+        self.last_journal = os.path.join(self.journal_folder, f"{job_id}.jsonl")
+        quarantine_dir = os.path.join(self.data_folder, "quarantine", job_id) if result else None
+        self._start_task('suppression', self._run_removal, self.last_journal, quarantine_dir, paths)
+
+    def _run_removal(self, journal_path, quarantine_dir, paths):
+        """Exécute la suppression (thread de travail) ; sans journal_path, reprend self.last_journal"""
+        try:
+            if journal_path is None:
+                self.file_analyzer.resume_removal(self.last_journal, self.progress_queue.put, self.cancel_event)
+            else:
+                self.file_analyzer.remove_duplicates(journal_path=journal_path, quarantine_dir=quarantine_dir,
+                                                     progress_callback=self.progress_queue.put,
+                                                     cancel_event=self.cancel_event, paths=paths)
+            result = self.file_analyzer.last_removal
+        except Exception as e:
+            print(f"Erreur lors de la suppression: {e}")
+            result = None
+        self.progress_queue.put({'stage': 'finished', 'result': result})
+
+    def _on_removal_finished(self, result):
+        """Affiche le bilan de la suppression terminée"""
+        self.scan_thread.join()
+        self.scan_thread = None
+        self.task = None
+        self.progress_bar.stop()
+        if self.watcher is not None:
+            self.watcher.resume()
+
+        if result is None:
+            messagebox.showerror("Erreur", "❌ Erreur lors de la suppression des doublons!")
+        else:
+            freed_mb = result['bytes_freed'] / (1024 ** 2)
+            status = "⛔ Suppression interrompue (reprise possible)" if self.cancel_event.is_set() \
+                else "🎉 Suppression terminée"
+            messagebox.showinfo("Terminé",
+                                f"{status}\n\n"
+                                f"🗑️ Fichiers traités: {len(result['removed'])}\n"
+                                f"💾 Espace libéré: {freed_mb:.1f} MB\n"
+                                f"⏭️ Ignorés: {len(result['skipped'])}, ❌ erreurs: {len(result['failed'])}")
+
+        if self.duplicates_window is not None and self.duplicates_window.window.winfo_exists():
+            self.duplicates_window.refresh()
+        self.refresh()
+
+    def _restore_quarantine(self):
+        """Remet en place les fichiers mis en quarantaine par la dernière suppression, dans un thread"""
+        if self.scan_thread is not None:
+            return
+        if not messagebox.askyesno("Confirmation", "♻️ Restaurer les fichiers mis en quarantaine?"):
+            return
+        self._start_task('restauration', self._run_restore, self.last_journal)
+
+    def _run_restore(self, journal_path):
+        """Exécute la restauration (thread de travail) ; les déplacements peuvent être des copies"""
+        try:
+            result = RemovalJob.from_journal(journal_path).restore(self.progress_queue.put, self.cancel_event)
+        except Exception as e:
+            print(f"Erreur lors de la restauration: {e}")
+            result = None
+        self.progress_queue.put({'stage': 'finished', 'result': result})
+
+    def _on_restore_finished(self, restored):
+        """Affiche le bilan de la restauration"""
+        self.scan_thread.join()
+        self.scan_thread = None
+        self.task = None
+        self.progress_bar.stop()
+        if self.watcher is not None:
+            self.watcher.resume()
+
+        if restored is None:
+            messagebox.showerror("Erreur", "❌ Erreur lors de la restauration des fichiers!")
+        elif self.cancel_event.is_set():
+            messagebox.showinfo("Terminé", f"⛔ Restauration interrompue : {restored} fichiers restaurés.\n"
+                                           f"Les autres pourront être restaurés plus tard.")
+        else:
+            messagebox.showinfo("Terminé", f"♻️ {restored} fichiers restaurés!\n"
+                                           f"Relancez l'analyse pour mettre à jour les résultats.")
+            self.last_journal = None
+        self.refresh()
+
+    def _can_restore(self):
+        """Vrai si la dernière suppression a mis des fichiers en quarantaine"""
+        if self.last_journal is None or not os.path.exists(self.last_journal):
+            return False
+        try:
+            header = read_journal(self.last_journal)[0]
+        except OSError:
+            return False
+        return bool(header and header.get('quarantine'))
+
+    def _toggle_watch(self):
+        """Démarre ou arrête le suivi en direct du dossier analysé"""
+        if self.watch_var.get():
+            from watcher import FolderWatcher
+            if self.watcher is None:
+                self.watcher = FolderWatcher(self.file_analyzer, on_update=self.watch_queue.put)
+            self.watcher.start()
+            if self.scan_thread is not None:
+                self.watcher.pause()
+            if self._watch_poll is None:
+                self._watch_poll = self.parent.after(WATCH_POLL_MS, self._poll_watch)
+        elif self.watcher is not None:
+            self.watcher.stop()
+        self._update_watch_status()
+
+    def _poll_watch(self):
+        """Lit les mises à jour de la surveillance depuis la boucle Tk"""
+        if self.watcher is None or not self.watcher.running:
+            self._watch_poll = None
+            return
+        changes = None
+        while True:
+            try:
+                changes = self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+        if changes is not None:
+            self._update_watch_status(changes)
+            if self.scan_thread is None:
+                if self.duplicates_window is not None and self.duplicates_window.window.winfo_exists():
+                    self.duplicates_window.refresh()
+                self.refresh()
+        self._watch_poll = self.parent.after(WATCH_POLL_MS, self._poll_watch)
+
+    def _update_watch_status(self, changes=None):
+        watcher = self.watcher
+        if watcher is None or not watcher.running:
+            self.watch_status.configure(text="")
+            return
+        mode = "inotify" if watcher.mode == 'inotify' else f"vérification toutes les {watcher.poll_interval:.0f} s"
+        if changes is None:
+            self.watch_status.configure(text=f"En attente de changements ({mode})")
+        else:
+            self.watch_status.configure(text=f"Mis à jour à {time.strftime('%H:%M:%S')} : "
+                                             f"{len(changes['added'])} ajoutés, {len(changes['removed'])} "
+                                             f"supprimés, {len(changes['changed'])} modifiés ({mode})")
+
+    def _open_duplicates(self):
+        """Ouvre la liste des doublons, triable et sélectionnable"""
+        from ui.duplicates_view import DuplicatesWindow
+        if self.duplicates_window is not None and self.duplicates_window.window.winfo_exists():
+            self.duplicates_window.refresh()
+            self.duplicates_window.window.lift()
+            return
+        self.duplicates_window = DuplicatesWindow(self.parent, self.file_analyzer, on_remove=self._remove_duplicates)
+
+    def _open_space_tree(self):
+        """Ouvre l'arborescence des dossiers triés par taille"""
+        from ui.space_tree import SpaceTreeWindow
+        SpaceTreeWindow(self.parent, self.file_analyzer)
+
+    def _link_duplicates(self):
+        """Remplace les doublons par des liens physiques, sans changer leur emplacement, dans un thread"""
+        if self.scan_thread is not None:
+            return
+        data = self.file_analyzer.get_analysis_data()
+        if not data['duplicates']:
+            messagebox.showinfo("Info", "✅ Aucun doublon à remplacer!")
+            return
+
         result = messagebox.askyesno("Confirmation",
-                                     f"⚠️ Voulez-vous supprimer {len(data['duplicates'])} fichiers en double?")
+                                     f"🔗 Remplacer {len(data['duplicates'])} fichiers en double par des liens?\n"
+                                     f"Les fichiers restent à leur place mais partagent le même contenu : "
+                                     f"modifier l'un modifie aussi les autres.")
         if result:
-            removed_count = self.file_analyzer.remove_duplicates()
-            messagebox.showinfo("Terminé", f"🎉 {removed_count} fichiers supprimés avec succès!")
-            self.show()  # Rafraîchir l'affichage
+            self._start_task('liaison', self._run_link)
+
+    def _run_link(self):
+        """Exécute le remplacement par des liens (thread de travail) ; communique uniquement par la file"""
+        try:
+            self.file_analyzer.link_duplicates(progress_callback=self.progress_queue.put,
+                                               cancel_event=self.cancel_event)
+            result = self.file_analyzer.last_link
+        except Exception as e:
+            print(f"Erreur lors du remplacement par des liens: {e}")
+            result = None
+        self.progress_queue.put({'stage': 'finished', 'result': result})
+
+    def _on_link_finished(self, result):
+        """Affiche le bilan du remplacement par des liens"""
+        self.scan_thread.join()
+        self.scan_thread = None
+        self.task = None
+        self.progress_bar.stop()
+        if self.watcher is not None:
+            self.watcher.resume()
+
+        if result is None:
+            messagebox.showerror("Erreur", "❌ Erreur lors du remplacement des doublons!")
+        else:
+            status = "⛔ Remplacement interrompu" if result['cancelled'] else "🎉 Remplacement terminé"
+            messagebox.showinfo("Terminé",
+                                f"{status}\n\n"
+                                f"🔗 Fichiers remplacés par des liens: {len(result['linked'])}\n"
+                                f"💾 Espace libéré: {result['reclaimed_bytes'] / (1024 ** 2):.1f} MB\n"
+                                f"❌ Erreurs: {len(result['failed'])}")
+
+        if self.duplicates_window is not None and self.duplicates_window.window.winfo_exists():
+            self.duplicates_window.refresh()
+        self.refresh()
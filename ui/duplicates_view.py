@@ -0,0 +1,70 @@
+"""
+Fenêtre de la liste des doublons de BeGreen!
+Parcours, tri et sélection des copies à supprimer
+"""
+
+import tkinter as tk
+from ui.space_tree import format_size
+from ui.style import style
+from ui.virtual_list import VirtualList
+
+COLUMNS = [
+    ("📄 Copie", 430, None),
+    ("Taille", 100, format_size),
+    ("Groupe", 80, None),
+    ("📌 Fichier conservé", 330, None),
+]
+
+
+class DuplicatesWindow:
+    """Liste de toutes les copies en double, triable et sélectionnable.
+
+    on_remove(chemins) est appelé avec les copies sélectionnées quand
+    l'utilisateur demande leur suppression.
+    """
+
+    def __init__(self, parent, file_analyzer, on_remove=None):
+        self.file_analyzer = file_analyzer
+        self.on_remove = on_remove
+
+        # Couleurs du registre de style : la fenêtre suit les changements de thème
+        self.window = style.register(tk.Toplevel(parent), bg='bg')
+        self.window.title("BeGreen! - Doublons")
+        self.window.geometry("980x620")
+
+        toolbar = style.register(tk.Frame(self.window), bg='bg')
+        toolbar.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.status_label = style.register(tk.Label(toolbar), bg='bg', fg='fg')
+        self.status_label.pack(side=tk.LEFT)
+        style.register(tk.Button(toolbar, text="🗑️ Supprimer la sélection", command=self._remove_selection,
+                                 padx=10), bg='danger', fg='on_accent').pack(side=tk.RIGHT, padx=(5, 0))
+        style.register(tk.Button(toolbar, text="Aucun", command=lambda: self.list.clear_selection(), padx=10),
+                       bg='button', fg='fg', activebackground='button_active').pack(side=tk.RIGHT, padx=(5, 0))
+        style.register(tk.Button(toolbar, text="Tout sélectionner", command=lambda: self.list.select_all(),
+                                 padx=10),
+                       bg='button', fg='fg', activebackground='button_active').pack(side=tk.RIGHT)
+
+        self.list = VirtualList(self.window, COLUMNS, bg=style.color('bg'), fg=style.color('fg'))
+        self.list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        style.on_change(lambda: self.list.set_colors(style.color('bg'), style.color('fg')), self.window)
+        self.list.on_select = self._update_status
+        self.refresh()
+
+    def refresh(self):
+        """Recharge les doublons depuis la dernière analyse (après une suppression par exemple)"""
+        with self.file_analyzer.lock:
+            self.rows = self.file_analyzer.get_duplicate_rows()
+        self.list.set_rows(self.rows)
+        self._update_status()
+
+    def _update_status(self):
+        selected = self.list.selected_rows()
+        text = f"🔄 {len(self.list.rows)} copies en double"
+        if selected:
+            text += f" — {len(selected)} sélectionnées ({format_size(sum(row[1] for row in selected))})"
+        self.status_label.configure(text=text)
+
+    def _remove_selection(self):
+        selected = self.list.selected_rows()
+        if selected and self.on_remove is not None:
+            self.on_remove([row[0] for row in selected])
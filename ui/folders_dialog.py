@@ -0,0 +1,113 @@
+"""
+Choix des dossiers à analyser pour BeGreen!
+Liste de dossiers analysés ensemble (Documents, Bureau, disque partagé…)
+"""
+
+import os
+import tkinter as tk
+from tkinter import filedialog
+from scanner import unique_roots
+from ui.style import style
+
+
+class FoldersDialog:
+    """Dialogue modal : ajoute et retire des dossiers, puis lance l'analyse.
+
+    folders contient les dossiers choisis après un clic sur « Analyser »,
+    sinon None. incremental vaut True si l'analyse rapide est cochée (voir
+    Snapshot.rescan). Les dossiers contenus dans un autre de la liste sont
+    signalés : ils ne seront pas relus une seconde fois (voir
+    scanner.unique_roots).
+    """
+
+    def __init__(self, parent, initial=()):
+        self.folders = None
+        self.incremental = False
+        self._paths = [path for path in initial if os.path.isdir(path)]
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("BeGreen! - Dossiers à analyser")
+        self.window.geometry("700x420")
+        self.window.configure(bg=style.color('bg'))
+        self.window.transient(parent)
+
+        tk.Label(self.window, text="📁 Dossiers analysés ensemble", font=style.font('section'),
+                 bg=style.color('bg'), fg=style.color('fg')).pack(pady=(15, 5))
+        tk.Label(self.window, text="Les doublons sont recherchés d'un dossier à l'autre ; "
+                                   "les disques différents sont lus en parallèle.",
+                 font=style.font('small'), bg=style.color('bg'), fg=style.color('hint')).pack(pady=(0, 10))
+
+        list_frame = tk.Frame(self.window, bg=style.color('bg'))
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=15)
+        self.listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, font=style.font('text'),
+                                  bg=style.color('entry'), fg=style.color('fg'), activestyle='none')
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.status = tk.Label(self.window, font=style.font('small'), bg=style.color('bg'),
+                               fg=style.color('muted'))
+        self.status.pack(pady=5)
+
+        # Analyse rapide : option explicite, l'analyse complète reste la valeur par défaut
+        self.incremental_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.window, text="⚡ Analyse rapide : ne relire que les dossiers modifiés "
+                                         "(les fichiers modifiés sur place peuvent passer inaperçus)",
+                       variable=self.incremental_var, font=style.font('small'), bg=style.color('bg'),
+                       fg=style.color('fg'), selectcolor=style.color('button_active'),
+                       activebackground=style.color('bg'), activeforeground=style.color('fg')).pack()
+
+        buttons = tk.Frame(self.window, bg=style.color('bg'))
+        buttons.pack(pady=10)
+        for text, command, color in (("➕ Ajouter un dossier", self._add, '#2196F3'),
+                                     ("➖ Retirer", self._remove, '#FF9800'),
+                                     ("🔍 Analyser", self._accept, '#4CAF50'),
+                                     ("Annuler", self.window.destroy, '#9E9E9E')):
+            button = tk.Button(buttons, text=text, command=command, font=style.font('button'), bg=color,
+                               fg='white', relief=tk.RAISED, borderwidth=2, padx=10, pady=4)
+            button.pack(side=tk.LEFT, padx=5)
+            if command == self._accept:
+                self.analyze_button = button
+
+        self._refresh()
+        if not self._paths:
+            self.window.after_idle(self._add)
+        self.window.grab_set()
+        self.window.wait_window()
+
+    def _add(self):
+        folder = filedialog.askdirectory(title="Ajouter un dossier à analyser", parent=self.window)
+        if folder and folder not in self._paths:
+            self._paths.append(folder)
+            self._refresh()
+
+    def _remove(self):
+        for index in reversed(self.listbox.curselection()):
+            del self._paths[index]
+        self._refresh()
+
+    def _accept(self):
+        if self._paths:
+            self.folders = list(self._paths)
+            self.incremental = self.incremental_var.get()
+            self.window.destroy()
+
+    def _refresh(self):
+        kept = {os.path.normcase(path) for path in unique_roots(self._paths)}
+        self.listbox.delete(0, tk.END)
+        ignored = 0
+        for path in self._paths:
+            if os.path.normcase(os.path.abspath(path)) in kept:
+                self.listbox.insert(tk.END, path)
+            else:
+                # Déjà couvert par un autre dossier de la liste
+                self.listbox.insert(tk.END, f"{path}   (inclus dans un autre dossier)")
+                self.listbox.itemconfigure(tk.END, fg=style.color('muted'))
+                ignored += 1
+        count = len(self._paths) - ignored
+        text = f"{count} dossier{'s' if count > 1 else ''} à analyser"
+        if ignored:
+            text += f", {ignored} déjà inclus"
+        self.status.configure(text=text)
+        self.analyze_button.configure(state=tk.NORMAL if self._paths else tk.DISABLED)
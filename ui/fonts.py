@@ -0,0 +1,39 @@
+"""
+Choix de la police de BeGreen!
+Déterminée une seule fois, puis gardée en mémoire et dans la configuration
+"""
+
+import tkinter.font as tkfont
+
+# Polices modernes à essayer, dans l'ordre de préférence
+MODERN_FONTS = ['Segoe UI', 'Verdana', 'Tahoma', 'Calibri', 'Arial']
+DEFAULT_FONT = 'Arial'
+
+_font_family = None
+
+
+def resolve_font_family(saved=None):
+    """Police de l'interface : saved si elle est toujours installée, sinon la première police moderne trouvée.
+
+    Le résultat est gardé en mémoire : la liste des polices installées
+    (tkfont.families(), lente sous Windows) est lue au plus une fois, et
+    jamais si la police enregistrée existe encore.
+    """
+    global _font_family
+    if _font_family is None:
+        if saved and _is_installed(saved):
+            _font_family = saved
+        else:
+            available = set(tkfont.families())
+            _font_family = next((font for font in MODERN_FONTS if font in available), DEFAULT_FONT)
+    return _font_family
+
+
+def get_font_family():
+    """Police choisie au démarrage (voir resolve_font_family)"""
+    return _font_family or resolve_font_family()
+
+
+def _is_installed(family):
+    """Vrai si Tk dispose de cette police : une police absente est remplacée par une autre"""
+    return tkfont.Font(family=family, size=10).actual('family') == family
@@ -3,11 +3,13 @@ Page paramètres de BeGreen!
 """
 
 import tkinter as tk
-import tkinter.font as tkfont
 from tkinter import messagebox
+from ui.style import style
 
 
 class SettingsPage:
+    """Page des paramètres, construite une seule fois ; show() recharge les valeurs enregistrées"""
+
     def __init__(self, parent, username_var, theme_var, save_callback, apply_theme_callback, update_sidebar_callback):
         self.parent = parent
         self.username_var = username_var
@@ -16,81 +18,75 @@ class SettingsPage:
         self.apply_theme_callback = apply_theme_callback
         self.update_sidebar_callback = update_sidebar_callback
 
+        self.theme_selection = tk.StringVar(value=self.theme_var.get())
+        self.name_var = tk.StringVar(value=self.username_var.get())
+        self._build()
+
     def show(self):
         """Affiche la page des paramètres"""
-        # Nettoyer les widgets existants
-        for widget in self.parent.winfo_children():
-            widget.destroy()
-
-        # Vérifier les polices disponibles et choisir la meilleure
-        available_fonts = tkfont.families()
-        modern_fonts = ['Segoe UI', 'Verdana', 'Tahoma', 'Calibri', 'Arial']
-
-        font_family = 'Arial'  # Police par défaut
-        for font in modern_fonts:
-            if font in available_fonts:
-                font_family = font
-                break
-
-        # Créer des polices personnalisées
-        title_font = tkfont.Font(family=font_family, size=24, weight="bold")
-        section_font = tkfont.Font(family=font_family, size=16, weight="bold")
-        text_font = tkfont.Font(family=font_family, size=14)
-        button_font = tkfont.Font(family=font_family, size=14, weight="bold")
-
-        tk.Label(self.parent, text="⚙️ Paramètres",
-                 font=title_font).pack(pady=25)
-
-        settings_frame = tk.Frame(self.parent)
+        # Les choix non sauvegardés d'une visite précédente sont abandonnés
+        self.theme_selection.set(self.theme_var.get())
+        self.name_var.set(self.username_var.get())
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+    def hide(self):
+        self.frame.pack_forget()
+
+    def _build(self):
+        self.frame = style.register(tk.Frame(self.parent), bg='bg')
+        style.register(tk.Label(self.frame, text="⚙️ Paramètres", font=style.font('title')),
+                       bg='bg', fg='fg').pack(pady=25)
+
+        settings_frame = style.register(tk.Frame(self.frame), bg='frame')
         settings_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=20)
 
         # Section Thème
-        self._create_theme_section(settings_frame, section_font, text_font)
+        self._create_theme_section(settings_frame)
 
         # Section Utilisateur
-        self._create_user_section(settings_frame, section_font, text_font)
+        self._create_user_section(settings_frame)
 
         # Bouton de sauvegarde
         save_button = tk.Button(settings_frame, text="💾 Sauvegarder",
                                 command=self._save_settings,
-                                font=button_font,
+                                font=style.font('large_button'),
                                 bg='#2196F3', fg='white',
                                 pady=10, padx=25,
                                 relief=tk.RAISED, borderwidth=2)
         save_button.pack(pady=30)
 
-    def _create_theme_section(self, parent, section_font, text_font):
-        """Crée la section choix du thème"""
-        theme_frame = tk.LabelFrame(parent, text="🎨 Apparence",
-                                    font=section_font, padx=25, pady=25)
-        theme_frame.pack(fill=tk.X, pady=15)
+    def _section(self, parent, title):
+        """Cadre titré d'une section"""
+        frame = style.register(tk.LabelFrame(parent, text=title, font=style.font('heading'), padx=25, pady=25),
+                               bg='frame', fg='fg')
+        frame.pack(fill=tk.X, pady=15)
+        return frame
 
-        tk.Label(theme_frame, text="Thème:", font=text_font).pack(anchor='w', pady=5)
-
-        self.theme_selection = tk.StringVar(value=self.theme_var.get())
+    def _create_theme_section(self, parent):
+        """Crée la section choix du thème"""
+        theme_frame = self._section(parent, "🎨 Apparence")
+        style.register(tk.Label(theme_frame, text="Thème:", font=style.font('large')),
+                       bg='frame', fg='fg').pack(anchor='w', pady=5)
 
-        theme_option_frame = tk.Frame(theme_frame)
+        theme_option_frame = style.register(tk.Frame(theme_frame), bg='frame')
         theme_option_frame.pack(fill=tk.X, pady=10)
 
         # Options de thème avec plus d'espace
-        tk.Radiobutton(theme_option_frame, text="☀️ Thème clair",
-                       variable=self.theme_selection,
-                       value="clair", font=text_font).pack(anchor='w', padx=25, pady=5)
-
-        tk.Radiobutton(theme_option_frame, text="🌙 Thème sombre",
-                       variable=self.theme_selection,
-                       value="sombre", font=text_font).pack(anchor='w', padx=25, pady=5)
-
-    def _create_user_section(self, parent, section_font, text_font):
+        for text, value in (("☀️ Thème clair", "clair"), ("🌙 Thème sombre", "sombre")):
+            button = tk.Radiobutton(theme_option_frame, text=text, variable=self.theme_selection,
+                                    value=value, font=style.font('large'))
+            style.register(button, bg='bg', fg='fg', selectcolor='button_active', activebackground='bg',
+                           activeforeground='fg')
+            button.pack(anchor='w', padx=25, pady=5)
+
+    def _create_user_section(self, parent):
         """Crée la section utilisateur"""
-        user_frame = tk.LabelFrame(parent, text="👤 Utilisateur",
-                                   font=section_font, padx=25, pady=25)
-        user_frame.pack(fill=tk.X, pady=15)
-
-        tk.Label(user_frame, text="Nom d'utilisateur:", font=text_font).pack(anchor='w', pady=5)
+        user_frame = self._section(parent, "👤 Utilisateur")
+        style.register(tk.Label(user_frame, text="Nom d'utilisateur:", font=style.font('large')),
+                       bg='frame', fg='fg').pack(anchor='w', pady=5)
 
-        self.name_var = tk.StringVar(value=self.username_var.get())
-        name_entry = tk.Entry(user_frame, textvariable=self.name_var, font=text_font, width=30)
+        name_entry = tk.Entry(user_frame, textvariable=self.name_var, font=style.font('large'), width=30)
+        style.register(name_entry, bg='entry', fg='fg', insertbackground='fg')
         name_entry.pack(anchor='w', padx=25, pady=10)
 
     def _save_settings(self):
@@ -106,4 +102,4 @@ class SettingsPage:
             self.update_sidebar_callback()
             messagebox.showinfo("Paramètres", "✅ Paramètres sauvegardés avec succès!")
         else:
-            messagebox.showerror("Erreur", "❌ Erreur lors de la sauvegarde!")
\ No newline at end of file
+            messagebox.showerror("Erreur", "❌ Erreur lors de la sauvegarde!")
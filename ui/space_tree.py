@@ -0,0 +1,120 @@
+"""
+Fenêtre de répartition de l'espace disque de BeGreen!
+Arborescence des dossiers analysés, chargée à la demande
+"""
+
+import os
+import tkinter as tk
+from tkinter import ttk
+from ui.style import style
+
+# Nombre maximal de sous-dossiers affichés par dossier ; les suivants sont regroupés
+MAX_CHILDREN = 500
+# Identifiant de l'enfant factice qui rend un dossier dépliable avant son chargement
+PLACEHOLDER = '\0'
+
+
+def format_size(size):
+    """Taille lisible (octets, KB, MB, GB, TB)"""
+    for unit in ('octets', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'octets' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class SpaceTreeWindow:
+    """Arborescence des dossiers triés par taille, sous-dossiers compris.
+
+    Seuls les dossiers dépliés sont insérés dans le Treeview : l'affichage
+    reste rapide quelle que soit la taille de l'arborescence analysée.
+    """
+
+    def __init__(self, parent, file_analyzer):
+        self.file_analyzer = file_analyzer
+
+        # Couleurs du registre de style : la fenêtre suit les changements de thème
+        self.window = style.register(tk.Toplevel(parent), bg='bg')
+        self.window.title("BeGreen! - Répartition de l'espace")
+        self.window.geometry("900x600")
+
+        frame = style.register(tk.Frame(self.window), bg='bg')
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.tree = ttk.Treeview(frame, columns=('size', 'share', 'files'), selectmode='browse')
+        self.tree.heading('#0', text="📂 Dossier")
+        self.tree.heading('size', text="Taille")
+        self.tree.heading('share', text="Part")
+        self.tree.heading('files', text="Fichiers")
+        self.tree.column('#0', width=520)
+        self.tree.column('size', width=120, anchor='e')
+        self.tree.column('share', width=80, anchor='e')
+        self.tree.column('files', width=100, anchor='e')
+
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<<TreeviewOpen>>', self._on_open)
+        self._insert_root()
+
+    def _insert_root(self):
+        # Résultats lus sous le verrou : la surveillance peut les remplacer depuis son thread
+        with self.file_analyzer.lock:
+            self._insert_roots()
+
+    def _insert_roots(self):
+        root = self.file_analyzer.tree_root
+        totals = self.file_analyzer.get_dir_totals(root)
+        if totals is None:
+            self.tree.insert('', tk.END, text="Aucune analyse disponible")
+            return
+        size, files = totals[0], totals[1]
+        if root is None:
+            # Plusieurs racines analysées ensemble : une ligne par racine, chargée à son ouverture
+            for path, root_size, root_files, _ in self.file_analyzer.get_dir_children():
+                self.tree.insert('', tk.END, iid=path, text=path,
+                                 values=(format_size(root_size), self._share(root_size, size), root_files))
+                self.tree.insert(path, tk.END, iid=path + PLACEHOLDER, text="…")
+            return
+        self.tree.insert('', tk.END, iid=root, text=root, open=True,
+                         values=(format_size(size), "100 %", files))
+        self._load_children(root)
+
+    def _on_open(self, event):
+        node = self.tree.focus()
+        children = self.tree.get_children(node)
+        if len(children) == 1 and children[0] == node + PLACEHOLDER:
+            self.tree.delete(children[0])
+            with self.file_analyzer.lock:
+                self._load_children(node)
+
+    def _load_children(self, node):
+        """Insère les sous-dossiers d'un dossier, les plus lourds d'abord"""
+        totals = self.file_analyzer.get_dir_totals(node)
+        if totals is None:
+            return
+        parent_size, _, own_size, own_files = totals
+        # Tous les sous-dossiers : ceux au-delà de MAX_CHILDREN sont regroupés en une ligne
+        children = self.file_analyzer.get_dir_children(node)
+
+        for path, size, files, has_subdirs in children[:MAX_CHILDREN]:
+            self.tree.insert(node, tk.END, iid=path, text=os.path.basename(path) or path,
+                             values=(format_size(size), self._share(size, parent_size), files))
+            if has_subdirs:
+                self.tree.insert(path, tk.END, iid=path + PLACEHOLDER, text="…")
+
+        others = children[MAX_CHILDREN:]
+        if others:
+            size = sum(child[1] for child in others)
+            self.tree.insert(node, tk.END, text=f"… {len(others)} autres dossiers",
+                             values=(format_size(size), self._share(size, parent_size),
+                                     sum(child[2] for child in others)))
+        if own_files:
+            self.tree.insert(node, tk.END, text="📄 Fichiers de ce dossier",
+                             values=(format_size(own_size), self._share(own_size, parent_size), own_files))
+
+    @staticmethod
+    def _share(size, parent_size):
+        return f"{size * 100 / parent_size:.1f} %" if parent_size else "-"
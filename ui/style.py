@@ -0,0 +1,122 @@
+"""
+Thèmes et polices de BeGreen!
+Registre partagé : les widgets déclarent leurs rôles de couleur une fois, le thème les met à jour
+"""
+
+import tkinter.font as tkfont
+from ui.fonts import get_font_family
+
+# Couleurs de chaque thème, par rôle
+THEMES = {
+    'clair': {
+        'bg': "#FFFFFF",  # Fond des pages
+        'fg': "#000000",  # Texte
+        'title': "#333333",  # Titres des pages
+        'muted': "#888888",  # Texte secondaire (dossier en cours, absence de données)
+        'hint': "#555555",  # Indications
+        'sidebar': "#F5F5F5",
+        'frame': "#F5F5F5",  # Cadres des paramètres
+        'button': "#E0E0E0",
+        'button_active': "#D6D6D6",
+        'entry': "#FFFFFF",
+        'danger': "#f44336",  # Actions destructives (suppression)
+        'on_accent': "#FFFFFF",  # Texte sur un bouton coloré
+    },
+    'sombre': {
+        'bg': "#1C1C1C",
+        'fg': "#E0E0E0",  # Texte plus lumineux pour meilleure lisibilité
+        'title': "#E0E0E0",
+        'muted': "#888888",
+        'hint': "#AAAAAA",
+        'sidebar': "#2A2A2A",
+        'frame': "#2A2A2A",
+        'button': "#333333",
+        'button_active': "#444444",
+        'entry': "#2A2A2A",
+        'danger': "#f44336",
+        'on_accent': "#FFFFFF",
+    },
+}
+DEFAULT_THEME = 'clair'
+
+# Polices nommées : (taille, graisse)
+FONTS = {
+    'title': (24, 'bold'),
+    'subtitle': (18, 'bold'),
+    'section': (14, 'bold'),
+    'big_button': (16, 'bold'),
+    'button': (12, 'bold'),
+    'text': (12, 'normal'),
+    'small': (11, 'normal'),
+    'score': (42, 'bold'),
+    'score_label': (16, 'normal'),
+    'heading': (16, 'bold'),  # Sections des paramètres
+    'large': (14, 'normal'),
+    'large_button': (14, 'bold'),
+    'logo': (28, 'bold'),
+    'app_name': (20, 'bold'),
+    'user': (16, 'bold'),
+    'nav': (13, 'normal'),
+}
+
+
+class StyleRegistry:
+    """Couleurs et polices partagées par toutes les pages.
+
+    register() associe des options d'un widget (bg, fg…) à des rôles du
+    thème ; apply() ne reconfigure que ces widgets, sans parcourir toute
+    l'arborescence. Les polices sont créées une seule fois et partagées.
+    """
+
+    def __init__(self):
+        self.theme = DEFAULT_THEME
+        self._widgets = {}  # widget -> {option: rôle}
+        self._callbacks = []
+        self._fonts = {}
+
+    def color(self, role):
+        return THEMES[self.theme][role]
+
+    def font(self, name):
+        """Police nommée, créée à la première demande"""
+        font = self._fonts.get(name)
+        if font is None:
+            size, weight = FONTS[name]
+            font = self._fonts[name] = tkfont.Font(family=get_font_family(), size=size, weight=weight)
+        return font
+
+    def register(self, widget, **roles):
+        """Colore un widget selon le thème actuel et le garde à jour ; retourne le widget"""
+        self._widgets[widget] = roles
+        widget.configure(**{option: self.color(role) for option, role in roles.items()})
+        widget.bind('<Destroy>', lambda event: self._widgets.pop(event.widget, None), add='+')
+        return widget
+
+    def on_change(self, callback, widget=None):
+        """Appelle callback après chaque changement de thème (dessins d'un Canvas par exemple).
+
+        Si widget est donné, callback est oublié à la destruction du widget
+        (fenêtres secondaires).
+        """
+        self._callbacks.append(callback)
+        if widget is not None:
+            widget.bind('<Destroy>', lambda event: self._forget(callback) if event.widget is widget else None,
+                        add='+')
+
+    def _forget(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def apply(self, theme):
+        """Applique un thème à tous les widgets enregistrés"""
+        if theme not in THEMES:
+            theme = DEFAULT_THEME
+        self.theme = theme
+        colors = THEMES[theme]
+        for widget, roles in self._widgets.items():
+            widget.configure(**{option: colors[role] for option, role in roles.items()})
+        for callback in self._callbacks:
+            callback()
+
+
+style = StyleRegistry()
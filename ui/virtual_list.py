@@ -0,0 +1,228 @@
+"""
+Liste virtualisée de BeGreen!
+Affiche des centaines de milliers de lignes en ne dessinant que celles visibles
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+
+ROW_HEIGHT = 22
+HEADER_HEIGHT = 26
+SELECT_COLOR = "#4CAF50"
+
+
+class VirtualList(tk.Frame):
+    """Tableau trié et sélectionnable dont seules les lignes visibles existent à l'écran.
+
+    Les lignes sont des tuples gardés dans une liste Python ; le Canvas ne
+    contient qu'autant d'éléments que de lignes visibles, réutilisés à chaque
+    défilement. columns : liste de (titre, largeur, fonction d'affichage ou
+    None). La première valeur de chaque ligne l'identifie (sélection).
+    """
+
+    def __init__(self, parent, columns, bg="#FFFFFF", fg="#000000", font=None, **kwargs):
+        super().__init__(parent, bg=bg, **kwargs)
+        self.columns = columns
+        self.rows = []
+        self.selection = set()  # Identifiants des lignes sélectionnées
+        self.sort_column = None
+        self.sort_reverse = False
+        self.on_select = None
+
+        self._bg, self._fg = bg, fg
+        self._font = font or tkfont.nametofont("TkDefaultFont")
+        self._char_width = self._font.measure("0") or 7
+        self._top = 0  # Index de la première ligne visible
+        self._anchor = None  # Index de départ d'une sélection avec Maj
+        self._items = []  # Par ligne visible : (fond, [textes])
+
+        header = self._header = tk.Frame(self, bg=bg)
+        header.pack(fill=tk.X)
+        self._headers = []
+        for column, (title, width, _) in enumerate(columns):
+            button = tk.Button(header, text=title, anchor='w', relief=tk.FLAT, bg=bg, fg=fg,
+                               command=lambda column=column: self.sort(column))
+            button.place(x=sum(c[1] for c in columns[:column]), y=0, width=width, height=HEADER_HEIGHT)
+            self._headers.append(button)
+        header.configure(height=HEADER_HEIGHT, width=sum(c[1] for c in columns))
+
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, takefocus=True)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind('<Configure>', lambda e: self._redraw())
+        self.canvas.bind('<MouseWheel>', lambda e: self._scroll(-1 if e.delta > 0 else 1, 'units'))
+        self.canvas.bind('<Button-4>', lambda e: self._scroll(-1, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self._scroll(1, 'units'))
+        self.canvas.bind('<Button-1>', lambda e: self._click(e, extend=False, toggle=False))
+        self.canvas.bind('<Shift-Button-1>', lambda e: self._click(e, extend=True, toggle=False))
+        self.canvas.bind('<Control-Button-1>', lambda e: self._click(e, extend=False, toggle=True))
+        self.canvas.bind('<Control-a>', lambda e: self.select_all())
+        self.canvas.bind('<Up>', lambda e: self._move(-1))
+        self.canvas.bind('<Down>', lambda e: self._move(1))
+        self.canvas.bind('<Prior>', lambda e: self._scroll(-1, 'pages'))
+        self.canvas.bind('<Next>', lambda e: self._scroll(1, 'pages'))
+
+    def set_colors(self, bg, fg):
+        """Change les couleurs (changement de thème) et redessine les lignes visibles"""
+        self._bg, self._fg = bg, fg
+        self.configure(bg=bg)
+        self._header.configure(bg=bg)
+        for button in self._headers:
+            button.configure(bg=bg, fg=fg)
+        self.canvas.configure(bg=bg)
+        for background, texts in self._items:
+            self.canvas.itemconfigure(background, fill=bg)
+            for text in texts:
+                self.canvas.itemconfigure(text, fill=fg)
+        self._redraw()
+
+    def set_rows(self, rows):
+        """Remplace les lignes affichées ; la sélection des lignes conservées est gardée"""
+        self.rows = list(rows)
+        keys = {row[0] for row in self.rows}
+        self.selection &= keys
+        if self.sort_column is not None:
+            self._sort_rows()
+        self._top = min(self._top, max(0, len(self.rows) - 1))
+        self._anchor = None
+        self._redraw()
+
+    def sort(self, column):
+        """Trie par une colonne ; un second clic inverse l'ordre"""
+        self.sort_reverse = not self.sort_reverse if self.sort_column == column else False
+        self.sort_column = column
+        self._sort_rows()
+        for index, button in enumerate(self._headers):
+            arrow = (" ▼" if self.sort_reverse else " ▲") if index == column else ""
+            button.configure(text=self.columns[index][0] + arrow)
+        self._anchor = None
+        self._redraw()
+
+    def _sort_rows(self):
+        column = self.sort_column
+        self.rows.sort(key=lambda row: row[column], reverse=self.sort_reverse)
+
+    def selected_rows(self):
+        """Lignes sélectionnées, dans l'ordre d'affichage"""
+        return [row for row in self.rows if row[0] in self.selection]
+
+    def select_all(self):
+        self.selection = {row[0] for row in self.rows}
+        self._changed()
+        return "break"
+
+    def clear_selection(self):
+        self.selection.clear()
+        self._changed()
+
+    # Défilement
+
+    @property
+    def _visible_count(self):
+        return max(1, self.canvas.winfo_height() // ROW_HEIGHT)
+
+    def _yview(self, action, value, unit=None):
+        """Commande de la barre de défilement (moveto ou scroll)"""
+        if action == 'moveto':
+            self._scroll_to(int(float(value) * len(self.rows)))
+        else:
+            self._scroll(int(value), unit)
+
+    def _scroll(self, count, unit):
+        step = self._visible_count if unit == 'pages' else 3
+        self._scroll_to(self._top + count * step)
+        return "break"  # La molette ne fait pas défiler le reste de la page
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self.rows) - self._visible_count))
+        if top != self._top:
+            self._top = top
+            self._redraw()
+
+    # Sélection
+
+    def _click(self, event, extend, toggle):
+        self.canvas.focus_set()
+        index = self._top + event.y // ROW_HEIGHT
+        if index >= len(self.rows):
+            return
+        key = self.rows[index][0]
+        if extend and self._anchor is not None:
+            low, high = sorted((self._anchor, index))
+            self.selection = {row[0] for row in self.rows[low:high + 1]}
+        elif toggle:
+            self.selection.symmetric_difference_update((key,))
+            self._anchor = index
+        else:
+            self.selection = {key}
+            self._anchor = index
+        self._changed()
+
+    def _move(self, delta):
+        if not self.rows:
+            return
+        index = max(0, min(len(self.rows) - 1, (self._anchor if self._anchor is not None else -1) + delta))
+        self.selection = {self.rows[index][0]}
+        self._anchor = index
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + self._visible_count:
+            self._scroll_to(index - self._visible_count + 1)
+        self._changed()
+        return "break"
+
+    def _changed(self):
+        self._redraw()
+        if self.on_select is not None:
+            self.on_select()
+
+    # Dessin
+
+    def _redraw(self):
+        """Met à jour les éléments des lignes visibles, en créant ou retirant ceux qui manquent"""
+        canvas = self.canvas
+        count = self._visible_count + 1
+        while len(self._items) < count:
+            y = len(self._items) * ROW_HEIGHT
+            background = canvas.create_rectangle(0, y, 0, y + ROW_HEIGHT, width=0, fill=self._bg)
+            texts = []
+            x = 4
+            for _, width, _ in self.columns:
+                texts.append(canvas.create_text(x, y + ROW_HEIGHT // 2, anchor='w', font=self._font,
+                                                fill=self._fg, width=0))
+                x += width
+            self._items.append((background, texts))
+        while len(self._items) > count:
+            background, texts = self._items.pop()
+            canvas.delete(background, *texts)
+
+        width = max(canvas.winfo_width(), sum(c[1] for c in self.columns))
+        for offset, (background, texts) in enumerate(self._items):
+            index = self._top + offset
+            y = offset * ROW_HEIGHT
+            if index >= len(self.rows):
+                canvas.itemconfigure(background, fill=self._bg)
+                for text in texts:
+                    canvas.itemconfigure(text, text="")
+                continue
+            row = self.rows[index]
+            selected = row[0] in self.selection
+            canvas.coords(background, 0, y, width, y + ROW_HEIGHT)
+            canvas.itemconfigure(background, fill=SELECT_COLOR if selected else self._bg)
+            for text, value, (_, column_width, formatter) in zip(texts, row, self.columns):
+                canvas.itemconfigure(text, text=self._fit(formatter(value) if formatter else str(value),
+                                                          column_width),
+                                     fill="white" if selected else self._fg)
+
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self._top / total, min(1.0, (self._top + self._visible_count) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _fit(self, text, width):
+        """Tronque le début d'un texte trop long pour sa colonne (garde la fin des chemins)"""
+        limit = max(4, (width - 8) // self._char_width)
+        return text if len(text) <= limit else "…" + text[-(limit - 1):]
@@ -0,0 +1,322 @@
+"""
+Surveillance des dossiers analysés pour BeGreen!
+inotify sous Linux (via ctypes), sinon comparaison périodique des dates des dossiers
+"""
+
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+
+# Calme attendu après le dernier événement avant de mettre l'analyse à jour (secondes)
+DEBOUNCE = 2.0
+# Délai maximal entre le premier événement et la mise à jour, même si les événements continuent
+MAX_DELAY = 30.0
+# Intervalle entre deux comparaisons des dates des dossiers (surveillance sans inotify)
+POLL_INTERVAL = 5.0
+# Attente maximale d'un événement : le thread vérifie régulièrement s'il doit s'arrêter
+WAIT_STEP = 0.5
+
+# Constantes de linux/inotify.h
+IN_ATTRIB = 0x00000004  # Métadonnées, dont le nombre de liens physiques
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Un fichier en cours d'écriture n'est signalé qu'à sa fermeture (IN_CLOSE_WRITE, pas IN_MODIFY) :
+# une copie massive ne déclenche pas un hash de chaque fichier à moitié copié
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+_libc = None
+
+
+def _load_libc():
+    """libc avec les fonctions inotify, ou None (autre système, libc sans inotify)"""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+                libc.inotify_init1.argtypes = [ctypes.c_int]
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                _libc = libc
+            except (OSError, AttributeError):
+                pass
+    return _libc or None
+
+
+def inotify_available():
+    """Vrai si inotify peut être utilisé (Linux)"""
+    return _load_libc() is not None
+
+
+class InotifyWatcher:
+    """Événements inotify des dossiers d'une arborescence.
+
+    inotify n'est pas récursif : chaque dossier a son propre watch, ajouté
+    ou retiré par sync(). Les événements ne disent que quel dossier a
+    changé ; le dossier est ensuite relu en entier (voir Snapshot.refresh).
+    """
+    mode = 'inotify'
+
+    def __init__(self):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify indisponible")
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._paths = {}  # wd -> dossier
+        self._watches = {}  # dossier -> wd
+        self.overflowed = False  # Des événements ont été perdus : tout doit être revérifié
+        self.failed = 0  # Dossiers non surveillés (limite max_user_watches atteinte par exemple)
+
+    def sync(self, dirs):
+        """Surveille exactement les dossiers de dirs (chemin -> DirState) ; retourne les dossiers ajoutés"""
+        for path in [path for path in self._watches if path not in dirs]:
+            self._libc.inotify_rm_watch(self._fd, self._watches.pop(path))
+        added = []
+        for path in dirs:
+            if path in self._watches:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                self.failed += 1
+                continue
+            self._watches[path] = wd
+            self._paths[wd] = path
+            added.append(path)
+        return added
+
+    def read(self, timeout):
+        """Attend au plus timeout secondes ; retourne l'ensemble des dossiers qui ont changé"""
+        changed = set()
+        try:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+        except InterruptedError:
+            return changed
+        if not ready:
+            return changed
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                path = self._paths.get(wd)
+                if path is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # Dossier supprimé ou démonté : le watch a été retiré par le noyau
+                    del self._paths[wd]
+                    self._watches.pop(path, None)
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """Repli sans inotify : compare régulièrement la date de modification de chaque dossier.
+
+    Un stat par dossier et par passage. Comme pour une analyse incrémentale,
+    seuls les fichiers créés, supprimés ou renommés changent la date d'un
+    dossier : une modification faite sur place n'est pas vue.
+    """
+    mode = 'polling'
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.overflowed = False
+        self.failed = 0
+        self._mtimes = {}
+        self._next_poll = time.monotonic() + interval
+
+    def sync(self, dirs):
+        """Retient la date de chaque dossier de dirs (chemin -> DirState) ; retourne les dossiers ajoutés"""
+        added = [path for path in dirs if path not in self._mtimes]
+        self._mtimes = {path: state.mtime_ns for path, state in dirs.items()}
+        return added
+
+    def read(self, timeout):
+        """Attend au plus timeout secondes ; retourne les dossiers dont la date a changé"""
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+
+        changed = set()
+        for path, mtime_ns in self._mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    changed.add(path)
+            except OSError:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """Suit les changements du dossier analysé et met l'analyse à jour au fil de l'eau.
+
+    Les événements ne font que marquer des dossiers à relire. La mise à jour
+    (FileAnalyzer.update_directories) est faite après debounce secondes sans
+    nouvel événement, ou au plus tard max_delay secondes après le premier :
+    une copie de milliers de fichiers donne quelques mises à jour, pas un
+    hash par événement. on_update(changes) est appelé depuis le thread de
+    surveillance après chaque mise à jour réussie.
+
+    pause() suspend les mises à jour (pendant une analyse ou une suppression)
+    sans perdre les événements ; resume() les reprend.
+    """
+
+    def __init__(self, file_analyzer, on_update=None, debounce=DEBOUNCE, max_delay=MAX_DELAY,
+                 poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.file_analyzer = file_analyzer
+        self.on_update = on_update
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.updates = 0
+        self.backend = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._paused = False
+        self._lock = threading.Lock()  # Tenu pendant une mise à jour
+
+    @property
+    def mode(self):
+        """'inotify', 'polling', ou None si la surveillance n'est pas démarrée"""
+        return self.backend.mode if self.backend is not None else None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.backend = None
+        if self.use_inotify and inotify_available():
+            try:
+                self.backend = InotifyWatcher()
+            except OSError as e:
+                print(f"Erreur lors de l'initialisation d'inotify: {e}")
+        if self.backend is None:
+            self.backend = PollingWatcher(self.poll_interval)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.backend.close()
+
+    def pause(self):
+        """Suspend les mises à jour ; attend la fin de celle en cours"""
+        self._paused = True
+        with self._lock:
+            pass
+
+    def resume(self):
+        self._paused = False
+
+    def _run(self):
+        backend = self.backend
+        snapshot = None
+        pending = set()
+        first_event = last_event = None
+
+        while not self._stop.is_set():
+            # Nouvelle analyse (autre dossier, analyse complète) : les événements en attente sont périmés
+            if not self._paused and self.file_analyzer.snapshot is not snapshot:
+                snapshot = self.file_analyzer.snapshot
+                backend.sync(snapshot.dirs if snapshot is not None else {})
+                pending.clear()
+                first_event = last_event = None
+
+            changed = backend.read(WAIT_STEP)
+            now = time.monotonic()
+            if changed:
+                pending |= changed
+                last_event = now
+                if first_event is None:
+                    first_event = now
+            if backend.overflowed and snapshot is not None:
+                # Événements perdus : tous les dossiers sont relus
+                backend.overflowed = False
+                pending.update(snapshot.dirs)
+                first_event = first_event or now
+                last_event = now
+
+            if (not pending or self._paused or snapshot is None
+                    or (now - last_event < self.debounce and now - first_event < self.max_delay)):
+                continue
+
+            dirs, pending = pending, set()
+            first_event = last_event = None
+            with self._lock:
+                if self._paused:
+                    pending |= dirs
+                    first_event = last_event = now
+                    continue
+                success = self.file_analyzer.update_directories(dirs, self._stop)
+            if not success:
+                continue
+            self.updates += 1
+            # La mise à jour publie un nouvel instantané (voir FileAnalyzer.update_directories)
+            snapshot = self.file_analyzer.snapshot
+
+            # Nouveaux dossiers : surveillés à partir de maintenant, relus s'ils ont changé depuis leur lecture
+            for path in backend.sync(snapshot.dirs):
+                state = snapshot.dirs[path]
+                try:
+                    if os.stat(path).st_mtime_ns != state.mtime_ns:
+                        pending.add(path)
+                except OSError:
+                    pending.add(path)
+            if pending:
+                first_event = last_event = time.monotonic()
+
+            if self.on_update is not None:
+                self.on_update(self.file_analyzer.file_analysis['changes'])